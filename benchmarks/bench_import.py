@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# this_file: benchmarks/bench_import.py
+"""
+Measure cold import and CLI startup time, failing if a budget is exceeded.
+
+Each target runs ``ROUNDS`` times in a fresh interpreter with
+``-X importtime``; the best cumulative import time of the target module is
+compared with its budget, and the wall time of a whole
+``midjargon perm --json-output`` run with its own.  Budgets are generous
+multiples of the lazy-import timings so that only a real regression, such as
+an eager Pydantic, Rich or Fire import, trips them.  Run with::
+
+    python benchmarks/bench_import.py [SCALE]
+
+where the optional *SCALE* multiplies every budget (e.g. ``2`` on slow CI).
+The exit code is 1 if any target is over budget.
+"""
+
+from __future__ import annotations
+
+import subprocess
+import sys
+import time
+
+ROUNDS = 5
+
+# Module → budget for its cumulative import time, in milliseconds
+IMPORT_BUDGETS_MS = {
+    "midjargon": 60,
+    "midjargon.core.parser": 80,
+    "midjargon.cli.main": 150,
+}
+
+# Budget for the wall time of a complete ``perm --json-output`` run
+PERM_BUDGET_MS = 400
+PERM_CODE = (
+    "import sys\n"
+    "sys.argv = ['midjargon', 'perm', 'a {red, blue} bird', '--json-output']\n"
+    "from midjargon.cli import main\n"
+    "main()"
+)
+
+
+def _import_ms(module: str) -> float:
+    """Return the best cumulative import time of *module* in milliseconds."""
+    best = float("inf")
+    for _ in range(ROUNDS):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        # Lines read "import time: <self us> | <cumulative us> | <module>"
+        for line in result.stderr.splitlines():
+            _, cumulative, name = line.split("|")
+            if name.strip() == module:
+                best = min(best, int(cumulative) / 1000)
+    return best
+
+
+def _run_ms(code: str) -> float:
+    """Return the best wall time of running *code* in milliseconds."""
+    best = float("inf")
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], capture_output=True, check=True)
+        best = min(best, (time.perf_counter() - start) * 1000)
+    return best
+
+
+def main() -> int:
+    """Run the measurements and return the process exit code."""
+    scale = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+    timings = {
+        f"import {module}": (_import_ms(module), budget * scale)
+        for module, budget in IMPORT_BUDGETS_MS.items()
+    }
+    timings["perm --json-output"] = (_run_ms(PERM_CODE), PERM_BUDGET_MS * scale)
+
+    failed = False
+    for name, (elapsed, budget) in timings.items():
+        over = elapsed > budget
+        failed |= over
+        status = "OVER BUDGET" if over else "ok"
+        print(f"{name:>30}: {elapsed:7.1f} ms (budget {budget:.0f} ms) {status}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
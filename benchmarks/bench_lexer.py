@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# this_file: benchmarks/bench_lexer.py
+"""
+Compare the single-pass lexer against the previous multi-pass prompt split.
+
+The reference implementation below is the split/join/char-loop sequence that
+``parse_midjargon_prompt_to_dict`` and ``parse_parameters`` used before
+``midjargon.core.lexer`` existed.  Run with::
+
+    python benchmarks/bench_lexer.py
+
+The script exits non-zero if the lexer is not at least ``MIN_SPEEDUP`` times
+faster on the long prompt.
+"""
+
+from __future__ import annotations
+
+import sys
+import timeit
+
+from midjargon.core.lexer import lex_prompt
+
+MIN_SPEEDUP = 2.0
+NUMBER = 2000
+REPEAT = 5
+
+LONG_PROMPT = (
+    "https://example.com/a.png https://example.com/b.png "
+    + "a very detailed painting of a lighthouse in a storm " * 10
+    + " ".join(f"--x{i} value{i}" for i in range(40))
+    + " --ar 16:9 --s 250 --cref https://e.com/c.png https://e.com/d.png"
+    + ' --p abc def --no "blurry  text"'
+)
+SHORT_PROMPT = "a cat on a mat --ar 16:9"
+
+
+def _legacy_tokenize(param_str: str) -> list[str]:
+    tokens: list[str] = []
+    current: list[str] = []
+    in_quotes = False
+    quote_char = ""
+    for char in param_str:
+        if char in ('"', "'") and not in_quotes:
+            in_quotes = True
+            quote_char = char
+        elif in_quotes and char == quote_char:
+            in_quotes = False
+            quote_char = ""
+        elif char.isspace() and not in_quotes:
+            if current:
+                tokens.append("".join(current))
+                current = []
+        else:
+            current.append(char)
+    if current:
+        tokens.append("".join(current))
+    return tokens
+
+
+def legacy_lex(prompt: str) -> tuple[list[str], str, list[str]]:
+    """Split *prompt* the way the parser did before the lexer existed."""
+    parts = prompt.split()
+    images: list[str] = []
+    idx = 0
+    for i, part in enumerate(parts):
+        if part.startswith(("http://", "https://")):
+            images.append(part)
+            idx = i + 1
+        else:
+            break
+    remaining = " ".join(parts[idx:])
+    if " --" in remaining:
+        text_raw, param_tail = remaining.split(" --", 1)
+        param_str = "--" + param_tail
+    else:
+        text_raw, param_str = remaining, ""
+    text = " ".join(text_raw.split())
+    return images, text, _legacy_tokenize(param_str.strip())
+
+
+def _best(func: object, prompt: str) -> float:
+    timer = timeit.Timer(lambda: func(prompt))  # type: ignore[operator]
+    return min(timer.repeat(number=NUMBER, repeat=REPEAT)) / NUMBER
+
+
+def main() -> int:
+    """Run the comparison and return the process exit code."""
+    speedups = {}
+    for name, prompt in (("short", SHORT_PROMPT), ("long", LONG_PROMPT)):
+        assert tuple(lex_prompt(prompt)) == legacy_lex(prompt)
+        before = _best(legacy_lex, prompt)
+        after = _best(lex_prompt, prompt)
+        speedups[name] = before / after
+        print(
+            f"{name:>5}: legacy {before * 1e6:8.2f} µs  "
+            f"lexer {after * 1e6:8.2f} µs  speedup {before / after:5.1f}x"
+        )
+    if speedups["long"] < MIN_SPEEDUP:
+        print(f"FAIL: expected at least {MIN_SPEEDUP}x on the long prompt")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# this_file: benchmarks/bench_midjourney.py
+"""
+Measure the saving of ``MidjourneyParser.parse_dict(..., trusted=True)``.
+
+Both paths get the same dicts from ``parse_midjargon_prompt_to_dict``; the
+trusted path builds the models with ``model_construct`` instead of running
+Pydantic validation a second time.  Run with::
+
+    python benchmarks/bench_midjourney.py
+"""
+
+from __future__ import annotations
+
+import sys
+import timeit
+from typing import Any
+
+from midjargon.core.parser import parse_midjargon_prompt_to_dict
+from midjargon.engines.midjourney import MidjourneyParser
+
+NUMBER = 2000
+REPEAT = 5
+
+PROMPTS = {
+    "plain": "a watercolor painting of a fox in the snow",
+    "params": "a fox --ar 16:9 --s 250 --c 20 --v 6.1 --style raw --seed 42 --tile",
+    "images": (
+        "https://example.com/a.png https://example.com/b.png a fox "
+        "--cref https://example.com/c.png --cw 50 --iw 1.5 --q 0.5 --p abc"
+    ),
+}
+
+
+def _dict(prompt: str) -> dict[str, Any]:
+    d: dict[str, Any] = parse_midjargon_prompt_to_dict(prompt)
+    d["image_prompts"] = d.pop("images")
+    return d
+
+
+def _best(func: Any) -> float:
+    return min(timeit.repeat(func, number=NUMBER, repeat=REPEAT)) / NUMBER
+
+
+def main() -> int:
+    """Run the comparison and return the process exit code."""
+    parser = MidjourneyParser()
+    for name, prompt in PROMPTS.items():
+        d = _dict(prompt)
+        assert parser.parse_dict(d, trusted=True) == parser.parse_dict(d)
+        validated = _best(lambda d=d: parser.parse_dict(d))
+        trusted = _best(lambda d=d: parser.parse_dict(d, trusted=True))
+        print(
+            f"{name:>6}: validated {validated * 1e6:7.2f} µs  "
+            f"trusted {trusted * 1e6:7.2f} µs  "
+            f"saving {(validated - trusted) * 1e6:6.2f} µs/prompt "
+            f"({validated / trusted:4.1f}x)"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
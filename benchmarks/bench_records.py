@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# this_file: benchmarks/bench_records.py
+"""
+Compare the memory held per parsed prompt by the different representations.
+
+Builds ``COUNT`` prompts from a permutation template and measures, with
+``tracemalloc``, the bytes kept alive by a list of ``MidjourneyPrompt``
+models, of their ``model_dump()`` dicts (what ``convert_many`` used to
+yield) and of ``PromptRecord`` tuples.  Run with::
+
+    python benchmarks/bench_records.py
+"""
+
+from __future__ import annotations
+
+import gc
+import sys
+import tracemalloc
+from typing import Any
+
+from midjargon.batch import to_midjourney
+from midjargon.core.permutations import iter_expand
+
+COUNT = 20_000
+TEMPLATE = (
+    "https://example.com/{a, b, c, d}.png a {red, green, blue, gold} "
+    "{fox, owl, cat, bear, wolf} in a {forest, city, desert, cave, bay} "
+    "--ar {16:9, 1:1, 2:3} --s {100, 250, 750} --v 6.1 --seed {1, 2, 3, 4, 5, 6}"
+)
+
+
+def _measure(build: Any) -> float:
+    gc.collect()
+    tracemalloc.start()
+    held = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del held
+    return size / COUNT
+
+
+def main() -> int:
+    """Run the comparison and return the process exit code."""
+    variants = list(iter_expand(TEMPLATE, 0, COUNT))
+    records = [to_midjourney(v) for v in variants]
+
+    sizes = {
+        "MidjourneyPrompt": _measure(lambda: [r.to_prompt() for r in records]),
+        "model_dump() dict": _measure(lambda: [r.to_dict() for r in records]),
+        "PromptRecord": _measure(lambda: [to_midjourney(v) for v in variants]),
+    }
+    for name, size in sizes.items():
+        print(f"{name:>18}: {size:8.0f} bytes/prompt")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
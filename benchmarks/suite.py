@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# this_file: benchmarks/suite.py
+"""
+Time every pipeline stage on representative prompt corpora.
+
+Each stage runs over each corpus it applies to; the best of ``--repeat``
+runs is reported as time per prompt (per invocation for the CLI stage).
+Save a baseline on the release machine and compare later runs against it::
+
+    python benchmarks/suite.py --save benchmarks/baseline.json
+    python benchmarks/suite.py --compare benchmarks/baseline.json
+
+``--compare`` exits with status 1 if any stage/corpus pair got slower than
+``--threshold`` times its baseline.  ``--filter TEXT`` runs only the pairs
+whose name contains *TEXT*; ``--no-cli`` skips the subprocess stage.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import timeit
+from collections.abc import Callable
+from itertools import islice
+from pathlib import Path
+from typing import Any
+
+from midjargon.core.models import MidjourneyPrompt
+from midjargon.core.parameters import parse_parameters
+from midjargon.core.parser import disable_parse_cache, parse_midjargon_prompt_to_dict
+from midjargon.core.permutations import compile_prompt, expand_permutations, iter_expand
+from midjargon.engines.fal import to_fal_dict
+from midjargon.engines.midjourney import MidjourneyParser
+from midjargon.engines.midjourney.parser import MidjourneyParser as LegacyParser
+
+REPEAT = 5
+THRESHOLD = 1.25  # slowdown factor that counts as a regression
+MAX_VARIANTS = 2000  # expanded variants per corpus fed to the later stages
+CLI_REPEAT = 3
+
+# ---------------------------------------------------------------------------
+# Corpora: raw prompts, possibly with permutation groups
+# ---------------------------------------------------------------------------
+
+_COLORS = ["red", "green", "blue", "gold", "silver", "black", "white", "teal"]
+_ANIMALS = ["fox", "owl", "cat", "bear", "wolf", "heron", "otter", "lynx"]
+_PLACES = ["forest", "city", "desert", "cave", "bay", "meadow", "tundra"]
+
+_LONG_PARAMS = (
+    "--ar 16:9 --s 250 --c 20 --w 100 --q 1 --v 6.1 --style raw --stop 50 "
+    "--iw 1.5 --cw 50 --sw 200 --sv 2 --r 1 --p abc def --tile --no blur "
+    + " ".join(f"--x{i} value{i}" for i in range(10))
+)
+
+CORPORA: dict[str, list[str]] = {
+    "short": [
+        f"a {color} {animal} in the {place}"
+        for color in _COLORS
+        for animal in _ANIMALS
+        for place in _PLACES[:4]
+    ],
+    "long_params": [
+        f"a very detailed oil painting of a {color} {animal} " * 4
+        + f"--seed {i} {_LONG_PARAMS}"
+        for i, (color, animal) in enumerate(zip(_COLORS * 8, _ANIMALS * 8, strict=True))
+    ],
+    "nested": [
+        "a {big {red, {dark, light} blue}, small {green, yellow}} "
+        f"{animal} "
+        "{on a {branch, {tall, short} rock}, flying {high, {very, quite} low}} "
+        "--ar {16:9, {1:1, 2:3}} --s {100, {250, 750}}"
+        for animal in _ANIMALS
+    ],
+    "cartesian": [
+        "a {red, green, blue, gold, teal} {fox, owl, cat, bear, wolf} "
+        "in a {forest, city, desert, cave, bay} at {dawn, noon, dusk, night} "
+        "--ar {16:9, 1:1, 2:3} --s {100, 250, 750} --v 6.1"
+    ],
+    "images": [
+        " ".join(f"https://example.com/{animal}/{i}.png" for i in range(10))
+        + f" a {color} {animal} collage --iw 1.5 "
+        + "--cref https://example.com/c1.png https://example.com/c2.png "
+        + "--sref https://example.com/s1.png --ar 3:2"
+        for color, animal in zip(_COLORS, _ANIMALS, strict=True)
+    ],
+}
+
+
+def _variants(prompts: list[str]) -> list[str]:
+    expanded = (v for prompt in prompts for v in iter_expand(prompt))
+    return list(islice(expanded, MAX_VARIANTS))
+
+
+def _params(variant: str) -> str:
+    index = variant.find(" --")
+    return variant[index + 1 :] if index >= 0 else ""
+
+
+def _engine_dict(variant: str) -> dict[str, Any]:
+    d: dict[str, Any] = parse_midjargon_prompt_to_dict(variant)
+    d["image_prompts"] = d.pop("images")
+    return d
+
+
+# ---------------------------------------------------------------------------
+# Stages: (name, prepare) where prepare(raw prompts) returns the items and
+# the function applied to each item
+# ---------------------------------------------------------------------------
+
+_Prepared = tuple[list[Any], Callable[[Any], Any]]
+_parser = MidjourneyParser()
+
+
+def _validated(d: dict[str, Any]) -> Any:
+    return _parser.parse_dict(d)
+
+
+def _trusted(d: dict[str, Any]) -> Any:
+    return _parser.parse_dict(d, trusted=True)
+
+
+def _prompts(raw: list[str]) -> list[MidjourneyPrompt]:
+    return [_trusted(_engine_dict(v)) for v in _variants(raw)]
+
+
+STAGES: dict[str, Callable[[list[str]], _Prepared]] = {
+    "expand_permutations": lambda raw: (raw, expand_permutations),
+    "parse_parameters": lambda raw: (
+        [_params(v) for v in _variants(raw)],
+        parse_parameters,
+    ),
+    "parse_to_dict": lambda raw: (_variants(raw), parse_midjargon_prompt_to_dict),
+    "mj_parse_dict": lambda raw: (
+        [_engine_dict(v) for v in _variants(raw)],
+        _validated,
+    ),
+    "mj_parse_dict_trusted": lambda raw: (
+        [_engine_dict(v) for v in _variants(raw)],
+        _trusted,
+    ),
+    "mj_legacy_parse_dict": lambda raw: (
+        [parse_midjargon_prompt_to_dict(v) for v in _variants(raw)],
+        LegacyParser().parse_dict,
+    ),
+    "to_fal_dict": lambda raw: (
+        [parse_midjargon_prompt_to_dict(v) for v in _variants(raw)],
+        to_fal_dict,
+    ),
+    "prompt_to_string": lambda raw: (_prompts(raw), MidjourneyPrompt.to_string),
+    "prompt_model_dump": lambda raw: (_prompts(raw), MidjourneyPrompt.model_dump),
+}
+
+
+def _time_stage(prepared: _Prepared, repeat: int) -> float:
+    """Return the best time per item of applying the stage to every item."""
+    items, func = prepared
+
+    def run() -> None:
+        compile_prompt.cache_clear()  # measure compiling, not cache hits
+        for item in items:
+            func(item)
+
+    return min(timeit.repeat(run, number=1, repeat=repeat)) / len(items)
+
+
+def _time_cli(raw: list[str]) -> float:
+    """Return the best wall time of one ``midjargon mj`` run on the corpus."""
+    command = [sys.executable, "-m", "midjargon", "mj", raw[0], "--format", "jsonl"]
+
+    def run() -> None:
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+
+    return min(timeit.repeat(run, number=1, repeat=CLI_REPEAT))
+
+
+def run_suite(
+    name_filter: str = "", repeat: int = REPEAT, cli: bool = True
+) -> dict[str, float]:
+    """Return ``{"stage/corpus": seconds per item}`` for every selected pair."""
+    disable_parse_cache()  # measure parsing, not cache hits
+    results: dict[str, float] = {}
+    for corpus, raw in CORPORA.items():
+        for stage, prepare in STAGES.items():
+            name = f"{stage}/{corpus}"
+            if name_filter in name:
+                results[name] = _time_stage(prepare(raw), repeat)
+        if cli and name_filter in f"cli/{corpus}":
+            results[f"cli/{corpus}"] = _time_cli(raw)
+    return results
+
+
+def _format(seconds: float) -> str:
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:9.2f} ms"
+    return f"{seconds * 1e6:9.2f} µs"
+
+
+def compare(
+    results: dict[str, float], baseline: dict[str, float], threshold: float
+) -> bool:
+    """Print *results* against *baseline*; return True if any regressed."""
+    regressed = False
+    for name, seconds in results.items():
+        before = baseline.get(name)
+        if before is None:
+            print(f"{name:>36}: {_format(seconds)}  (no baseline)")
+            continue
+        ratio = seconds / before
+        slower = ratio > threshold
+        regressed |= slower
+        flag = "  REGRESSION" if slower else ""
+        print(f"{name:>36}: {_format(seconds)}  {ratio:5.2f}x baseline{flag}")
+    return regressed
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the suite and return the process exit code."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--save", type=Path, help="write the results as a baseline")
+    parser.add_argument("--compare", type=Path, help="baseline to compare with")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    parser.add_argument("--filter", default="", help="only run matching pairs")
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--no-cli", action="store_true", help="skip the CLI stage")
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.filter, args.repeat, cli=not args.no_cli)
+    regressed = False
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())["results"]
+        regressed = compare(results, baseline, args.threshold)
+    else:
+        for name, seconds in results.items():
+            print(f"{name:>36}: {_format(seconds)}")
+    if args.save:
+        meta = {"python": platform.python_version(), "machine": platform.machine()}
+        args.save.write_text(json.dumps({"meta": meta, "results": results}, indent=2))
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,27 +2,84 @@
 midjargon
 
 A Python library for parsing and manipulating Midjourney prompts.
+
+The public names below are imported on first access (PEP 562), so
+``import midjargon`` does not load Pydantic or the engines until a model or
+engine function is actually used.
 """
 
-from importlib import metadata
+from __future__ import annotations
+
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
 
 try:
     from midjargon.__version__ import __version__
 except ImportError:
+    pass  # read from the package metadata on first access, see __getattr__
+
+if TYPE_CHECKING:
+    from midjargon.core.input import expand_midjargon_input
+    from midjargon.core.models import (CharacterReference, ImageReference,
+                                       MidjourneyParameters, MidjourneyPrompt,
+                                       MidjourneyVersion, PromptVariant,
+                                       StyleMode, StyleReference)
+    from midjargon.core.parser import (parse_midjargon_prompt,
+                                       parse_midjargon_prompt_to_dict)
+    from midjargon.core.type_defs import (MidjargonDict, MidjargonInput,
+                                          MidjargonList, MidjargonPrompt)
+    from midjargon.engines.midjourney import parse_midjourney_dict
+
+# Public name → module it is imported from on first access
+_LAZY_IMPORTS: dict[str, str] = {
+    "MidjargonDict": "midjargon.core.type_defs",
+    "MidjargonInput": "midjargon.core.type_defs",
+    "MidjargonList": "midjargon.core.type_defs",
+    "MidjargonPrompt": "midjargon.core.type_defs",
+    "CharacterReference": "midjargon.core.models",
+    "ImageReference": "midjargon.core.models",
+    "MidjourneyParameters": "midjargon.core.models",
+    "MidjourneyPrompt": "midjargon.core.models",
+    "MidjourneyVersion": "midjargon.core.models",
+    "PromptVariant": "midjargon.core.models",
+    "StyleMode": "midjargon.core.models",
+    "StyleReference": "midjargon.core.models",
+    "expand_midjargon_input": "midjargon.core.input",
+    "parse_midjargon_prompt": "midjargon.core.parser",
+    "parse_midjargon_prompt_to_dict": "midjargon.core.parser",
+    "parse_midjourney_dict": "midjargon.engines.midjourney",
+}
+
+
+def _metadata_version() -> str:
+    from importlib import metadata
+
     try:
-        __version__ = metadata.version("midjargon")
+        return metadata.version("midjargon")
     except metadata.PackageNotFoundError:
-        __version__ = "0.0.0"
+        return "0.0.0"
+
+
+def __getattr__(name: str) -> Any:
+    if name == "__version__":
+        value = globals()[name] = _metadata_version()
+        return value
+    try:
+        module = _LAZY_IMPORTS[name]
+    except KeyError:
+        msg = f"module {__name__!r} has no attribute {name!r}"
+        raise AttributeError(msg) from None
+    value = getattr(import_module(module), name)
+    globals()[name] = value  # later lookups skip __getattr__
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted({*globals(), "__version__", *_LAZY_IMPORTS})
 
-from midjargon.core.input import expand_midjargon_input
-from midjargon.core.models import (CharacterReference, ImageReference,
-                                   MidjourneyParameters, MidjourneyPrompt,
-                                   MidjourneyVersion, PromptVariant, StyleMode,
-                                   StyleReference)
-from midjargon.core.parser import (parse_midjargon_prompt,
-                                   parse_midjargon_prompt_to_dict)
 
 __all__ = [
+    "__version__",
     "MidjargonDict",
     # Core types
     "MidjargonInput",
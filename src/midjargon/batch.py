@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+# this_file: src/midjargon/batch.py
+"""
+midjargon.batch
+~~~~~~~~~~~~~~~
+
+Multi-process batch pipeline: expand → parse → engine convert.
+
+``convert_many`` plans the work from the permutation structure of each prompt
+(no expansion in the parent process), ships chunks of ``(prompt, start, stop)``
+variant ranges to a ``ProcessPoolExecutor``, and yields one ``BatchItem`` per
+variant in input order as soon as its chunk is done.  Conversion errors are
+reported per item instead of aborting the batch.  Each worker parses the
+``--`` parameter string shared by many variants only once (see
+:class:`~midjargon.core.parser.BatchParser`).
+"""
+
+from __future__ import annotations
+
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+from midjargon.core.parser import BatchParser, parse_midjargon_prompt_to_dict
+from midjargon.core.permutations import count_variants, iter_expand
+from midjargon.core.records import PromptRecord
+from midjargon.engines.fal import to_fal_dict
+from midjargon.engines.midjourney import MidjourneyParser
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Iterator
+
+# Default number of variants handed to a worker at a time
+DEFAULT_CHUNKSIZE = 256
+
+# Chunks kept in flight per worker, bounding memory for endless inputs
+_PREFETCH_PER_WORKER = 2
+
+# One unit of work: (prompt_index, prompt, start, stop) variant range;
+# a stop of None means "up to the last variant"
+_Task = tuple[int, str, int, int | None]
+
+_parser = MidjourneyParser()
+
+
+class BatchItem(NamedTuple):
+    """Outcome of converting one expanded variant."""
+
+    prompt_index: int  # position of the source prompt in the input
+    variant_index: int  # position of the variant within its prompt
+    variant: str  # the expanded prompt string
+    result: Any  # converted output, or None on error
+    error: str | None  # error message, or None on success
+
+
+# ---------------------------------------------------------------------------
+# Per-variant converters
+# ---------------------------------------------------------------------------
+
+
+def to_midjargon(variant: str) -> dict[str, Any]:
+    """Parse an expanded *variant* into a ``MidjargonDict``."""
+    return parse_midjargon_prompt_to_dict(variant)
+
+
+def to_midjourney(variant: str) -> PromptRecord:
+    """Parse an expanded *variant* into a compact Midjourney prompt record.
+
+    Use ``record.to_dict()`` for the ``MidjourneyPrompt.model_dump()`` dict
+    or ``record.to_prompt()`` for the model itself.
+    """
+    return midjourney_record(parse_midjargon_prompt_to_dict(variant))
+
+
+def midjourney_record(parsed: dict[str, Any]) -> PromptRecord:
+    """Validate a parsed ``MidjargonDict`` into a Midjourney prompt record.
+
+    *parsed* is consumed: its ``images`` key is renamed in place.
+    """
+    # Rename "images" → "image_prompts" for MidjourneyParser
+    if "images" in parsed:
+        parsed["image_prompts"] = parsed.pop("images")
+    return PromptRecord.from_prompt(_parser.parse_dict(parsed, trusted=True))
+
+
+def to_fal(variant: str) -> dict[str, Any]:
+    """Parse an expanded *variant* and convert it to Fal.ai format."""
+    return to_fal_dict(parse_midjargon_prompt_to_dict(variant))
+
+
+CONVERTERS: dict[str, Callable[[str], Any]] = {
+    "midjargon": to_midjargon,
+    "midjourney": to_midjourney,
+    "fal": to_fal,
+}
+
+# The same conversions from an already parsed dict, keyed by the converter
+# they stand in for.  A converter replaced in CONVERTERS is used as it is;
+# worker processes are sent the converter itself, so it must be picklable.
+_FROM_PARSED: dict[Callable[[str], Any], Callable[[dict[str, Any]], Any]] = {
+    to_midjargon: lambda parsed: parsed,
+    to_midjourney: midjourney_record,
+    to_fal: to_fal_dict,
+}
+
+
+def _get_converter(engine: str) -> Callable[[str], Any]:
+    try:
+        return CONVERTERS[engine]
+    except KeyError:
+        msg = f"Unknown engine: {engine} (expected one of {', '.join(CONVERTERS)})"
+        raise ValueError(msg) from None
+
+
+# ---------------------------------------------------------------------------
+# Work planning and execution
+# ---------------------------------------------------------------------------
+
+
+def _plan_chunks(prompts: Iterable[str], chunksize: int) -> Iterator[list[_Task]]:
+    """Group the variant ranges of *prompts* into chunks of ~*chunksize* variants."""
+    chunk: list[_Task] = []
+    room = chunksize
+    for prompt_index, prompt in enumerate(prompts):
+        total = count_variants(prompt)
+        start = 0
+        while start < total:
+            stop = min(total, start + room)
+            chunk.append((prompt_index, prompt, start, stop))
+            room -= stop - start
+            start = stop
+            if not room:
+                yield chunk
+                chunk = []
+                room = chunksize
+    if chunk:
+        yield chunk
+
+
+def iter_convert(
+    engine: str | Callable[[str], Any], tasks: Iterable[_Task]
+) -> Iterator[BatchItem]:
+    """Expand and convert variant ranges in the calling process, one at a time.
+
+    Args:
+        engine: Target format, a key of :data:`CONVERTERS`, or the converter
+                itself.
+        tasks: ``(prompt_index, prompt, start, stop)`` tuples; the variants
+               of *prompt* from *start* up to *stop* (None for the last) are
+               converted and reported under *prompt_index*.
+
+    Returns:
+        Iterator of :class:`BatchItem`, one per variant, in task order.
+
+    Raises:
+        ValueError: If the engine is unknown.
+    """
+    convert = _get_converter(engine) if isinstance(engine, str) else engine
+    from_parsed = _FROM_PARSED.get(convert)
+    parse = BatchParser()
+    for prompt_index, prompt, start, stop in tasks:
+        variants = iter_expand(prompt, start, stop)
+        for variant_index, variant in enumerate(variants, start):
+            try:
+                if from_parsed is None:
+                    result, error = convert(variant), None
+                else:
+                    result, error = from_parsed(parse(variant)), None
+            except (ValueError, TypeError) as exc:
+                result, error = None, str(exc)
+            yield BatchItem(prompt_index, variant_index, variant, result, error)
+
+
+def _convert_chunk(
+    convert: Callable[[str], Any], chunk: list[_Task]
+) -> list[BatchItem]:
+    """Convert a whole chunk at once (runs in a worker process)."""
+    return list(iter_convert(convert, chunk))
+
+
+def convert_many(
+    prompts: Iterable[str],
+    engine: str = "midjourney",
+    *,
+    workers: int | None = None,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+) -> Iterator[BatchItem]:
+    """Expand, parse and convert many prompts, spreading the work over processes.
+
+    Args:
+        prompts: Raw prompt strings, possibly containing permutation groups.
+                 Consumed lazily, so it may be a generator over a huge input.
+        engine: Target format: ``"midjourney"`` (a compact
+                :class:`~midjargon.core.records.PromptRecord`), ``"fal"``, or
+                ``"midjargon"`` (the parsed ``MidjargonDict``).
+        workers: Number of worker processes; ``None`` uses all CPUs and
+                 ``0`` or ``1`` converts in the calling process.
+        chunksize: Number of variants sent to a worker at a time (ignored
+                   when converting in the calling process).
+
+    Returns:
+        Iterator of :class:`BatchItem`, one per expanded variant, in input
+        order.  Items are yielded as soon as their chunk is converted.
+
+    Raises:
+        ValueError: If the engine is unknown or *chunksize* is not positive.
+    """
+    convert = _get_converter(engine)
+    if chunksize < 1:
+        msg = f"Chunk size must be positive: {chunksize}"
+        raise ValueError(msg)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1:
+        # In-process: stream every variant as soon as it is converted
+        tasks = ((i, prompt, 0, None) for i, prompt in enumerate(prompts))
+        return iter_convert(convert, tasks)
+    return _convert_in_pool(convert, _plan_chunks(prompts, chunksize), workers)
+
+
+def _convert_in_pool(
+    convert: Callable[[str], Any], chunks: Iterator[list[_Task]], workers: int
+) -> Iterator[BatchItem]:
+    """Run :func:`_convert_chunk` over *chunks* in a process pool, in order."""
+    executor = ProcessPoolExecutor(max_workers=workers)
+    pending: deque[Future[list[BatchItem]]] = deque()
+    try:
+        for chunk in chunks:
+            pending.append(executor.submit(_convert_chunk, convert, chunk))
+            if len(pending) >= workers * _PREFETCH_PER_WORKER:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
@@ -12,21 +12,43 @@ CLI tool for parsing, permuting, and converting Midjourney prompts.
 
 from __future__ import annotations
 
+import inspect
 import json
 import sys
+from contextlib import nullcontext
+from functools import wraps
+from itertools import chain, islice
 from typing import TYPE_CHECKING, Any, NoReturn
 
-import fire
 from midjargon.core.input import expand_midjargon_input
-from midjargon.core.parser import parse_midjargon_prompt_to_dict
-from midjargon.engines.fal import to_fal_dict
-from midjargon.engines.midjourney import MidjourneyParser
-from rich.console import Console
-from rich.panel import Panel
+from midjargon.core.parser import parse_prompts
+from midjargon.core.permutations import expand_shard, parse_shard
 
+# Fire, Rich and the engines (which load Pydantic) are imported where they are
+# used, so a command only pays for what it needs; see tests/test_package.py.
 if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Iterator
+    from contextlib import AbstractContextManager
+    from types import TracebackType
+    from typing import IO
+
+    from rich.console import Console
+
+    from midjargon.core.budget import ExpansionBudget
+    from midjargon.core.sampling import SampleSpec
     from midjargon.core.type_defs import MidjargonDict
 
+# CLI command names accepted as ``batch --engine`` values
+_BATCH_ENGINES = {"json": "midjargon", "mj": "midjourney"}
+
+# ``--format`` values of the prompt commands: ``plain`` writes one variant per
+# line (dicts as indented JSON), ``jsonl`` one compact JSON value per line,
+# ``json`` a single JSON document and ``rich`` coloured panels
+OUTPUT_FORMATS = ("plain", "jsonl", "json", "rich")
+
+# Variants rendered as Rich panels before the rest are only counted
+RICH_MAX_VARIANTS = 100
+
 
 # ---------------------------------------------------------------------------
 # Internal helpers
@@ -38,53 +60,389 @@ def _output_json(data: Any) -> None:
     sys.stdout.flush()
 
 
+def _output_json_array(items: Iterable[Any]) -> None:
+    """Stream *items* to stdout as an indented JSON array, one at a time.
+
+    The output is byte-identical to ``_output_json(list(items))``.  The array
+    is closed even if producing an item fails: an error before the first item
+    propagates with nothing written, a later conversion error becomes a last
+    ``{"error": ...}`` element and exits with status 1.
+    """
+    write = sys.stdout.write
+
+    def element(value: Any) -> str:
+        return json.dumps(value, indent=2).replace("\n", "\n  ")
+
+    first = True
+    try:
+        for item in items:
+            write("[\n  " if first else ",\n  ")
+            write(element(item))
+            first = False
+    except (ValueError, TypeError, SyntaxError) as error:
+        if first:
+            raise
+        write(",\n  " + element({"error": str(error)}))
+        sys.exit(1)
+    finally:
+        if not first:
+            write("\n]")
+            sys.stdout.flush()
+    if first:
+        write("[]")
+        sys.stdout.flush()
+
+
 def _format_prompt(prompt: Any) -> str:
     if hasattr(prompt, "model_dump"):
         return json.dumps(prompt.model_dump(), indent=2)
     return json.dumps(prompt, indent=2)
 
 
-def _handle_error(console: Console, error: Exception) -> NoReturn:
+def _console(no_color: bool) -> Console:
+    from rich.console import Console
+
+    return Console(force_terminal=not no_color)
+
+
+def _panel(text: str) -> Any:
+    from rich.panel import Panel
+
+    return Panel(text)
+
+
+def _handle_error(error: Exception) -> NoReturn:
+    from rich.console import Console
+
     error_console = Console(stderr=True)
     error_console.print(f"Error: {error!s}", style="red")
     sys.exit(1)
 
 
-def permute_prompt(prompt: str) -> list[str]:
-    """Expand permutation groups in *prompt*; return list of variant strings."""
-    return expand_midjargon_input(prompt)
+def _budget(
+    max_variants: int | None,
+    max_bytes: int | None,
+    max_depth: int | None,
+    on_limit: str,
+) -> ExpansionBudget | None:
+    """Return the expansion budget of the CLI options, or None if unlimited."""
+    if max_variants is None and max_bytes is None and max_depth is None:
+        return None
+    from midjargon.core.budget import ExpansionBudget
+
+    return ExpansionBudget(max_variants, max_bytes, max_depth, on_limit)
+
+
+def _sample_spec(
+    sample: int | None, sample_seed: int | None, sample_strategy: str
+) -> SampleSpec | None:
+    """Return the sampling requested by the CLI options, or None."""
+    if sample is None:
+        return None
+    from midjargon.core.sampling import SampleSpec
+
+    return SampleSpec(sample, sample_seed, sample_strategy)
+
+
+def _sample(
+    prompt: str, sample: SampleSpec, budget: ExpansionBudget | None
+) -> Iterator[str]:
+    """Draw *sample* from *prompt*; a *budget* limits the nesting depth and
+    the size of the sample rather than the whole permutation space."""
+    from midjargon.core.budget import (
+        check_budget,
+        check_depth,
+        limit_bytes,
+        variant_limit,
+    )
+    from midjargon.core.sampling import sample_variants
+
+    k = sample.k
+    if budget is not None:
+        check_budget(budget)
+        check_depth(prompt, budget)
+        k = variant_limit(k, budget)
+    variants = sample_variants(prompt, k, seed=sample.seed, strategy=sample.strategy)
+    return iter(variants if budget is None else limit_bytes(variants, budget))
+
+
+def _expand(
+    prompt: str,
+    shard: tuple[int, int] | None = None,
+    budget: ExpansionBudget | None = None,
+    sample: SampleSpec | None = None,
+) -> Iterator[str]:
+    """Lazily expand *prompt*, restricted to ``(index, count)`` *shard* if given.
+
+    A *budget* is checked before anything is expanded.  With *sample* only
+    the variants drawn at random are rendered.
+    """
+    if sample is not None:
+        if shard is not None:
+            msg = "--sample cannot be combined with --shard"
+            raise ValueError(msg)
+        return _sample(prompt, sample, budget)
+    if budget is not None:
+        from midjargon.core.budget import expand_within_budget
+
+        return expand_within_budget(prompt, budget, shard)
+    if shard is None:
+        return expand_midjargon_input(prompt, lazy=True)
+    return expand_shard(prompt, *shard)
+
+
+def _open_input(path: str) -> AbstractContextManager[IO[str]]:
+    """Open *path* for reading; ``-`` wraps stdin without closing it."""
+    if path == "-":
+        return nullcontext(sys.stdin)
+    return open(path, encoding="utf-8")
 
 
-def parse_prompt(prompt: str, *, permute: bool = True) -> list[MidjargonDict]:
+def _read_prompts(lines: Iterable[str], input_format: str) -> Iterator[str]:
+    """Yield one prompt per non-blank line of plain text or JSONL input.
+
+    A JSONL line is either a JSON string or an object with a ``"prompt"``
+    (or ``"text"``) key.
+    """
+    if input_format not in ("text", "jsonl"):
+        msg = f"Unknown input format: {input_format} (expected text or jsonl)"
+        raise ValueError(msg)
+    for number, raw in enumerate(lines, 1):
+        line = raw.strip()
+        if not line:
+            continue
+        if input_format == "text":
+            yield line
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as error:
+            msg = f"Invalid JSON on line {number}: {error}"
+            raise ValueError(msg) from error
+        if isinstance(record, dict):
+            record = record.get("prompt", record.get("text"))
+        if not isinstance(record, str):
+            msg = f"No prompt string on line {number}"
+            raise ValueError(msg)
+        yield record
+
+
+def permute_prompt(
+    prompt: str,
+    *,
+    lazy: bool = False,
+    shard: tuple[int, int] | None = None,
+    budget: ExpansionBudget | None = None,
+    sample: SampleSpec | None = None,
+) -> list[str] | Iterator[str]:
+    """Expand permutation groups in *prompt*; return list of variant strings.
+
+    With *lazy* the variants are yielded one at a time by an iterator.
+    With *shard* ``(index, count)`` only that shard of the variants is expanded.
+    With *budget* the expansion is limited as described in
+    :func:`~midjargon.core.budget.expand_within_budget`; with *sample* only
+    the variants :func:`~midjargon.core.sampling.sample_variants` draws are
+    returned.
+    """
+    variants = _expand(prompt, shard, budget, sample)
+    return variants if lazy else list(variants)
+
+
+def parse_prompt(
+    prompt: str,
+    *,
+    permute: bool = True,
+    lazy: bool = False,
+    shard: tuple[int, int] | None = None,
+    budget: ExpansionBudget | None = None,
+    sample: SampleSpec | None = None,
+) -> list[MidjargonDict] | Iterator[MidjargonDict]:
     """Parse *prompt* into a list of ``MidjargonDict`` objects.
 
-    When *permute* is True (default) all ``{…}`` groups are expanded first.
+    When *permute* is True (default) all ``{…}`` groups are expanded first,
+    restricted to *shard* ``(index, count)``, limited by *budget* or drawn
+    as *sample* if given.
+    With *lazy* each variant is parsed only when the iterator reaches it.
+    Parameter strings shared by several variants are parsed once.
+    """
+    variants = _expand(prompt, shard, budget, sample) if permute else [prompt]
+    parsed = parse_prompts(variants)
+    return parsed if lazy else list(parsed)
+
+
+def to_midjourney_prompts(
+    prompt: str,
+    *,
+    lazy: bool = False,
+    shard: tuple[int, int] | None = None,
+    budget: ExpansionBudget | None = None,
+    sample: SampleSpec | None = None,
+) -> list[dict[str, Any]] | Iterator[dict[str, Any]]:
+    """Expand + parse *prompt* into serialisable Midjourney prompt dicts.
+
+    With *lazy* each variant is converted only when the iterator reaches it;
+    *shard*, *budget* and *sample* restrict the expansion as in
+    :func:`permute_prompt`.
+    """
+    from midjargon.batch import midjourney_record
+
+    variants = _expand(prompt, shard, budget, sample)
+    converted = (midjourney_record(d).to_dict() for d in parse_prompts(variants))
+    return converted if lazy else list(converted)
+
+
+def to_fal_dicts(
+    prompt: str,
+    *,
+    lazy: bool = False,
+    shard: tuple[int, int] | None = None,
+    budget: ExpansionBudget | None = None,
+    sample: SampleSpec | None = None,
+) -> list[dict[str, Any]] | Iterator[dict[str, Any]]:
+    """Expand + parse *prompt* and convert each variant to Fal.ai format.
+
+    With *lazy* each variant is converted only when the iterator reaches it;
+    *shard*, *budget* and *sample* restrict the expansion as in
+    :func:`permute_prompt`.
     """
-    variants = expand_midjargon_input(prompt) if permute else [prompt]
-    return [parse_midjargon_prompt_to_dict(v) for v in variants]
+    from midjargon.engines.fal import to_fal_dict
 
+    variants = _expand(prompt, shard, budget, sample)
+    converted = (to_fal_dict(d) for d in parse_prompts(variants))
+    return converted if lazy else list(converted)
 
-def to_midjourney_prompts(prompt: str) -> list[dict[str, Any]]:
-    """Expand + parse *prompt* into serialisable Midjourney prompt dicts."""
-    parser = MidjourneyParser()
-    results = []
-    for variant in expand_midjargon_input(prompt):
-        d = parse_midjargon_prompt_to_dict(variant)
-        # Rename "images" → "image_prompts" for MidjourneyParser
-        if "images" in d:
-            d["image_prompts"] = d.pop("images")  # type: ignore[assignment]
-        mj = parser.parse_dict(d)
-        results.append(mj.model_dump())
-    return results
 
+# ---------------------------------------------------------------------------
+# Output
+# ---------------------------------------------------------------------------
 
-def to_fal_dicts(prompt: str) -> list[dict[str, Any]]:
-    """Expand + parse *prompt* and convert each variant to Fal.ai format."""
-    results = []
-    for variant in expand_midjargon_input(prompt):
-        d = parse_midjargon_prompt_to_dict(variant)
-        results.append(to_fal_dict(d))
-    return results
+def _output_format(output_format: str | None, json_output: bool) -> str:
+    """Return the checked ``--format``, defaulting to what *json_output* asks."""
+    if output_format is None:
+        return "json" if json_output else "rich"
+    if output_format not in OUTPUT_FORMATS:
+        msg = (
+            f"Unknown output format: {output_format} "
+            f"(expected {', '.join(OUTPUT_FORMATS)})"
+        )
+        raise ValueError(msg)
+    return output_format
+
+
+def _output_plain(items: Iterable[Any]) -> None:
+    """Write strings as lines and anything else as indented JSON, no Rich."""
+    sys.stdout.writelines(
+        f"{item if isinstance(item, str) else json.dumps(item, indent=2)}\n"
+        for item in items
+    )
+    sys.stdout.flush()
+
+
+def _output_jsonl(items: Iterable[Any]) -> None:
+    """Write each item as one compact JSON line."""
+    sys.stdout.writelines(
+        json.dumps(item, separators=(",", ":")) + "\n" for item in items
+    )
+    sys.stdout.flush()
+
+
+def _output_rich(items: Iterator[Any], no_color: bool) -> None:
+    """Render items as Rich panels, summarising all after the first
+    :data:`RICH_MAX_VARIANTS`."""
+    console = _console(no_color)
+    head = list(islice(items, 2))
+    for i, item in enumerate(islice(chain(head, items), RICH_MAX_VARIANTS), 1):
+        if len(head) > 1:
+            console.print(f"\nVariant {i}:", style="bold blue")
+        text = item if isinstance(item, str) else _format_prompt(item)
+        console.print(_panel(text))
+    rest = sum(1 for _ in items)
+    if rest:
+        console.print(
+            f"\n… {rest} more variants not shown; "
+            "use --format plain or --format jsonl for the full output.",
+            style="yellow",
+        )
+
+
+def _run(
+    produce: Callable[..., list[Any] | Iterator[Any]],
+    prompt: str,
+    *,
+    output_format: str | None,
+    json_output: bool,
+    no_color: bool,
+    shard: str | None,
+    collapse_single: bool,
+    budget: ExpansionBudget | None = None,
+    sample: SampleSpec | None = None,
+) -> None:
+    """Write ``produce(prompt, lazy=True, shard=…, budget=…, sample=…)`` in the
+    requested format.
+
+    With *collapse_single* the ``json`` format writes a lone variant as an
+    object rather than a one-element array.  Errors are reported in the
+    output format and exit with status 1.
+    """
+    fmt = "json" if json_output else "rich"
+    try:
+        fmt = _output_format(output_format, json_output)
+        results = iter(
+            produce(
+                prompt,
+                lazy=True,
+                shard=parse_shard(shard),
+                budget=budget,
+                sample=sample,
+            )
+        )
+        if fmt == "plain":
+            _output_plain(results)
+        elif fmt == "jsonl":
+            _output_jsonl(results)
+        elif fmt == "rich":
+            _output_rich(results, no_color)
+        elif collapse_single:
+            # Converted in full first, so an error replaces the whole output
+            output = list(results)
+            _output_json(output[0] if len(output) == 1 else output)
+        else:
+            _output_json_array(results)
+    except (ValueError, TypeError, SyntaxError) as error:
+        if fmt == "json":
+            _output_json({"error": str(error)})
+        elif fmt == "jsonl":
+            _output_jsonl([{"error": str(error)}])
+        elif fmt == "plain":
+            sys.stderr.write(f"Error: {error!s}\n")
+        else:
+            _handle_error(error)
+        sys.exit(1)
+
+
+def _format_flag(method: Callable[..., None]) -> Callable[..., None]:
+    """Expose the *fmt* parameter of a CLI command as ``format``.
+
+    Fire names each flag after its parameter, so ``--format`` needs a
+    parameter called ``format``; the command bodies use *fmt* instead of
+    shadowing the builtin.
+    """
+    signature = inspect.signature(method)
+    parameters = [
+        param.replace(name="format") if param.name == "fmt" else param
+        for param in signature.parameters.values()
+    ]
+
+    @wraps(method)
+    def command(*args: Any, **kwargs: Any) -> None:
+        if "format" in kwargs:
+            kwargs["fmt"] = kwargs.pop("format")
+        method(*args, **kwargs)
+
+    command.__signature__ = signature.replace(  # type: ignore[attr-defined]
+        parameters=parameters
+    )
+    return command
 
 
 # ---------------------------------------------------------------------------
@@ -94,12 +452,22 @@ def to_fal_dicts(prompt: str) -> list[dict[str, Any]]:
 class MidjargonCLI:
     """Midjargon CLI — parse and convert Midjourney-style prompts."""
 
+    @_format_flag
     def perm(
         self,
         prompt: str,
         *,
         json_output: bool = False,
         no_color: bool = False,
+        shard: str | None = None,
+        fmt: str | None = None,
+        max_variants: int | None = None,
+        max_bytes: int | None = None,
+        max_depth: int | None = None,
+        on_limit: str = "error",
+        sample: int | None = None,
+        sample_seed: int | None = None,
+        sample_strategy: str = "uniform",
     ) -> None:
         """Expand all ``{option1, option2}`` permutation groups.
 
@@ -107,30 +475,51 @@ class MidjargonCLI:
             prompt: Raw prompt string, e.g. ``"a {red, blue} bird"``.
             json_output: Output as JSON array of strings.
             no_color: Disable ANSI colour output.
+            shard: Only process shard ``i/n`` of the variants (zero-based
+                   index *i* of *n* contiguous shards, e.g. ``0/4``).
+            format: Output format: ``plain``, ``jsonl``, ``json`` or
+                    ``rich`` (see :data:`OUTPUT_FORMATS`); overrides
+                    *json_output*.
+            max_variants: Refuse prompts expanding to more variants.
+            max_bytes: Refuse prompts whose variants may exceed this many
+                       bytes in total.
+            max_depth: Refuse prompts nesting ``{…}`` groups deeper.
+            on_limit: ``error`` (default), or ``truncate``/``sample`` to
+                      output only as many variants as the limits allow.
+            sample: Output only this many variants, drawn at random without
+                    expanding the others (cannot be combined with *shard*).
+            sample_seed: Seed that makes the *sample* reproducible.
+            sample_strategy: ``uniform``, or ``stratified`` to include every
+                             option of every group in the sample.
         """
-        console = Console(force_terminal=not no_color)
-        try:
-            results = permute_prompt(prompt)
-            if json_output:
-                _output_json(results)
-                return
-            for i, result in enumerate(results, 1):
-                if len(results) > 1:
-                    console.print(f"\nVariant {i}:", style="bold blue")
-                console.print(Panel(result))
-        except (ValueError, TypeError, SyntaxError) as error:
-            if json_output:
-                _output_json({"error": str(error)})
-                sys.exit(1)
-            else:
-                _handle_error(console, error)
-
+        _run(
+            permute_prompt,
+            prompt,
+            output_format=fmt,
+            json_output=json_output,
+            no_color=no_color,
+            shard=shard,
+            collapse_single=False,
+            budget=_budget(max_variants, max_bytes, max_depth, on_limit),
+            sample=_sample_spec(sample, sample_seed, sample_strategy),
+        )
+
+    @_format_flag
     def json(
         self,
         prompt: str,
         *,
         json_output: bool = True,
         no_color: bool = False,
+        shard: str | None = None,
+        fmt: str | None = None,
+        max_variants: int | None = None,
+        max_bytes: int | None = None,
+        max_depth: int | None = None,
+        on_limit: str = "error",
+        sample: int | None = None,
+        sample_seed: int | None = None,
+        sample_strategy: str = "uniform",
     ) -> None:
         """Parse a prompt into ``MidjargonDict`` format (flat parameter dict).
 
@@ -141,34 +530,51 @@ class MidjargonCLI:
             prompt: Raw prompt string.
             json_output: Output as JSON (default True).
             no_color: Disable ANSI colour output.
+            shard: Only process shard ``i/n`` of the variants (zero-based
+                   index *i* of *n* contiguous shards, e.g. ``0/4``).
+            format: Output format: ``plain``, ``jsonl``, ``json`` or
+                    ``rich`` (see :data:`OUTPUT_FORMATS`); overrides
+                    *json_output*.
+            max_variants: Refuse prompts expanding to more variants.
+            max_bytes: Refuse prompts whose variants may exceed this many
+                       bytes in total.
+            max_depth: Refuse prompts nesting ``{…}`` groups deeper.
+            on_limit: ``error`` (default), or ``truncate``/``sample`` to
+                      output only as many variants as the limits allow.
+            sample: Output only this many variants, drawn at random without
+                    expanding the others (cannot be combined with *shard*).
+            sample_seed: Seed that makes the *sample* reproducible.
+            sample_strategy: ``uniform``, or ``stratified`` to include every
+                             option of every group in the sample.
         """
-        console = Console(force_terminal=not no_color)
-        try:
-            results = parse_prompt(prompt, permute=True)
-            # Single variant → return plain dict
-            output: Any = results[0] if len(results) == 1 else results
-            if json_output:
-                _output_json(output)
-                return
-            if isinstance(output, list):
-                for i, item in enumerate(output, 1):
-                    console.print(f"\nVariant {i}:", style="bold blue")
-                    console.print(Panel(_format_prompt(item)))
-            else:
-                console.print(Panel(_format_prompt(output)))
-        except (ValueError, TypeError, SyntaxError) as error:
-            if json_output:
-                _output_json({"error": str(error)})
-                sys.exit(1)
-            else:
-                _handle_error(console, error)
-
+        _run(
+            parse_prompt,
+            prompt,
+            output_format=fmt,
+            json_output=json_output,
+            no_color=no_color,
+            shard=shard,
+            collapse_single=shard is None,
+            budget=_budget(max_variants, max_bytes, max_depth, on_limit),
+            sample=_sample_spec(sample, sample_seed, sample_strategy),
+        )
+
+    @_format_flag
     def mj(
         self,
         prompt: str,
         *,
         json_output: bool = False,
         no_color: bool = False,
+        shard: str | None = None,
+        fmt: str | None = None,
+        max_variants: int | None = None,
+        max_bytes: int | None = None,
+        max_depth: int | None = None,
+        on_limit: str = "error",
+        sample: int | None = None,
+        sample_seed: int | None = None,
+        sample_strategy: str = "uniform",
     ) -> None:
         """Convert a prompt to validated Midjourney format.
 
@@ -176,33 +582,51 @@ class MidjargonCLI:
             prompt: Raw prompt string.
             json_output: Output as JSON.
             no_color: Disable ANSI colour output.
+            shard: Only process shard ``i/n`` of the variants (zero-based
+                   index *i* of *n* contiguous shards, e.g. ``0/4``).
+            format: Output format: ``plain``, ``jsonl``, ``json`` or
+                    ``rich`` (see :data:`OUTPUT_FORMATS`); overrides
+                    *json_output*.
+            max_variants: Refuse prompts expanding to more variants.
+            max_bytes: Refuse prompts whose variants may exceed this many
+                       bytes in total.
+            max_depth: Refuse prompts nesting ``{…}`` groups deeper.
+            on_limit: ``error`` (default), or ``truncate``/``sample`` to
+                      output only as many variants as the limits allow.
+            sample: Output only this many variants, drawn at random without
+                    expanding the others (cannot be combined with *shard*).
+            sample_seed: Seed that makes the *sample* reproducible.
+            sample_strategy: ``uniform``, or ``stratified`` to include every
+                             option of every group in the sample.
         """
-        console = Console(force_terminal=not no_color)
-        try:
-            results = to_midjourney_prompts(prompt)
-            output: Any = results[0] if len(results) == 1 else results
-            if json_output:
-                _output_json(output)
-                return
-            if isinstance(output, list):
-                for i, item in enumerate(output, 1):
-                    console.print(f"\nVariant {i}:", style="bold blue")
-                    console.print(Panel(_format_prompt(item)))
-            else:
-                console.print(Panel(_format_prompt(output)))
-        except (ValueError, TypeError, SyntaxError) as error:
-            if json_output:
-                _output_json({"error": str(error)})
-                sys.exit(1)
-            else:
-                _handle_error(console, error)
-
+        _run(
+            to_midjourney_prompts,
+            prompt,
+            output_format=fmt,
+            json_output=json_output,
+            no_color=no_color,
+            shard=shard,
+            collapse_single=shard is None,
+            budget=_budget(max_variants, max_bytes, max_depth, on_limit),
+            sample=_sample_spec(sample, sample_seed, sample_strategy),
+        )
+
+    @_format_flag
     def fal(
         self,
         prompt: str,
         *,
         json_output: bool = False,
         no_color: bool = False,
+        shard: str | None = None,
+        fmt: str | None = None,
+        max_variants: int | None = None,
+        max_bytes: int | None = None,
+        max_depth: int | None = None,
+        on_limit: str = "error",
+        sample: int | None = None,
+        sample_seed: int | None = None,
+        sample_strategy: str = "uniform",
     ) -> None:
         """Convert a prompt to Fal.ai API format.
 
@@ -210,48 +634,289 @@ class MidjargonCLI:
             prompt: Raw prompt string.
             json_output: Output as JSON.
             no_color: Disable ANSI colour output.
+            shard: Only process shard ``i/n`` of the variants (zero-based
+                   index *i* of *n* contiguous shards, e.g. ``0/4``).
+            format: Output format: ``plain``, ``jsonl``, ``json`` or
+                    ``rich`` (see :data:`OUTPUT_FORMATS`); overrides
+                    *json_output*.
+            max_variants: Refuse prompts expanding to more variants.
+            max_bytes: Refuse prompts whose variants may exceed this many
+                       bytes in total.
+            max_depth: Refuse prompts nesting ``{…}`` groups deeper.
+            on_limit: ``error`` (default), or ``truncate``/``sample`` to
+                      output only as many variants as the limits allow.
+            sample: Output only this many variants, drawn at random without
+                    expanding the others (cannot be combined with *shard*).
+            sample_seed: Seed that makes the *sample* reproducible.
+            sample_strategy: ``uniform``, or ``stratified`` to include every
+                             option of every group in the sample.
         """
-        console = Console(force_terminal=not no_color)
+        _run(
+            to_fal_dicts,
+            prompt,
+            output_format=fmt,
+            json_output=json_output,
+            no_color=no_color,
+            shard=shard,
+            collapse_single=shard is None,
+            budget=_budget(max_variants, max_bytes, max_depth, on_limit),
+            sample=_sample_spec(sample, sample_seed, sample_strategy),
+        )
+
+    def batch(
+        self,
+        path: str = "-",
+        *,
+        engine: str = "json",
+        input_format: str = "text",
+        workers: int = 1,
+        chunksize: int | None = None,
+        line_buffered: bool = False,
+    ) -> None:
+        """Convert many prompts, one per line, streaming JSON Lines to stdout.
+
+        Each output line is a compact JSON object for one expanded variant,
+        ``{"index": …, "variant": …, "prompt": …, "result": …}``, where
+        *index* counts the non-blank input lines and *variant* the variants
+        of that prompt.  A variant that fails to convert carries ``"error"``
+        instead of ``"result"`` and does not stop the batch.
+
+        Args:
+            path: File to read prompts from; ``-`` (default) reads stdin.
+            engine: Output format: ``json`` (MidjargonDict), ``mj`` or ``fal``.
+            input_format: ``text`` (one prompt per line) or ``jsonl`` (a JSON
+                          string or an object with a ``prompt`` key per line).
+            workers: Number of worker processes; ``1`` converts in-process.
+            chunksize: Number of variants sent to a worker at a time
+                       (default ``midjargon.batch.DEFAULT_CHUNKSIZE``).
+            line_buffered: Flush stdout after every output line.
+        """
+        from midjargon.batch import DEFAULT_CHUNKSIZE, convert_many
+        from midjargon.core.records import PromptRecord
+
+        write = sys.stdout.write
         try:
-            results = to_fal_dicts(prompt)
-            output: Any = results[0] if len(results) == 1 else results
-            if json_output:
-                _output_json(output)
-                return
-            if isinstance(output, list):
-                for i, item in enumerate(output, 1):
-                    console.print(f"\nVariant {i}:", style="bold blue")
-                    console.print(Panel(_format_prompt(item)))
-            else:
-                console.print(Panel(_format_prompt(output)))
-        except (ValueError, TypeError, SyntaxError) as error:
-            if json_output:
-                _output_json({"error": str(error)})
-                sys.exit(1)
-            else:
-                _handle_error(console, error)
+            with _open_input(path) as lines:
+                items = convert_many(
+                    _read_prompts(lines, input_format),
+                    _BATCH_ENGINES.get(engine, engine),
+                    workers=workers,
+                    chunksize=DEFAULT_CHUNKSIZE if chunksize is None else chunksize,
+                )
+                for item in items:
+                    record: dict[str, Any] = {
+                        "index": item.prompt_index,
+                        "variant": item.variant_index,
+                        "prompt": item.variant,
+                    }
+                    if isinstance(item.result, PromptRecord):
+                        record["result"] = item.result.to_dict()
+                    elif item.error is None:
+                        record["result"] = item.result
+                    else:
+                        record["error"] = item.error
+                    write(json.dumps(record, separators=(",", ":")) + "\n")
+                    if line_buffered:
+                        sys.stdout.flush()
+            sys.stdout.flush()
+        except (ValueError, TypeError, OSError) as error:
+            write(json.dumps({"error": str(error)}, separators=(",", ":")) + "\n")
+            sys.stdout.flush()
+            sys.exit(1)
+
+    def serve(self, *, socket: str | None = None) -> None:
+        """Run a long-lived JSON-RPC server for ``perm``, ``json``, ``mj``, ``fal``.
+
+        Each request is one line of JSON,
+        ``{"jsonrpc": "2.0", "id": 1, "method": "mj", "params": {"prompt": …}}``,
+        answered by one line with the list of variants as ``"result"``.  The
+        process stays warm between requests (engines loaded, caches filled).
+
+        Args:
+            socket: Unix socket path to listen on; by default requests are
+                    read from stdin and answered on stdout.
+        """
+        import signal
+
+        from midjargon.cli.server import serve
+
+        # Stop on SIGTERM like on Ctrl-C, so the socket file is removed
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        try:
+            serve(socket)
+        except KeyboardInterrupt:
+            pass
+
+    def http(
+        self,
+        *,
+        host: str = "127.0.0.1",
+        port: int = 8080,
+        workers: int | None = None,
+        max_concurrency: int | None = None,
+        max_variants: int | None = None,
+        max_depth: int | None = None,
+    ) -> None:
+        """Run the HTTP service (``/permute``, ``/parse``, ``/midjourney``, ``/fal``).
+
+        See :mod:`midjargon.server` for the endpoints.
+
+        Args:
+            host: Interface to listen on.
+            port: TCP port to listen on.
+            workers: Worker processes; all CPUs by default, ``0`` for none.
+            max_concurrency: Work requests served at once (default
+                             ``midjargon.server.DEFAULT_MAX_CONCURRENCY``).
+            max_variants: Refuse requests for more variants (default
+                          ``midjargon.server.DEFAULT_BUDGET``).
+            max_depth: Refuse prompts nesting ``{…}`` groups deeper (default
+                       ``midjargon.server.DEFAULT_BUDGET``).
+        """
+        from midjargon.server import DEFAULT_BUDGET, DEFAULT_MAX_CONCURRENCY, run
+
+        if max_concurrency is None:
+            max_concurrency = DEFAULT_MAX_CONCURRENCY
+        budget = DEFAULT_BUDGET
+        if max_variants is not None:
+            budget = budget._replace(max_variants=max_variants)
+        if max_depth is not None:
+            budget = budget._replace(max_depth=max_depth)
+        try:
+            run(
+                host,
+                port,
+                workers=workers,
+                max_concurrency=max_concurrency,
+                budget=budget,
+            )
+        except KeyboardInterrupt:
+            pass
+
+    def client(
+        self, method: str, prompt: str | None = None, *, socket: str
+    ) -> None:
+        """Send prompts to a ``serve --socket`` server and print the results.
+
+        Args:
+            method: ``perm``, ``json``, ``mj`` or ``fal``.
+            prompt: Raw prompt string, printed as a JSON array of variants.
+                    If omitted, one prompt per line is read from stdin and one
+                    compact JSON line is written per prompt (the array of
+                    variants, or ``{"error": …}``).
+            socket: Unix socket path of the server.
+        """
+        from midjargon.cli.server import Client, RPCError
+
+        try:
+            with Client(socket) as client:
+                if prompt is not None:
+                    _output_json(client.call(method, prompt))
+                    return
+                prompts = _read_prompts(sys.stdin, "text")
+                results = client.call_many(method, prompts, return_errors=True)
+                _output_jsonl(
+                    {"error": str(r)} if isinstance(r, RPCError) else r
+                    for r in results
+                )
+        except (RPCError, OSError) as error:
+            _output_json({"error": str(error)})
+            sys.exit(1)
 
 
 # ---------------------------------------------------------------------------
 # Entry point
 # ---------------------------------------------------------------------------
 
-def main() -> None:
-    """Run the Midjargon CLI."""
+def _rich_excepthook(
+    exc_type: type[BaseException],
+    exc: BaseException,
+    traceback: TracebackType | None,
+) -> None:
+    """Install Rich tracebacks on the first uncaught exception and show it."""
+    from rich.traceback import install
+
+    install(show_locals=True)
+    sys.excepthook(exc_type, exc, traceback)
+
+
+def _display(lines: Any, out: Any) -> None:
+    """Show Fire's help and result output through a themed Rich console."""
     from rich.ansi import AnsiDecoder
     from rich.console import Console, Group
     from rich.theme import Theme
-    from rich.traceback import install
 
-    install(show_locals=True)
-    ansi_decoder = AnsiDecoder()
     console = Console(theme=Theme({"prompt": "cyan", "question": "bold cyan"}))
+    console.print(Group(*map(AnsiDecoder().decode_line, lines)))
+
 
-    def display(lines: Any, out: Any) -> None:
-        console.print(Group(*map(ansi_decoder.decode_line, lines)))
+def _profile_options(argv: list[str]) -> tuple[list[str], bool, str | None]:
+    """Remove ``--profile[=FILE]`` from *argv* (up to a ``--``).
 
-    fire.core.Display = display
-    fire.Fire(MidjargonCLI())
+    Returns the remaining arguments, whether profiling was asked for and the
+    pstats file to write, if any.
+    """
+    rest: list[str] = []
+    enabled, stats_path = False, None
+    for i, arg in enumerate(argv):
+        if arg == "--":
+            rest += argv[i:]
+            break
+        if arg == "--profile":
+            enabled = True
+        elif arg.startswith("--profile="):
+            enabled, stats_path = True, arg.partition("=")[2]
+        else:
+            rest.append(arg)
+    return rest, enabled, stats_path
+
+
+def _profiled(run: Callable[[], Any], stats_path: str | None) -> None:
+    """Call *run*, then write a per-stage breakdown to stderr.
+
+    With *stats_path* the call also runs under cProfile and the statistics
+    are saved there for :mod:`pstats` (or snakeviz, …).
+    """
+    from time import perf_counter
+
+    from midjargon.core.profiling import profile
+
+    with profile() as profiler:
+        start = perf_counter()
+        try:
+            if stats_path is None:
+                run()
+            else:
+                import cProfile
+
+                stats = cProfile.Profile()
+                try:
+                    stats.runcall(run)
+                finally:
+                    stats.dump_stats(stats_path)
+        finally:
+            wall = perf_counter() - start
+            sys.stdout.flush()
+            sys.stderr.write(profiler.report(wall))
+            if stats_path is not None:
+                sys.stderr.write(f"cProfile statistics written to {stats_path}\n")
+
+
+def main() -> None:
+    """Run the Midjargon CLI.
+
+    ``--profile`` (any command) reports the calls and wall time of each
+    pipeline stage on stderr; ``--profile=FILE`` also saves cProfile
+    statistics to *FILE*.
+    """
+    import fire
+
+    sys.excepthook = _rich_excepthook
+    fire.core.Display = _display
+    argv, profiling, stats_path = _profile_options(sys.argv[1:])
+    if not profiling:
+        fire.Fire(MidjargonCLI(), command=argv)
+        return
+    _profiled(lambda: fire.Fire(MidjargonCLI(), command=argv), stats_path)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+# this_file: src/midjargon/cli/server.py
+"""
+midjargon.cli.server
+~~~~~~~~~~~~~~~~~~~~
+
+Long-lived JSON-RPC 2.0 server for the ``perm``, ``json``, ``mj`` and ``fal``
+operations, and a client for it.
+
+Requests and responses are newline-delimited JSON, one per line, read from
+stdin and written to stdout (``midjargon serve``) or exchanged over a Unix
+socket (``midjargon serve --socket PATH``).  A request looks like::
+
+    {"jsonrpc": "2.0", "id": 1, "method": "mj",
+     "params": {"prompt": "a {red, blue} bird", "shard": "0/2"}}
+
+``params`` may also be ``[prompt]`` or ``[prompt, shard]``.  The result is
+always the list of converted variants; every request is expanded within
+:data:`DEFAULT_BUDGET`.  The server keeps one warm process:
+the engines are imported once, the shared ``MidjourneyParser`` and the
+URL/version caches stay filled, and the parse cache is enabled.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import socket
+import socketserver
+import stat
+import sys
+from collections import deque
+from typing import TYPE_CHECKING, Any
+
+from midjargon.cli.main import (
+    parse_prompt,
+    permute_prompt,
+    to_fal_dicts,
+    to_midjourney_prompts,
+)
+from midjargon.core.budget import ExpansionBudget
+from midjargon.core.parser import enable_parse_cache, get_parse_cache
+from midjargon.core.permutations import parse_shard
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Iterator
+    from typing import IO
+
+# Method name → function(prompt, *, lazy, shard, budget) returning the variants
+METHODS: dict[str, Callable[..., list[Any] | Iterator[Any]]] = {
+    "perm": permute_prompt,
+    "json": parse_prompt,
+    "mj": to_midjourney_prompts,
+    "fal": to_fal_dicts,
+}
+
+# Limits of every request, so one prompt cannot exhaust the server
+DEFAULT_BUDGET = ExpansionBudget(max_variants=100_000, max_depth=32)
+
+# Requests a Client sends ahead of the responses it has read
+CLIENT_WINDOW = 64
+
+# JSON-RPC 2.0 error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+PROMPT_ERROR = -32000  # the prompt could not be expanded or converted
+
+
+class RPCError(Exception):
+    """Error response of a JSON-RPC request."""
+
+    def __init__(self, code: int, message: str) -> None:
+        super().__init__(message)
+        self.code = code
+
+
+def _error(request_id: Any, code: int, message: str) -> dict[str, Any]:
+    return {
+        "jsonrpc": "2.0",
+        "id": request_id,
+        "error": {"code": code, "message": message},
+    }
+
+
+def _call(method: Any, params: Any) -> list[Any]:
+    """Run one request's *method* with its *params*."""
+    function = METHODS.get(method) if isinstance(method, str) else None
+    if function is None:
+        raise RPCError(METHOD_NOT_FOUND, f"Method not found: {method}")
+    if isinstance(params, list) and 1 <= len(params) <= 2:
+        params = dict(zip(("prompt", "shard"), params, strict=False))
+    if not isinstance(params, dict) or set(params) - {"prompt", "shard"}:
+        msg = "Expected params {prompt, shard?} or [prompt, shard?]"
+        raise RPCError(INVALID_PARAMS, msg)
+    prompt, shard = params.get("prompt"), params.get("shard")
+    if not isinstance(prompt, str) or not isinstance(shard, str | None):
+        raise RPCError(INVALID_PARAMS, "prompt and shard must be strings")
+    try:
+        variants = function(
+            prompt, lazy=True, shard=parse_shard(shard), budget=DEFAULT_BUDGET
+        )
+        return list(variants)
+    except (ValueError, TypeError, SyntaxError) as error:
+        raise RPCError(PROMPT_ERROR, str(error)) from error
+
+
+def handle_request(request: Any) -> dict[str, Any] | None:
+    """Answer one decoded JSON-RPC *request*; None for a notification.
+
+    Any exception becomes an error response, so one bad request cannot stop
+    the server.
+    """
+    if not isinstance(request, dict) or request.get("jsonrpc") != "2.0":
+        return _error(None, INVALID_REQUEST, "Invalid request")
+    request_id = request.get("id")
+    try:
+        result = _call(request.get("method"), request.get("params", {}))
+    except RPCError as error:
+        response = _error(request_id, error.code, str(error))
+    except Exception as error:
+        message = f"Internal error: {type(error).__name__}: {error}"
+        response = _error(request_id, INTERNAL_ERROR, message)
+    else:
+        response = {"jsonrpc": "2.0", "id": request_id, "result": result}
+    return response if "id" in request else None
+
+
+def handle_line(line: str) -> str | None:
+    """Answer one line of JSON-RPC input with one line of output, or None.
+
+    The line holds a request or a batch (array) of requests.
+    """
+    try:
+        request = json.loads(line)
+    except (ValueError, RecursionError) as error:
+        return json.dumps(_error(None, PARSE_ERROR, f"Parse error: {error}"))
+    if isinstance(request, list) and request:
+        responses = [r for r in map(handle_request, request) if r is not None]
+        return json.dumps(responses) if responses else None
+    response = handle_request(request)
+    return None if response is None else json.dumps(response)
+
+
+def warm_up() -> None:
+    """Load the engines and enable the parse cache, unless one is installed."""
+    import midjargon.batch  # noqa: F401  (builds the Pydantic models)
+
+    if get_parse_cache() is None:
+        enable_parse_cache()
+
+
+def serve_stream(lines: Iterable[str], output: IO[str]) -> None:
+    """Answer each non-blank line of *lines* on *output* until EOF."""
+    for line in lines:
+        if not line.strip():
+            continue
+        response = handle_line(line)
+        if response is not None:
+            output.write(response + "\n")
+            output.flush()
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        for raw in self.rfile:
+            if not raw.strip():
+                continue
+            response = handle_line(raw.decode("utf-8", errors="replace"))
+            if response is not None:
+                self.wfile.write(response.encode() + b"\n")
+
+
+class UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Threaded Unix socket server; one thread per client connection."""
+
+    daemon_threads = True
+
+
+def _is_socket(path: str) -> bool:
+    """Return whether *path* is a socket file (not a link to one)."""
+    try:
+        return stat.S_ISSOCK(os.lstat(path).st_mode)
+    except FileNotFoundError:
+        return False
+
+
+def serve(socket_path: str | None = None) -> None:
+    """Serve requests on stdin/stdout, or on a Unix socket at *socket_path*.
+
+    A stale socket file at *socket_path* is replaced; the file is removed
+    when the server stops.
+
+    Raises:
+        FileExistsError: If *socket_path* exists and is not a socket.
+    """
+    warm_up()
+    if socket_path is None:
+        serve_stream(sys.stdin, sys.stdout)
+        return
+    if os.path.lexists(socket_path):
+        if not _is_socket(socket_path):
+            msg = f"Not a socket, refusing to replace it: {socket_path}"
+            raise FileExistsError(msg)
+        os.unlink(socket_path)
+    try:
+        with UnixServer(socket_path, _Handler) as server:
+            server.serve_forever()
+    finally:
+        if _is_socket(socket_path):
+            os.unlink(socket_path)
+
+
+class Client:
+    """Connection to a ``midjargon serve --socket`` server.
+
+    Requests are answered in order over one connection, so use one client
+    per thread.
+    """
+
+    def __init__(self, socket_path: str) -> None:
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.connect(socket_path)
+        self._reader = self._socket.makefile("r", encoding="utf-8")
+        self._writer = self._socket.makefile("w", encoding="utf-8")
+        self._next_id = 0
+
+    def call(self, method: str, prompt: str, shard: str | None = None) -> list[Any]:
+        """Run *method* on *prompt* in the server and return its variants.
+
+        Raises:
+            RPCError: If the server reports an error.
+        """
+        return next(self.call_many(method, [prompt], shard))
+
+    def call_many(
+        self,
+        method: str,
+        prompts: Iterable[str],
+        shard: str | None = None,
+        *,
+        return_errors: bool = False,
+    ) -> Iterator[Any]:
+        """Yield the result of *method* for each of *prompts*, in order.
+
+        Up to :data:`CLIENT_WINDOW` requests are in flight at a time, so the
+        round trips overlap.  With *return_errors* a failed prompt yields its
+        :class:`RPCError` instead of raising it.
+
+        Raises:
+            RPCError: If the server reports an error; the results of the
+                      following prompts are dropped.
+        """
+        pending: deque[int] = deque()
+        for prompt in prompts:
+            request = {
+                "jsonrpc": "2.0",
+                "id": self._next_id,
+                "method": method,
+                "params": {"prompt": prompt, "shard": shard},
+            }
+            self._writer.write(json.dumps(request) + "\n")
+            pending.append(self._next_id)
+            self._next_id += 1
+            if len(pending) >= CLIENT_WINDOW:
+                self._writer.flush()
+                yield self._read(pending.popleft(), return_errors)
+        self._writer.flush()
+        while pending:
+            yield self._read(pending.popleft(), return_errors)
+
+    def _read(self, request_id: int, return_errors: bool = False) -> Any:
+        """Return the result for *request_id*, skipping older responses."""
+        while True:
+            line = self._reader.readline()
+            if not line:
+                raise RPCError(PROMPT_ERROR, "Server closed the connection")
+            response = json.loads(line)
+            if response.get("id") == request_id:
+                break
+        if "error" in response:
+            error = RPCError(response["error"]["code"], response["error"]["message"])
+            if return_errors:
+                return error
+            raise error
+        return response["result"]
+
+    def close(self) -> None:
+        """Close the connection."""
+        self._writer.close()
+        self._reader.close()
+        self._socket.close()
+
+    def __enter__(self) -> Client:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
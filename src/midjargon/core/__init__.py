@@ -12,15 +12,109 @@ This module provides the base classes and utilities for:
 
 The core module is engine-agnostic and provides the foundation for
 specific engine implementations (like Midjourney).
+
+The public names are imported on first access (PEP 562), so importing one
+core module does not pull in the others (or Pydantic, via the models).
 """
 
-from midjargon.core.input import expand_midjargon_input
-from midjargon.core.parameters import (ParamDict, ParamName, ParamValue,
-                                       parse_parameters)
-from midjargon.core.parser import parse_midjargon_prompt_to_dict
-from midjargon.core.permutations import expand_text
-from midjargon.core.type_defs import (MidjargonDict, MidjargonInput,
-                                      MidjargonList, MidjargonPrompt)
+from __future__ import annotations
+
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from midjargon.core.budget import (ExpansionBudget, ExpansionLimitError,
+                                       expand_within_budget)
+    from midjargon.core.columnar import (Column, ColumnarPrompts,
+                                         parse_many_columnar)
+    from midjargon.core.editing import (TemplateEdit, apply_edit,
+                                        diff_templates)
+    from midjargon.core.input import expand_midjargon_input
+    from midjargon.core.parameters import (ParamDict, ParamName, ParamValue,
+                                           parse_parameters, register_parameter)
+    from midjargon.core.parse_cache import CacheInfo, ParseCache
+    from midjargon.core.parser import (BatchParser, disable_parse_cache,
+                                       enable_parse_cache,
+                                       parse_midjargon_prompt_to_dict,
+                                       parse_prompts)
+    from midjargon.core.permutations import (PromptTemplate, compile_prompt,
+                                             count_variants, expand_shard,
+                                             expand_text, iter_expand,
+                                             variant_at)
+    from midjargon.core.profiling import (Profiler, StageStats, add_hook,
+                                          profile, remove_hook)
+    from midjargon.core.records import PromptRecord
+    from midjargon.core.sampling import (SampleSpec, sample_indices,
+                                         sample_variants)
+    from midjargon.core.segments import (SegmentedVariants, expand_segments,
+                                         iter_segments)
+    from midjargon.core.type_defs import (MidjargonDict, MidjargonInput,
+                                          MidjargonList, MidjargonPrompt)
+
+# Public name → module it is imported from on first access
+_LAZY_IMPORTS: dict[str, str] = {
+    "ExpansionBudget": "midjargon.core.budget",
+    "ExpansionLimitError": "midjargon.core.budget",
+    "expand_within_budget": "midjargon.core.budget",
+    "Column": "midjargon.core.columnar",
+    "ColumnarPrompts": "midjargon.core.columnar",
+    "parse_many_columnar": "midjargon.core.columnar",
+    "TemplateEdit": "midjargon.core.editing",
+    "apply_edit": "midjargon.core.editing",
+    "diff_templates": "midjargon.core.editing",
+    "expand_midjargon_input": "midjargon.core.input",
+    "ParamDict": "midjargon.core.parameters",
+    "ParamName": "midjargon.core.parameters",
+    "ParamValue": "midjargon.core.parameters",
+    "parse_parameters": "midjargon.core.parameters",
+    "register_parameter": "midjargon.core.parameters",
+    "CacheInfo": "midjargon.core.parse_cache",
+    "ParseCache": "midjargon.core.parse_cache",
+    "disable_parse_cache": "midjargon.core.parser",
+    "enable_parse_cache": "midjargon.core.parser",
+    "parse_midjargon_prompt_to_dict": "midjargon.core.parser",
+    "BatchParser": "midjargon.core.parser",
+    "parse_prompts": "midjargon.core.parser",
+    "PromptTemplate": "midjargon.core.permutations",
+    "compile_prompt": "midjargon.core.permutations",
+    "count_variants": "midjargon.core.permutations",
+    "expand_shard": "midjargon.core.permutations",
+    "expand_text": "midjargon.core.permutations",
+    "iter_expand": "midjargon.core.permutations",
+    "variant_at": "midjargon.core.permutations",
+    "Profiler": "midjargon.core.profiling",
+    "StageStats": "midjargon.core.profiling",
+    "add_hook": "midjargon.core.profiling",
+    "profile": "midjargon.core.profiling",
+    "remove_hook": "midjargon.core.profiling",
+    "PromptRecord": "midjargon.core.records",
+    "SampleSpec": "midjargon.core.sampling",
+    "sample_indices": "midjargon.core.sampling",
+    "sample_variants": "midjargon.core.sampling",
+    "SegmentedVariants": "midjargon.core.segments",
+    "expand_segments": "midjargon.core.segments",
+    "iter_segments": "midjargon.core.segments",
+    "MidjargonDict": "midjargon.core.type_defs",
+    "MidjargonInput": "midjargon.core.type_defs",
+    "MidjargonList": "midjargon.core.type_defs",
+    "MidjargonPrompt": "midjargon.core.type_defs",
+}
+
+
+def __getattr__(name: str) -> Any:
+    try:
+        module = _LAZY_IMPORTS[name]
+    except KeyError:
+        msg = f"module {__name__!r} has no attribute {name!r}"
+        raise AttributeError(msg) from None
+    value = getattr(import_module(module), name)
+    globals()[name] = value  # later lookups skip __getattr__
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted({*globals(), *_LAZY_IMPORTS})
+
 
 __all__ = [
     "MidjargonDict",
@@ -31,9 +125,43 @@ __all__ = [
     "ParamDict",
     "ParamName",
     "ParamValue",
+    "BatchParser",
+    "CacheInfo",
+    "Column",
+    "ColumnarPrompts",
+    "ExpansionBudget",
+    "ExpansionLimitError",
+    "ParseCache",
+    "Profiler",
+    "PromptRecord",
+    "PromptTemplate",
+    "SampleSpec",
+    "SegmentedVariants",
+    "StageStats",
+    "TemplateEdit",
     # Core functions
+    "add_hook",
+    "apply_edit",
+    "compile_prompt",
+    "count_variants",
+    "diff_templates",
+    "disable_parse_cache",
+    "enable_parse_cache",
     "expand_midjargon_input",
+    "expand_segments",
+    "expand_shard",
     "expand_text",
+    "expand_within_budget",
+    "iter_expand",
+    "iter_segments",
+    "parse_many_columnar",
     "parse_midjargon_prompt_to_dict",
     "parse_parameters",
+    "parse_prompts",
+    "profile",
+    "register_parameter",
+    "remove_hook",
+    "sample_indices",
+    "sample_variants",
+    "variant_at",
 ]
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# this_file: src/midjargon/core/budget.py
+"""
+Limits on how far a prompt may expand.
+
+Twenty two-option groups make a million variants, so a prompt from an
+untrusted (or careless) source can exhaust memory long before the first
+variant is used.  An :class:`ExpansionBudget` caps the nesting depth, the
+number of variants and their total size; :func:`expand_within_budget` checks
+it against the compiled template structure before any variant is generated,
+then raises :class:`ExpansionLimitError` or cuts the expansion down, as the
+budget's policy says.
+"""
+
+from __future__ import annotations
+
+from itertools import islice
+from typing import TYPE_CHECKING, NamedTuple
+
+from midjargon.core.permutations import (
+    compile_prompt,
+    first_occurrences,
+    nesting_depth,
+    shard_bounds,
+)
+from midjargon.core.profiling import instrument
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+    from midjargon.core.permutations import PromptTemplate
+
+# What to do when a prompt expands to more than the budget allows:
+# ``error`` raises, ``truncate`` keeps the first variants that fit and
+# ``sample`` keeps as many variants, spread evenly over the whole range
+LIMIT_POLICIES = ("error", "truncate", "sample")
+
+
+class ExpansionBudget(NamedTuple):
+    """Upper limits for one prompt's expansion; None means unlimited."""
+
+    max_variants: int | None = None
+    max_bytes: int | None = None  # total UTF-8 size of the variants
+    max_depth: int | None = None  # nesting depth of ``{...}`` groups
+    policy: str = "error"  # one of LIMIT_POLICIES
+
+
+class ExpansionLimitError(ValueError):
+    """A prompt expands beyond an :class:`ExpansionBudget` limit."""
+
+    def __init__(self, limit: str, value: int, maximum: int) -> None:
+        super().__init__(f"Prompt exceeds the {limit} limit: {value} > {maximum}")
+        self.limit = limit
+        self.value = value
+        self.maximum = maximum
+
+    def __reduce__(self) -> tuple[type[ExpansionLimitError], tuple[str, int, int]]:
+        # Rebuild from the fields, so the error survives a process pool
+        return type(self), (self.limit, self.value, self.maximum)
+
+
+def check_budget(budget: ExpansionBudget) -> None:
+    """Refuse a *budget* with an unknown policy or a negative limit.
+
+    Raises:
+        ValueError: If the budget is invalid.
+    """
+    if budget.policy not in LIMIT_POLICIES:
+        msg = (
+            f"Unknown limit policy: {budget.policy} "
+            f"(expected {', '.join(LIMIT_POLICIES)})"
+        )
+        raise ValueError(msg)
+    for name in ("max_variants", "max_bytes", "max_depth"):
+        value = getattr(budget, name)
+        if value is not None and value < 0:
+            msg = f"Budget limits must not be negative: {name}={value}"
+            raise ValueError(msg)
+
+
+def check_depth(text: str, budget: ExpansionBudget) -> None:
+    """Refuse *text* if its groups nest deeper than ``budget.max_depth``.
+
+    Raises:
+        ExpansionLimitError: If the depth limit is exceeded.
+    """
+    if budget.max_depth is not None:
+        depth = nesting_depth(text)
+        if depth > budget.max_depth:
+            raise ExpansionLimitError("max_depth", depth, budget.max_depth)
+
+
+def _utf8_len(text: str) -> int:
+    return len(text) if text.isascii() else len(text.encode())
+
+
+def _take_bytes(variants: Iterable[str], max_bytes: int) -> Iterator[str]:
+    """Yield *variants* while their total UTF-8 size stays within *max_bytes*."""
+    room = max_bytes
+    for variant in variants:
+        room -= _utf8_len(variant)
+        if room < 0:
+            return
+        yield variant
+
+
+def limit_bytes(variants: list[str], budget: ExpansionBudget) -> list[str]:
+    """Apply ``budget.max_bytes`` to *variants* that are already rendered.
+
+    Returns:
+        *variants*, or under the ``truncate`` and ``sample`` policies the
+        leading ones whose total UTF-8 size fits.
+
+    Raises:
+        ExpansionLimitError: If they exceed the limit under the ``error``
+                             policy.
+    """
+    if budget.max_bytes is None:
+        return variants
+    total = sum(map(_utf8_len, variants))
+    if total <= budget.max_bytes:
+        return variants
+    if budget.policy == "error":
+        raise ExpansionLimitError("max_bytes", total, budget.max_bytes)
+    return list(_take_bytes(variants, budget.max_bytes))
+
+
+def variant_limit(count: int, budget: ExpansionBudget) -> int:
+    """Return how many of *count* variants *budget* lets through.
+
+    Raises:
+        ExpansionLimitError: If *count* exceeds ``budget.max_variants`` under
+                             the ``error`` policy.
+    """
+    if budget.max_variants is None or count <= budget.max_variants:
+        return count
+    if budget.policy == "error":
+        raise ExpansionLimitError("max_variants", count, budget.max_variants)
+    return budget.max_variants
+
+
+def _byte_limit(
+    template: PromptTemplate, start: int, stop: int, budget: ExpansionBudget
+) -> int | None:
+    """Return the size variants ``[start, stop)`` must be cut to, or None."""
+    if budget.max_bytes is None:
+        return None
+    bound = template.output_bytes(start, stop)
+    if bound <= budget.max_bytes:
+        return None
+    if budget.policy == "error":
+        raise ExpansionLimitError("max_bytes", bound, budget.max_bytes)
+    return budget.max_bytes
+
+
+def _spread(template: PromptTemplate, start: int, stop: int, k: int) -> Iterator[str]:
+    """Yield *k* variants at evenly spaced indices of ``[start, stop)``."""
+    count = stop - start
+    for i in range(k):
+        yield template.variant(start + i * count // k)
+
+
+@instrument("expand", iterator=True)
+def expand_within_budget(
+    text: str,
+    budget: ExpansionBudget,
+    shard: tuple[int, int] | None = None,
+    *,
+    unique: bool = False,
+) -> Iterator[str]:
+    """
+    Lazily expand *text*, enforcing *budget*.
+
+    The limits are checked up front: the nesting depth on the raw text before
+    it is compiled, the variant count and an upper bound of the output size
+    on the compiled template.  Depth is always an error; for the other limits
+    the ``truncate`` and ``sample`` policies return fewer variants instead,
+    stopping before the total output would exceed ``max_bytes``.
+
+    Args:
+        text: Text containing permutations in {} brackets.
+        budget: Limits and policy to apply.
+        shard: Only expand shard ``(index, count)``; the limits then apply to
+               the variants of that shard.
+        unique: Drop variants whose text an earlier one already has; the
+                limits still count the variants before they are dropped.
+
+    Returns:
+        Iterator over expanded, unescaped texts.
+
+    Raises:
+        ExpansionLimitError: If a limit is exceeded and the policy is
+                             ``error`` (or the depth limit is exceeded).
+        ValueError: If the budget or the shard is invalid.
+    """
+    check_budget(budget)
+    check_depth(text, budget)
+    template = compile_prompt(text)
+    start, stop = 0, template.size
+    if shard is not None:
+        start, stop = shard_bounds(template.size, *shard)
+    count = stop - start
+    keep = variant_limit(count, budget)
+    max_bytes = _byte_limit(template, start, stop, budget) if count else None
+    if max_bytes is not None and budget.policy == "sample":
+        # As many variants as fit if they are no longer than average
+        keep = min(keep, max_bytes * count // template.output_bytes(start, stop))
+
+    if budget.policy == "sample" and keep < count:
+        variants: Iterator[str] = _spread(template, start, stop, keep)
+    else:
+        variants = islice(template.iter_range(start, stop), keep)
+    if max_bytes is not None:
+        variants = _take_bytes(variants, max_bytes)
+    if unique and not template.is_injective():
+        variants = first_occurrences(variants)
+    return variants
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# this_file: src/midjargon/core/columnar.py
+"""
+Parse many prompts into columns instead of one dict per prompt.
+
+``parse_many_columnar`` returns a :class:`ColumnarPrompts` with the text and
+image lists plus one :class:`Column` per parameter.  Numeric parameters and
+flags are typed ``array.array`` columns (wrap them with ``numpy.frombuffer``
+for zero-copy NumPy arrays); every column has a ``B`` mask array that is 1
+where the prompt set the parameter.
+"""
+
+from __future__ import annotations
+
+from array import array
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+from midjargon.core.parameters import FLAG_PARAMS
+from midjargon.core.parser import parse_midjargon_prompt_to_dict
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+# Column name → array typecode; None for object (list) columns.  Every column
+# listed here is present in the result even if no prompt sets it.
+COLUMN_TYPES: dict[str, str | None] = {
+    "stylize": "d",
+    "chaos": "d",
+    "weird": "d",
+    "image_weight": "d",
+    "quality": "d",
+    "character_weight": "d",
+    "style_weight": "d",
+    "style_version": "q",
+    "repeat": "q",
+    "stop": "q",
+    "seed": "q",
+    "aspect_width": "q",
+    "aspect_height": "q",
+    **dict.fromkeys(sorted(FLAG_PARAMS), "B"),
+    "version": None,
+    "style": None,
+    "personalization": None,
+    "character_reference": None,
+    "style_reference": None,
+}
+
+_INT_MIN, _INT_MAX = -(2**63), 2**63 - 1
+
+# Sparse column contents: (row, value) pairs
+_Entries = list[tuple[int, Any]]
+
+
+class Column(NamedTuple):
+    """One parameter across all prompts."""
+
+    values: array[Any] | list[Any]  # typed array, or list for object columns
+    mask: array[int]  # typecode "B": 1 where the prompt set the parameter
+
+    def to_list(self) -> list[Any]:
+        """Return the values as a list, with None where the mask is 0."""
+        return [v if m else None for v, m in zip(self.values, self.mask, strict=True)]
+
+
+@dataclass(frozen=True)
+class ColumnarPrompts:
+    """Parsed prompts stored column by column."""
+
+    text: list[str]
+    images: list[tuple[str, ...]]
+    columns: dict[str, Column]  # known parameters (always) + unknown ones seen
+    raw: dict[str, Column]  # values of typed parameters that did not fit
+
+    def __len__(self) -> int:
+        return len(self.text)
+
+    def __getitem__(self, name: str) -> Column:
+        return self.columns[name]
+
+
+def _fit(typecode: str, value: Any) -> Any:
+    """Return *value* converted for a *typecode* column, or None if it won't fit."""
+    if typecode == "B":
+        return 1 if value is None else None
+    if isinstance(value, bool):
+        return None
+    if typecode == "d":
+        return float(value) if isinstance(value, int | float) else None
+    if isinstance(value, str):
+        try:
+            value = int(value)
+        except ValueError:
+            return None
+    if isinstance(value, float):
+        if not value.is_integer():
+            return None
+        value = int(value)
+    if isinstance(value, int) and _INT_MIN <= value <= _INT_MAX:
+        return value
+    return None
+
+
+def _split_aspect(value: Any) -> tuple[int, int] | None:
+    try:
+        width, height = str(value).split(":")
+        return int(width), int(height)
+    except ValueError:
+        return None
+
+
+def _column(
+    typecode: str | None, size: int, entries: Iterable[tuple[int, Any]]
+) -> Column:
+    mask = array("B", bytes(size))
+    values: array[Any] | list[Any]
+    if typecode is None:
+        values = [None] * size
+    elif typecode == "B":
+        values = mask  # a flag's value is its presence
+    else:
+        values = array(typecode, bytes(array(typecode).itemsize * size))
+    for row, value in entries:
+        values[row] = value
+        mask[row] = 1
+    return Column(values, mask)
+
+
+def parse_many_columnar(prompts: Iterable[str]) -> ColumnarPrompts:
+    """Parse expanded *prompts* into per-parameter columns.
+
+    Each prompt is parsed with
+    :func:`~midjargon.core.parser.parse_midjargon_prompt_to_dict` (so the
+    parse cache applies).  ``--ar W:H`` fills the ``aspect_width`` and
+    ``aspect_height`` columns.  A value that does not fit its typed column
+    (``--seed random``, ``--repeat 2.5``, …) is left out of it and stored in
+    :attr:`ColumnarPrompts.raw` under the same name.  Parameters not in
+    :data:`COLUMN_TYPES` get object columns; list values are tuples.
+
+    Args:
+        prompts: Expanded prompt strings (no permutation groups).
+
+    Returns:
+        :class:`ColumnarPrompts` with one row per prompt.
+    """
+    text: list[str] = []
+    images: list[tuple[str, ...]] = []
+    found: defaultdict[str, _Entries] = defaultdict(list)
+    unfit: defaultdict[str, _Entries] = defaultdict(list)
+
+    for row, prompt in enumerate(prompts):
+        parsed = parse_midjargon_prompt_to_dict(prompt)
+        for name, value in parsed.items():
+            if name == "text":
+                text.append(value if isinstance(value, str) else "")
+            elif name == "images":
+                images.append(tuple(value) if isinstance(value, list) else ())
+            elif name == "aspect":
+                ratio = _split_aspect(value)
+                if ratio is None:
+                    unfit[name].append((row, value))
+                else:
+                    found["aspect_width"].append((row, ratio[0]))
+                    found["aspect_height"].append((row, ratio[1]))
+            else:
+                typecode = COLUMN_TYPES.get(name)
+                if typecode is None:
+                    found[name].append(
+                        (row, tuple(value) if isinstance(value, list) else value)
+                    )
+                elif (converted := _fit(typecode, value)) is not None:
+                    found[name].append((row, converted))
+                else:
+                    unfit[name].append((row, value))
+
+    rows = len(text)
+    columns = {
+        name: _column(typecode, rows, found.pop(name, ()))
+        for name, typecode in COLUMN_TYPES.items()
+    }
+    columns.update(
+        (name, _column(None, rows, entries)) for name, entries in found.items()
+    )
+    raw = {name: _column(None, rows, entries) for name, entries in unfit.items()}
+    return ColumnarPrompts(text, images, columns, raw)
@@ -0,0 +1,501 @@
+#!/usr/bin/env python3
+# this_file: src/midjargon/core/editing.py
+"""
+Work out which variants an edit of a prompt template affects.
+
+An editor that re-expands a prompt on every keystroke redoes thousands of
+variants although a keystroke usually touches one option.  :func:`apply_edit`
+applies a text edit to a compiled template and compares the old and new
+brace trees node by node, following only the branches that differ.  The
+resulting :class:`TemplateEdit` maps variant indices between the two
+templates and lists the index ranges that were added, removed or changed, so
+callers re-render (and re-convert) just those and move the rest::
+
+    edit = apply_edit(compile_prompt("a {red, blue} bird"), 8, 4, "green")
+    edit.changed()  # [range(1, 2)]: "a green bird"
+
+Nothing is expanded: comparing the trees, and mapping or testing one index
+with :meth:`TemplateEdit.old_index`, :meth:`~TemplateEdit.new_index` or
+:meth:`~TemplateEdit.is_changed`, costs time in the size of the template, not
+in the number of its variants.  The range lists are another matter: they
+grow with the number of separate runs of affected indices.  An edit in the
+first group affects one contiguous block, but an edit in the last group
+affects every variant with that option, spread over the whole index space.
+Renaming an option of the last of seven ten-option groups gives a million
+ranges, which take seconds to build.  For such edits, walk the indices and
+ask :meth:`~TemplateEdit.is_changed` instead.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from itertools import product
+from typing import TYPE_CHECKING, NamedTuple
+
+from midjargon.core.permutations import compile_prompt, template_size
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Sequence
+
+    from midjargon.core.permutations import PromptTemplate, _Choice, _Template
+
+# Half-open index ranges, sorted and non-overlapping
+_Ranges = list[tuple[int, int]]
+
+
+# ---------------------------------------------------------------------------
+# Range helpers
+# ---------------------------------------------------------------------------
+
+
+def _merge(ranges: Iterable[tuple[int, int]]) -> _Ranges:
+    """Sort *ranges* and join the ones that touch."""
+    merged: _Ranges = []
+    for start, stop in sorted(ranges):
+        if start >= stop:
+            continue
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(stop, merged[-1][1]))
+        else:
+            merged.append((start, stop))
+    return merged
+
+
+def _subtract(ranges: _Ranges, minus: _Ranges) -> _Ranges:
+    """Return the parts of *ranges* not covered by *minus*."""
+    result: _Ranges = []
+    for start, stop in ranges:
+        for m_start, m_stop in minus:
+            if m_stop <= start or m_start >= stop:
+                continue
+            if m_start > start:
+                result.append((start, m_start))
+            start = max(start, m_stop)
+        if start < stop:
+            result.append((start, stop))
+    return result
+
+
+def _shift(ranges: _Ranges, offset: int) -> _Ranges:
+    return [(start + offset, stop + offset) for start, stop in ranges]
+
+
+def _digits(index: int, sizes: Sequence[int]) -> list[int]:
+    """Split *index* into mixed-radix digits, the last one least significant."""
+    digits = []
+    for size in reversed(sizes):
+        index, digit = divmod(index, size)
+        digits.append(digit)
+    digits.reverse()
+    return digits
+
+
+def _product_ranges(digit_sets: Sequence[_Ranges], sizes: Sequence[int]) -> _Ranges:
+    """
+    Return the indices whose every digit lies in the matching set.
+
+    Trailing digits that may take any value form contiguous blocks, so only
+    the digits before them are enumerated; every enumerated prefix yields at
+    least one range.
+    """
+    if any(not digits for digits in digit_sets):
+        return []
+    n = len(sizes)
+    block = 1
+    while n and digit_sets[n - 1] == [(0, sizes[n - 1])]:
+        n -= 1
+        block *= sizes[n]
+    if not n:
+        return [(0, block)]
+    heads = [
+        [d for start, stop in digit_sets[i] for d in range(start, stop)]
+        for i in range(n - 1)
+    ]
+    ranges: _Ranges = []
+    for head in product(*heads):
+        base = 0
+        for size, digit in zip(sizes, head, strict=False):
+            base = base * size + digit
+        base *= sizes[n - 1]
+        ranges.extend(
+            ((base + start) * block, (base + stop) * block)
+            for start, stop in digit_sets[n - 1]
+        )
+    return _merge(ranges)
+
+
+# ---------------------------------------------------------------------------
+# Diff nodes
+#
+# Each node relates the variants of an old (sub)template to those of the new
+# one: ``old_index``/``new_index`` map a kept variant across (None for an
+# added or removed one), ``changed_at`` tells whether a kept variant renders
+# differently, and ``added``/``removed``/``changed`` return index ranges.
+# ---------------------------------------------------------------------------
+
+
+class _Same(NamedTuple):
+    """Identical subtrees."""
+
+    size: int
+
+    @property
+    def old_size(self) -> int:
+        return self.size
+
+    @property
+    def new_size(self) -> int:
+        return self.size
+
+    def old_index(self, index: int) -> int | None:
+        return index
+
+    def new_index(self, index: int) -> int | None:
+        return index
+
+    def changed_at(self, index: int) -> bool:
+        return False
+
+    def added(self) -> _Ranges:
+        return []
+
+    def removed(self) -> _Ranges:
+        return []
+
+    def changed(self) -> _Ranges:
+        return []
+
+
+class _Replace(NamedTuple):
+    """Unrelated subtrees: every old variant removed, every new one added."""
+
+    old_size: int
+    new_size: int
+
+    def old_index(self, index: int) -> int | None:
+        return None
+
+    def new_index(self, index: int) -> int | None:
+        return None
+
+    def changed_at(self, index: int) -> bool:
+        return False
+
+    def added(self) -> _Ranges:
+        return [(0, self.new_size)] if self.new_size else []
+
+    def removed(self) -> _Ranges:
+        return [(0, self.old_size)] if self.old_size else []
+
+    def changed(self) -> _Ranges:
+        return []
+
+
+class _Splice(NamedTuple):
+    """A group whose options differ in one run: ``inner`` relates the variants
+    of that run, starting at digit ``start``; the options around it are kept."""
+
+    start: int
+    inner: _Diff
+    old_size: int
+    new_size: int
+
+    def old_index(self, index: int) -> int | None:
+        if index < self.start:
+            return index
+        if index >= self.start + self.inner.new_size:
+            return index - self.new_size + self.old_size
+        inner = self.inner.old_index(index - self.start)
+        return None if inner is None else inner + self.start
+
+    def new_index(self, index: int) -> int | None:
+        if index < self.start:
+            return index
+        if index >= self.start + self.inner.old_size:
+            return index - self.old_size + self.new_size
+        inner = self.inner.new_index(index - self.start)
+        return None if inner is None else inner + self.start
+
+    def changed_at(self, index: int) -> bool:
+        offset = index - self.start
+        return 0 <= offset < self.inner.new_size and self.inner.changed_at(offset)
+
+    def added(self) -> _Ranges:
+        return _shift(self.inner.added(), self.start)
+
+    def removed(self) -> _Ranges:
+        return _shift(self.inner.removed(), self.start)
+
+    def changed(self) -> _Ranges:
+        return _shift(self.inner.changed(), self.start)
+
+
+class _Product(NamedTuple):
+    """Templates of the same shape: one factor per group, combined like the
+    digits of a variant index.  With ``retext`` the literal text around the
+    groups differs, so every kept variant renders differently."""
+
+    factors: tuple[_Diff, ...]
+    retext: bool
+    old_size: int
+    new_size: int
+
+    def _old_sizes(self) -> list[int]:
+        return [factor.old_size for factor in self.factors]
+
+    def _new_sizes(self) -> list[int]:
+        return [factor.new_size for factor in self.factors]
+
+    def old_index(self, index: int) -> int | None:
+        result = 0
+        for factor, digit in zip(
+            self.factors, _digits(index, self._new_sizes()), strict=True
+        ):
+            old = factor.old_index(digit)
+            if old is None:
+                return None
+            result = result * factor.old_size + old
+        return result
+
+    def new_index(self, index: int) -> int | None:
+        result = 0
+        for factor, digit in zip(
+            self.factors, _digits(index, self._old_sizes()), strict=True
+        ):
+            new = factor.new_index(digit)
+            if new is None:
+                return None
+            result = result * factor.new_size + new
+        return result
+
+    def changed_at(self, index: int) -> bool:
+        return self.retext or any(
+            factor.changed_at(digit)
+            for factor, digit in zip(
+                self.factors, _digits(index, self._new_sizes()), strict=True
+            )
+        )
+
+    @staticmethod
+    def _any_digit(
+        hits: Sequence[_Ranges],
+        misses: Sequence[_Ranges],
+        rest: Sequence[_Ranges],
+        sizes: Sequence[int],
+    ) -> _Ranges:
+        """Indices with a digit in *hits*: split by the first such digit,
+        the digits before it lie in *misses* and those after it in *rest*."""
+        ranges: _Ranges = []
+        for k, hit in enumerate(hits):
+            if hit:
+                ranges += _product_ranges([*misses[:k], hit, *rest[k + 1 :]], sizes)
+        return _merge(ranges)
+
+    def added(self) -> _Ranges:
+        sizes = self._new_sizes()
+        added = [factor.added() for factor in self.factors]
+        kept = [_subtract([(0, n)], a) for n, a in zip(sizes, added, strict=True)]
+        return self._any_digit(added, kept, [[(0, n)] for n in sizes], sizes)
+
+    def removed(self) -> _Ranges:
+        sizes = self._old_sizes()
+        removed = [factor.removed() for factor in self.factors]
+        kept = [_subtract([(0, n)], r) for n, r in zip(sizes, removed, strict=True)]
+        return self._any_digit(removed, kept, [[(0, n)] for n in sizes], sizes)
+
+    def changed(self) -> _Ranges:
+        sizes = self._new_sizes()
+        kept = [
+            _subtract([(0, factor.new_size)], factor.added()) for factor in self.factors
+        ]
+        if self.retext:
+            return _product_ranges(kept, sizes)
+        changed = [factor.changed() for factor in self.factors]
+        unchanged = [_subtract(k, c) for k, c in zip(kept, changed, strict=True)]
+        return self._any_digit(changed, unchanged, kept, sizes)
+
+
+_Diff = _Same | _Replace | _Splice | _Product
+
+
+# ---------------------------------------------------------------------------
+# Tree comparison
+# ---------------------------------------------------------------------------
+
+
+def _diff_choice(old: _Choice, new: _Choice) -> _Diff:
+    """Relate the variants of two versions of a group, digit by digit."""
+    old_options, new_options = old.options, new.options
+    shortest = min(len(old_options), len(new_options))
+    head = 0
+    while head < shortest and old_options[head] == new_options[head]:
+        head += 1
+    tail = 0
+    while (
+        tail < shortest - head
+        and old_options[len(old_options) - 1 - tail]
+        == new_options[len(new_options) - 1 - tail]
+    ):
+        tail += 1
+    old_run = old_options[head : len(old_options) - tail]
+    new_run = new_options[head : len(new_options) - tail]
+    if len(old_run) == len(new_run) == 1:
+        inner = _diff_template(old_run[0], new_run[0])
+    else:
+        inner = _Replace(
+            sum(map(template_size, old_run)), sum(map(template_size, new_run))
+        )
+    if isinstance(inner, _Same) or inner == _Replace(0, 0):
+        return _Same(old.size)
+    start = old.offsets[head] if head < len(old_options) else old.size
+    return _Splice(start, inner, old.size, new.size)
+
+
+def _diff_template(old: _Template, new: _Template) -> _Diff:
+    """Relate the variants of two template trees.
+
+    Templates with the same sequence of literals and groups are compared
+    group by group; any other change replaces every variant.
+    """
+    old_size = template_size(old)
+    if old == new:
+        return _Same(old_size)
+    new_size = template_size(new)
+    if len(old) != len(new) or any(
+        isinstance(o, str) != isinstance(n, str) for o, n in zip(old, new, strict=True)
+    ):
+        return _Replace(old_size, new_size)
+    retext = False
+    factors = []
+    for o, n in zip(old, new, strict=True):
+        if isinstance(o, str) or isinstance(n, str):
+            retext = retext or o != n
+            continue
+        # The spacing flags describe the text after the group
+        retext = retext or (o.next_alnum, o.next_space, o.has_tail) != (
+            n.next_alnum,
+            n.next_space,
+            n.has_tail,
+        )
+        factors.append(_diff_choice(o, n))
+    return _Product(tuple(factors), retext, old_size, new_size)
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+
+def _to_ranges(ranges: _Ranges) -> list[range]:
+    return [range(start, stop) for start, stop in ranges]
+
+
+@dataclass(frozen=True)
+class TemplateEdit:
+    """
+    How the variants of ``template`` relate to those of ``previous``.
+
+    A variant is *kept* when the same choices exist in both templates; its
+    index may still move (an option added to the first group shifts every
+    later variant).  Kept variants whose text may differ are *changed*; the
+    others render exactly as before.
+
+    :meth:`added`, :meth:`removed` and :meth:`changed` return one range per
+    run of affected indices, which for an edit in a late group of a wide
+    template can be very many; see :mod:`midjargon.core.editing`.
+    """
+
+    previous: PromptTemplate
+    template: PromptTemplate
+    _diff: _Diff = field(repr=False)
+
+    def old_index(self, index: int) -> int | None:
+        """
+        Return the index in ``previous`` of variant *index* of ``template``.
+
+        Returns:
+            The old index, or None for an added variant.
+
+        Raises:
+            IndexError: If the index is out of range.
+        """
+        if not 0 <= index < self.template.size:
+            msg = f"Variant index out of range: {index}"
+            raise IndexError(msg)
+        return self._diff.old_index(index)
+
+    def new_index(self, index: int) -> int | None:
+        """
+        Return the index in ``template`` of variant *index* of ``previous``.
+
+        Returns:
+            The new index, or None for a removed variant.
+
+        Raises:
+            IndexError: If the index is out of range.
+        """
+        if not 0 <= index < self.previous.size:
+            msg = f"Variant index out of range: {index}"
+            raise IndexError(msg)
+        return self._diff.new_index(index)
+
+    def is_changed(self, index: int) -> bool:
+        """Return True if variant *index* of ``template`` is added or changed."""
+        return self.old_index(index) is None or self._diff.changed_at(index)
+
+    def added(self) -> list[range]:
+        """Return the indices of ``template`` that have no old variant."""
+        return _to_ranges(self._diff.added())
+
+    def removed(self) -> list[range]:
+        """Return the indices of ``previous`` that have no new variant."""
+        return _to_ranges(self._diff.removed())
+
+    def changed(self) -> list[range]:
+        """Return the indices of ``template`` whose kept variant changed text."""
+        return _to_ranges(self._diff.changed())
+
+
+def diff_templates(previous: PromptTemplate, template: PromptTemplate) -> TemplateEdit:
+    """
+    Relate the variants of two versions of a template.
+
+    Args:
+        previous: The template before the change.
+        template: The template after it.
+
+    Returns:
+        The :class:`TemplateEdit` between them.
+    """
+    diff = _diff_template(previous.parts, template.parts)
+    return TemplateEdit(previous, template, diff)
+
+
+def apply_edit(
+    template: PromptTemplate, offset: int, removed: int, inserted: str
+) -> TemplateEdit:
+    """
+    Edit the source of *template* and report the variants the edit affects.
+
+    The edited text is compiled with :func:`compile_prompt`, which tokenises
+    it in one pass (or not at all if it is cached); the two trees are then
+    compared only along the branches that differ.
+
+    Args:
+        template: Compiled template to edit.
+        offset: Position in ``template.source`` where the edit starts.
+        removed: Number of characters removed at *offset*.
+        inserted: Text inserted at *offset*.
+
+    Returns:
+        The :class:`TemplateEdit`; its ``template`` is the edited template.
+
+    Raises:
+        ValueError: If the edit lies outside the source text.
+    """
+    source = template.source
+    if offset < 0 or removed < 0 or offset + removed > len(source):
+        msg = f"Edit outside the template: offset={offset}, removed={removed}"
+        raise ValueError(msg)
+    text = source[:offset] + inserted + source[offset + removed :]
+    return diff_templates(template, compile_prompt(text))
@@ -5,25 +5,77 @@ Expand permutation syntax in a raw Midjourney prompt string.
 
 ``expand_midjargon_input`` is the public entry point: it expands all
 ``{a, b}`` groups and unescapes ``\\{``, ``\\}``, ``\\,`` sequences,
-returning a flat list of fully-resolved prompt strings.
+returning a flat list of fully-resolved prompt strings (or, with
+``lazy=True``, an iterator that yields them one at a time).  An optional
+:class:`~midjargon.core.budget.ExpansionBudget` bounds the expansion.
 """
 
 from __future__ import annotations
 
-from midjargon.core.permutations import expand_permutations
+from typing import TYPE_CHECKING, Literal, overload
+
+from midjargon.core.budget import ExpansionBudget, expand_within_budget
+from midjargon.core.permutations import expand_permutations, iter_expand
 from midjargon.core.type_defs import MidjargonInput, MidjargonList
 
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+
+@overload
+def expand_midjargon_input(
+    prompt: MidjargonInput,
+    *,
+    lazy: Literal[False] = ...,
+    budget: ExpansionBudget | None = ...,
+    unique: bool = ...,
+) -> MidjargonList: ...
+
 
-def expand_midjargon_input(prompt: MidjargonInput) -> MidjargonList:
+@overload
+def expand_midjargon_input(
+    prompt: MidjargonInput,
+    *,
+    lazy: Literal[True],
+    budget: ExpansionBudget | None = ...,
+    unique: bool = ...,
+) -> Iterator[str]: ...
+
+
+def expand_midjargon_input(
+    prompt: MidjargonInput,
+    *,
+    lazy: bool = False,
+    budget: ExpansionBudget | None = None,
+    unique: bool = False,
+) -> MidjargonList | Iterator[str]:
     """Expand permutation groups in *prompt* and return all variants.
 
     Args:
         prompt: Raw prompt string, possibly containing ``{opt1, opt2}``
                 permutation groups and escape sequences.
+        lazy: Return an iterator that yields variants one at a time instead
+              of building the whole list up front.
+        budget: Limits on the variant count, output size and nesting depth,
+                checked before anything is expanded (see
+                :func:`~midjargon.core.budget.expand_within_budget`).
+        unique: Return each distinct prompt string once, where it first
+                occurs; different choices such as ``{a, a b}{, b}`` can
+                render the same text.
 
     Returns:
         List of fully-expanded, unescaped prompt strings.  An empty input
         returns ``[""]``; a prompt without permutations returns a
-        single-element list.
+        single-element list.  With ``lazy=True`` the same variants are
+        yielded, in the same order, by an iterator.
+
+    Raises:
+        ExpansionLimitError: If *budget* is exceeded under its ``error``
+                             policy.
     """
-    return expand_permutations(prompt)
+    if budget is not None:
+        variants = expand_within_budget(prompt, budget, unique=unique)
+        return variants if lazy else list(variants)
+    if lazy:
+        return iter_expand(prompt, unique=unique)
+    return expand_permutations(prompt, unique=unique)
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# this_file: src/midjargon/core/lexer.py
+"""
+Single-pass lexer for expanded Midjourney prompt strings.
+
+``lex_prompt`` walks a prompt once and splits it into leading image URLs, the
+whitespace-normalised text span and the parameter tokens that follow the first
+``--`` that starts a word.  ``split_prompt`` does the same but leaves the
+parameters as a string.  ``tokenize_parameters`` splits a parameter string
+into tokens, honouring single- and double-quoted spans.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import NamedTuple
+
+from midjargon.core.profiling import instrument
+
+# A leading image URL, with the whitespace before it
+_IMAGE = re.compile(r"\s*(https?://\S*)")
+# Whitespace before the first word of the text
+_SPACE = re.compile(r"\s*")
+# A parameter token: unquoted characters and quoted spans, glued together
+_TOKEN = re.compile(r"""(?:[^\s"']+|"[^"]*"?|'[^']*'?)+""")
+# One piece of a token: a double-quoted, single-quoted or unquoted run
+_TOKEN_PART = re.compile(r""""([^"]*)"?|'([^']*)'?|([^"']+)""")
+_SPACE_RUN = re.compile(r"\s+")
+
+
+class LexedPrompt(NamedTuple):
+    """The lexical parts of an expanded prompt."""
+
+    images: list[str]  # leading image URLs, in order
+    text: str  # prompt text with whitespace collapsed to single spaces
+    params: list[str]  # parameter tokens, starting with a ``--name`` token
+
+
+class SplitPrompt(NamedTuple):
+    """An expanded prompt with its parameters not yet tokenised."""
+
+    images: list[str]  # leading image URLs, in order
+    text: str  # prompt text with whitespace collapsed to single spaces
+    params: str  # parameter string from the first ``--name``, or ""
+
+
+def _unquote(token: str, collapse: bool) -> str:
+    """Drop the quote characters delimiting quoted spans of *token*."""
+    parts = []
+    for double, single, plain in _TOKEN_PART.findall(token):
+        quoted = double or single
+        if quoted and collapse:
+            quoted = _SPACE_RUN.sub(" ", quoted)
+        parts.append(plain or quoted)
+    return "".join(parts)
+
+
+@instrument("tokenize")
+def tokenize_parameters(
+    text: str, start: int = 0, *, collapse: bool = False
+) -> list[str]:
+    """Split ``text[start:]`` into whitespace-separated parameter tokens.
+
+    Quoted spans (single or double quotes) may contain whitespace; the quote
+    characters themselves are dropped and empty tokens are skipped.
+
+    Args:
+        text: String containing the parameters.
+        start: Offset at which the parameters begin.
+        collapse: Collapse whitespace runs inside quoted spans to one space,
+                  as if the whole prompt had been whitespace-normalised.
+
+    Returns:
+        List of tokens.
+    """
+    double, single = text.find('"', start), text.find("'", start)
+    if double == -1 and single == -1:
+        return text[start:].split()
+    quote = single if double == -1 or -1 < single < double else double
+    # Everything before the token holding the first quote splits plainly
+    tokens = text[start:quote].split()
+    if tokens and not text[quote - 1].isspace():
+        quote -= len(tokens.pop())
+    for token in _TOKEN.findall(text, quote):
+        if '"' in token or "'" in token:
+            token = _unquote(token, collapse)
+            if not token:
+                continue
+        tokens.append(token)
+    return tokens
+
+
+def _find_param_start(prompt: str, pos: int) -> int:
+    """Return the index of the first ``--`` after *pos* that starts a word, or -1."""
+    i = prompt.find("--", pos + 1)
+    while i != -1 and not prompt[i - 1].isspace():
+        i = prompt.find("--", i + 1)
+    return i
+
+
+def _scan(prompt: str) -> tuple[str, list[str], str, int]:
+    """Return the right-stripped prompt, its images, its normalised text and
+    the index where its parameters start (-1 if it has none)."""
+    prompt = prompt.rstrip()
+    images = []
+    pos = 0
+    while match := _IMAGE.match(prompt, pos):
+        images.append(match.group(1))
+        pos = match.end()
+    pos = _SPACE.match(prompt, pos).end()  # type: ignore[union-attr]
+
+    param_start = _find_param_start(prompt, pos)
+    if param_start == -1:
+        text = prompt[pos:]
+    else:
+        text = prompt[pos:param_start].rstrip()
+    # Only tabs, newlines, other non-ASCII spaces or double spaces need work
+    if "  " in text or not text.isprintable():
+        text = " ".join(text.split())
+    return prompt, images, text, param_start
+
+
+def split_prompt(prompt: str) -> SplitPrompt:
+    """Split an expanded *prompt* into images, text and the parameter string.
+
+    Like :func:`lex_prompt`, but the parameters are returned as the rest of
+    the (right-stripped) prompt instead of as tokens.
+
+    Args:
+        prompt: A single expanded prompt string.
+
+    Returns:
+        :class:`SplitPrompt` with the images, normalised text and parameters.
+    """
+    prompt, images, text, param_start = _scan(prompt)
+    return SplitPrompt(images, text, prompt[param_start:] if param_start >= 0 else "")
+
+
+@instrument("tokenize")
+def lex_prompt(prompt: str) -> LexedPrompt:
+    """Split an expanded *prompt* into images, text and parameter tokens.
+
+    Leading words starting with ``http://`` or ``https://`` are images.  The
+    text runs up to the first later word that starts with ``--``; everything
+    from there on is tokenised as parameters.
+
+    Args:
+        prompt: A single expanded prompt string.
+
+    Returns:
+        :class:`LexedPrompt` with the images, normalised text and parameter
+        tokens.
+    """
+    prompt, images, text, param_start = _scan(prompt)
+    params = (
+        tokenize_parameters(prompt, param_start, collapse=True)
+        if param_start >= 0
+        else []
+    )
+    return LexedPrompt(images, text, params)
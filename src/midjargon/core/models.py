@@ -6,6 +6,7 @@ import re
 from enum import Enum
 from typing import Any, TypeVar
 
+from midjargon.core.profiling import instrument
 from pydantic import (BaseModel, Field, HttpUrl, field_validator,
                       model_validator)
 
@@ -300,10 +301,12 @@ class MidjourneyPrompt(BaseModel):
             parts.append(param_str)
         return " ".join(parts)
 
+    @instrument("serialise")
     def to_string(self) -> str:
         """Convert to string format."""
         return str(self)
 
+    @instrument("serialise")
     def model_dump(self, **kwargs: Any) -> dict[str, Any]:
         """Override model_dump to flatten parameters into top-level dict."""
         data = super().model_dump(**kwargs)
@@ -9,12 +9,23 @@ params). Numeric conversion is the responsibility of higher-level callers.
 
 from __future__ import annotations
 
+from collections.abc import Callable
+from typing import TYPE_CHECKING
+
+from midjargon.core.lexer import tokenize_parameters
+from midjargon.core.profiling import instrument
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
 # ---------------------------------------------------------------------------
 # Public type aliases
 # ---------------------------------------------------------------------------
 ParamName = str
 ParamValue = str | list[str] | None
 ParamDict = dict[ParamName, ParamValue]
+# (params, name as written, tokens, index after the name) → next index
+ParamHandler = Callable[[ParamDict, str, list[str], int], int]
 
 # ---------------------------------------------------------------------------
 # Alias table: short name → canonical name
@@ -45,37 +56,6 @@ MULTI_VALUE_PARAMS: frozenset[str] = frozenset(
 )
 
 
-# ---------------------------------------------------------------------------
-# Internal helpers
-# ---------------------------------------------------------------------------
-
-def _tokenize(param_str: str) -> list[str]:
-    """Split *param_str* into tokens, honouring single- and double-quoted spans."""
-    tokens: list[str] = []
-    current: list[str] = []
-    in_quotes = False
-    quote_char = ""
-
-    for char in param_str:
-        if char in ('"', "'") and not in_quotes:
-            in_quotes = True
-            quote_char = char
-        elif in_quotes and char == quote_char:
-            in_quotes = False
-            quote_char = ""
-        elif char.isspace() and not in_quotes:
-            if current:
-                tokens.append("".join(current))
-                current = []
-        else:
-            current.append(char)
-
-    if current:
-        tokens.append("".join(current))
-
-    return tokens
-
-
 # ---------------------------------------------------------------------------
 # Public API
 # ---------------------------------------------------------------------------
@@ -105,11 +85,33 @@ def parse_parameters(param_str: str) -> ParamDict:
     if not stripped.startswith("--"):
         raise ValueError(f"Parameter name cannot start with dash: {stripped}")
 
-    tokens = _tokenize(stripped)
+    return parse_parameter_tokens(tokenize_parameters(stripped))
+
+
+@instrument("parameters")
+def parse_parameter_tokens(tokens: list[str]) -> ParamDict:
+    """Parse already-tokenised ``--key [value …]`` parameters into a dict.
+
+    Each ``--name`` token is dispatched through the handler table (see
+    :func:`register_parameter`); names without an entry take one value.
+
+    Args:
+        tokens: Tokens as produced by
+                :func:`~midjargon.core.lexer.tokenize_parameters`.
+
+    Returns:
+        Same as :func:`parse_parameters`.
+
+    Raises:
+        ValueError: On syntax errors (empty name, missing value, or a token
+                    where a ``--name`` is expected).
+    """
     params: ParamDict = {}
+    handlers = _HANDLERS
     i = 0
+    n = len(tokens)
 
-    while i < len(tokens):
+    while i < n:
         token = tokens[i]
 
         if not token.startswith("--"):
@@ -119,52 +121,135 @@ def parse_parameters(param_str: str) -> ParamDict:
         if not name:
             raise ValueError("Empty parameter name")
 
-        # ---- special: --niji [N] ----------------------------------------
-        if name == "niji":
-            i += 1
-            if i < len(tokens) and not tokens[i].startswith("--"):
-                params["version"] = f"niji {tokens[i]}"
-                i += 1
-            else:
-                params["version"] = "niji"
-            continue
-
-        expanded = PARAMETER_ALIASES.get(name, name)
-
-        # ---- flag parameters (no value) ------------------------------------
-        if expanded in FLAG_PARAMS:
-            params[expanded] = None
-            i += 1
-            continue
+        i = handlers.get(name, _parse_value)(params, name, tokens, i + 1)
 
-        # ---- personalization: optional multi-value -------------------------
-        if expanded == "personalization":
-            i += 1
-            values: list[str] = []
-            while i < len(tokens) and not tokens[i].startswith("--"):
-                # A quoted token like "CODE1 CODE2" arrives as one token;
-                # split it so each code is a separate list element.
-                values.extend(tokens[i].split())
-                i += 1
-            params["personalization"] = values if values else None
-            continue
-
-        # ---- character_reference / style_reference: multi-value -----------
-        if expanded in {"character_reference", "style_reference"}:
-            i += 1
-            refs: list[str] = []
-            while i < len(tokens) and not tokens[i].startswith("--"):
-                refs.append(tokens[i])
-                i += 1
-            params[expanded] = refs
-            continue
-
-        # ---- regular single-value parameter --------------------------------
-        i += 1
+    return params
+
+
+def register_parameter(
+    name: str,
+    kind: str = "value",
+    *,
+    aliases: Iterable[str] = (),
+    handler: ParamHandler | None = None,
+) -> None:
+    """Teach the parameter parser a new (or changed) parameter.
+
+    Args:
+        name: Canonical parameter name, without the leading ``--``.
+        kind: ``"value"`` (one value), ``"flag"`` (no value, stored as
+              ``None``) or ``"multi"`` (all values up to the next ``--name``,
+              stored as a list).  Ignored when *handler* is given.
+        aliases: Alternative names that map to *name*.
+        handler: Custom :data:`ParamHandler`; called with the result dict,
+                 the name as written, the token list and the index of the
+                 first token after the name, it returns the index of the next
+                 unconsumed token.
+
+    Raises:
+        ValueError: If *kind* is unknown.
+    """
+    if handler is None:
+        try:
+            factory = _HANDLER_KINDS[kind]
+        except KeyError:
+            expected = ", ".join(_HANDLER_KINDS)
+            msg = f"Unknown parameter kind: {kind} (expected one of {expected})"
+            raise ValueError(msg) from None
+        handler = factory(name)
+    for alias in aliases:
+        PARAMETER_ALIASES[alias] = name
+    for key in (name, *aliases):
+        _HANDLERS[key] = handler
+
+
+# ---------------------------------------------------------------------------
+# Handlers
+# ---------------------------------------------------------------------------
+
+def _parse_value(params: ParamDict, name: str, tokens: list[str], i: int) -> int:
+    """Store the single value of an unregistered parameter under its own name."""
+    if i >= len(tokens) or tokens[i].startswith("--"):
+        raise ValueError(f"Missing value for parameter: {name}")
+    params[name] = tokens[i]
+    return i + 1
+
+
+def _value_handler(canonical: str) -> ParamHandler:
+    def handler(params: ParamDict, name: str, tokens: list[str], i: int) -> int:
         if i >= len(tokens) or tokens[i].startswith("--"):
             raise ValueError(f"Missing value for parameter: {name}")
+        params[canonical] = tokens[i]
+        return i + 1
+
+    return handler
+
+
+def _flag_handler(canonical: str) -> ParamHandler:
+    def handler(params: ParamDict, name: str, tokens: list[str], i: int) -> int:
+        params[canonical] = None
+        return i
+
+    return handler
+
 
-        params[expanded] = tokens[i]
+def _multi_handler(canonical: str) -> ParamHandler:
+    def handler(params: ParamDict, name: str, tokens: list[str], i: int) -> int:
+        values: list[str] = []
+        while i < len(tokens) and not tokens[i].startswith("--"):
+            values.append(tokens[i])
+            i += 1
+        params[canonical] = values
+        return i
+
+    return handler
+
+
+def _parse_niji(params: ParamDict, name: str, tokens: list[str], i: int) -> int:
+    """``--niji [N]`` sets the version to ``"niji"`` or ``"niji N"``."""
+    if i < len(tokens) and not tokens[i].startswith("--"):
+        params["version"] = f"niji {tokens[i]}"
+        return i + 1
+    params["version"] = "niji"
+    return i
+
+
+def _parse_personalization(
+    params: ParamDict, name: str, tokens: list[str], i: int
+) -> int:
+    """``--p [CODE …]``: optional codes, ``None`` when there are none."""
+    values: list[str] = []
+    while i < len(tokens) and not tokens[i].startswith("--"):
+        # A quoted token like "CODE1 CODE2" arrives as one token;
+        # split it so each code is a separate list element.
+        values.extend(tokens[i].split())
         i += 1
+    params["personalization"] = values if values else None
+    return i
 
-    return params
+
+_HANDLER_KINDS: dict[str, Callable[[str], ParamHandler]] = {
+    "value": _value_handler,
+    "flag": _flag_handler,
+    "multi": _multi_handler,
+}
+
+
+def _compile_handlers() -> dict[str, ParamHandler]:
+    """Build the name → handler table from the grammar tables above."""
+    canonical: dict[str, ParamHandler] = {
+        name: _value_handler(name) for name in PARAMETER_ALIASES.values()
+    }
+    canonical.update((name, _flag_handler(name)) for name in FLAG_PARAMS)
+    canonical.update((name, _multi_handler(name)) for name in MULTI_VALUE_PARAMS)
+    canonical["personalization"] = _parse_personalization
+    handlers = {
+        alias: canonical[name] for alias, name in PARAMETER_ALIASES.items()
+    }
+    handlers.update(canonical)
+    handlers["niji"] = _parse_niji
+    return handlers
+
+
+# Name as written (canonical or alias) → handler
+_HANDLERS: dict[str, ParamHandler] = _compile_handlers()
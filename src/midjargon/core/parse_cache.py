@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# this_file: src/midjargon/core/parse_cache.py
+"""
+Bounded LRU cache of parsed prompts.
+
+``ParseCache`` maps prompt strings to an immutable parsed representation: a
+read-only mapping whose list values are stored as tuples.  It is capped both by
+entry count and by an estimate of the memory the entries use, and counts hits,
+misses and evictions like ``functools.lru_cache``.
+"""
+
+from __future__ import annotations
+
+import sys
+import threading
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Mapping
+
+DEFAULT_MAXSIZE = 4096  # Number of parsed prompts kept
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024  # Estimated memory for the kept prompts
+
+FrozenDict = MappingProxyType[str, Any]
+
+
+class CacheInfo(NamedTuple):
+    """Cache statistics, a superset of ``functools.lru_cache``'s."""
+
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+    evictions: int
+    max_bytes: int
+    currbytes: int
+
+
+def freeze(parsed: Mapping[str, Any]) -> FrozenDict:
+    """Return a read-only copy of *parsed* with list values as tuples."""
+    return MappingProxyType(
+        {k: tuple(v) if isinstance(v, list) else v for k, v in parsed.items()}
+    )
+
+
+def thaw(frozen: Mapping[str, Any]) -> dict[str, Any]:
+    """Return a fresh mutable dict from a :func:`freeze`-d mapping."""
+    return {k: list(v) if isinstance(v, tuple) else v for k, v in frozen.items()}
+
+
+def _estimate_size(prompt: str, frozen: FrozenDict) -> int:
+    """Rough number of bytes held by a cache entry."""
+    size = sys.getsizeof(prompt) + sys.getsizeof(frozen) + 64  # dict + entry
+    for value in frozen.values():
+        size += sys.getsizeof(value)
+        if isinstance(value, tuple):
+            size += sum(sys.getsizeof(item) for item in value)
+    return size
+
+
+class ParseCache:
+    """Thread-safe LRU cache in front of a prompt parser.
+
+    Args:
+        parse: Function turning a prompt string into a parsed dict.
+        maxsize: Maximum number of cached prompts.
+        max_bytes: Maximum estimated memory of the cached entries; results
+                   larger than this on their own are returned uncached.
+
+    Raises:
+        ValueError: If *maxsize* or *max_bytes* is not positive.
+    """
+
+    def __init__(
+        self,
+        parse: Callable[[str], Mapping[str, Any]],
+        maxsize: int = DEFAULT_MAXSIZE,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ) -> None:
+        if maxsize < 1 or max_bytes < 1:
+            msg = f"Cache limits must be positive: {maxsize=}, {max_bytes=}"
+            raise ValueError(msg)
+        self._parse = parse
+        self._maxsize = maxsize
+        self._max_bytes = max_bytes
+        self._entries: OrderedDict[str, tuple[FrozenDict, int]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = self._misses = self._evictions = self._bytes = 0
+
+    def lookup(self, prompt: str) -> FrozenDict:
+        """Return the read-only parse of *prompt*, parsing it on a miss."""
+        with self._lock:
+            entry = self._entries.get(prompt)
+            if entry is not None:
+                self._entries.move_to_end(prompt)
+                self._hits += 1
+                return entry[0]
+            self._misses += 1
+
+        # Parse outside the lock; a concurrent miss may parse the same prompt
+        frozen = freeze(self._parse(prompt))
+        size = _estimate_size(prompt, frozen)
+        if size > self._max_bytes:
+            return frozen
+
+        with self._lock:
+            if prompt not in self._entries:
+                self._entries[prompt] = (frozen, size)
+                self._bytes += size
+                while (
+                    len(self._entries) > self._maxsize or self._bytes > self._max_bytes
+                ):
+                    _, (_, evicted) = self._entries.popitem(last=False)
+                    self._bytes -= evicted
+                    self._evictions += 1
+        return frozen
+
+    def get(self, prompt: str) -> dict[str, Any]:
+        """Return a fresh mutable copy of the parse of *prompt*."""
+        return thaw(self.lookup(prompt))
+
+    def cache_info(self) -> CacheInfo:
+        """Report cache statistics."""
+        with self._lock:
+            return CacheInfo(
+                self._hits,
+                self._misses,
+                self._maxsize,
+                len(self._entries),
+                self._evictions,
+                self._max_bytes,
+                self._bytes,
+            )
+
+    def cache_clear(self) -> None:
+        """Drop all entries and reset the statistics."""
+        with self._lock:
+            self._entries.clear()
+            self._hits = self._misses = self._evictions = self._bytes = 0
@@ -11,14 +11,29 @@ responsibility).
 
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Any
-
-from midjargon.core.parameters import parse_parameters
+from typing import TYPE_CHECKING, Any, Literal, overload
+
+from midjargon.core.lexer import lex_prompt, split_prompt, tokenize_parameters
+from midjargon.core.parameters import parse_parameter_tokens
+from midjargon.core.parse_cache import (
+    DEFAULT_MAX_BYTES,
+    DEFAULT_MAXSIZE,
+    FrozenDict,
+    ParseCache,
+    freeze,
+    thaw,
+)
+from midjargon.core.profiling import instrument
 from midjargon.core.type_defs import MidjargonDict, MidjargonPrompt
 
 if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
     from midjargon.core.models import MidjourneyPrompt as MJPrompt
 
+# Distinct parameter strings a BatchParser keeps parsed
+SHARED_PARAMS_SIZE = 1024
+
 # ---------------------------------------------------------------------------
 # Numeric parameters that should be converted from string → int/float
 # ---------------------------------------------------------------------------
@@ -40,23 +55,8 @@ _NUMERIC_PARAMS: frozenset[str] = frozenset(
 
 _SEED_SPECIAL = frozenset({"random", "none"})
 
-
-def _is_url(s: str) -> bool:
-    return s.startswith(("http://", "https://"))
-
-
-def _extract_images(prompt: str) -> tuple[list[str], str]:
-    """Pull leading URL tokens out of *prompt*; return (urls, remainder)."""
-    parts = prompt.split()
-    urls: list[str] = []
-    idx = 0
-    for i, part in enumerate(parts):
-        if _is_url(part):
-            urls.append(part)
-            idx = i + 1
-        else:
-            break
-    return urls, " ".join(parts[idx:])
+# Process-wide parse cache, installed by enable_parse_cache()
+_cache: ParseCache | None = None
 
 
 def _convert_numeric(value: str) -> int | float:
@@ -64,7 +64,53 @@ def _convert_numeric(value: str) -> int | float:
     return int(f) if f.is_integer() else f
 
 
-def parse_midjargon_prompt_to_dict(prompt: str) -> MidjargonDict:
+def enable_parse_cache(
+    maxsize: int = DEFAULT_MAXSIZE, max_bytes: int = DEFAULT_MAX_BYTES
+) -> ParseCache:
+    """Cache the results of :func:`parse_midjargon_prompt_to_dict`.
+
+    Replaces any cache installed before.  Use the returned cache's
+    ``cache_info()`` and ``cache_clear()`` to inspect or reset it.
+
+    Args:
+        maxsize: Maximum number of cached prompts.
+        max_bytes: Maximum estimated memory of the cached results.
+
+    Returns:
+        The installed :class:`~midjargon.core.parse_cache.ParseCache`.
+    """
+    global _cache
+    _cache = ParseCache(_parse_prompt, maxsize, max_bytes)
+    return _cache
+
+
+def disable_parse_cache() -> None:
+    """Stop caching parse results and drop the cache."""
+    global _cache
+    _cache = None
+
+
+def get_parse_cache() -> ParseCache | None:
+    """Return the installed parse cache, or ``None`` when caching is off."""
+    return _cache
+
+
+@overload
+def parse_midjargon_prompt_to_dict(
+    prompt: str, *, readonly: Literal[False] = False
+) -> MidjargonDict: ...
+
+
+@overload
+def parse_midjargon_prompt_to_dict(
+    prompt: str, *, readonly: Literal[True]
+) -> FrozenDict: ...
+
+
+@instrument("parse")
+def parse_midjargon_prompt_to_dict(
+    prompt: str, *, readonly: bool = False
+) -> MidjargonDict | FrozenDict:
     """Parse an expanded prompt string into a flat dictionary.
 
     The returned dict always contains:
@@ -76,41 +122,50 @@ def parse_midjargon_prompt_to_dict(prompt: str) -> MidjargonDict:
     No permutation expansion is performed; the caller is responsible for
     expanding ``{...}`` groups beforehand.
 
+    When :func:`enable_parse_cache` is in effect, results are looked up in
+    (and stored into) the cache; each call still gets its own dict.
+
     Args:
         prompt: A single expanded prompt string.
+        readonly: Return a read-only mapping (list values as tuples) instead
+                  of a new dict.  With the cache on, this is the cached
+                  object itself and costs no copy.
 
     Returns:
         ``MidjargonDict`` with text, images, and parameter keys.
     """
+    cache = _cache
+    if cache is not None:
+        frozen = cache.lookup(prompt)
+        return frozen if readonly else thaw(frozen)
+    result = _parse_prompt(prompt)
+    return freeze(result) if readonly else result
+
+
+def _parse_prompt(prompt: str) -> MidjargonDict:
+    """Uncached implementation of :func:`parse_midjargon_prompt_to_dict`."""
     if not prompt or not prompt.strip():
         return {"text": "", "images": []}
 
-    # 1. Extract leading image URLs
-    images, remaining = _extract_images(prompt)
+    # 1. Split into leading image URLs, normalised text and parameter tokens
+    images, text, param_tokens = lex_prompt(prompt)
 
-    # 2. Split text from parameters on the first " --"
-    if " --" in remaining:
-        text_raw, param_tail = remaining.split(" --", 1)
-        param_str = "--" + param_tail
-    else:
-        text_raw = remaining
-        param_str = ""
+    # 2. Build output dict from the parsed parameters
+    result: MidjargonDict = {"text": text, "images": images}
+    _add_params(result, param_tokens)
+    return result
 
-    # 3. Normalise text whitespace
-    text = " ".join(text_raw.split())
 
-    # 4. Parse raw parameters
+def _add_params(result: dict[str, Any], param_tokens: list[str]) -> None:
+    """Parse parameter tokens into *result*, converting numeric strings."""
     raw_params: dict[str, Any] = {}
-    if param_str:
+    if param_tokens:
         try:
-            raw_params = parse_parameters(param_str)
+            raw_params = parse_parameter_tokens(param_tokens)
         except ValueError:
             # Tolerate unparseable param sections; store nothing
             raw_params = {}
 
-    # 5. Build output dict, converting numeric strings
-    result: MidjargonDict = {"text": text, "images": images}
-
     for key, value in raw_params.items():
         if (
             isinstance(value, str)
@@ -124,7 +179,60 @@ def parse_midjargon_prompt_to_dict(prompt: str) -> MidjargonDict:
         else:
             result[key] = value
 
-    return result
+
+class BatchParser:
+    """Parse the prompts of one batch, each distinct parameter string once.
+
+    The variants of ``a {red, blue, green} bird --ar 16:9 --s 250`` differ
+    only in their text; their ``--`` tails are identical (or, when groups
+    touch some parameters, take a few distinct values).  Each call splits
+    off the images and text as :func:`parse_midjargon_prompt_to_dict` does,
+    but tokenises and converts the parameter string only the first time it
+    is seen; later prompts get a copy of the stored result.  The output is
+    identical to parsing every prompt separately.
+
+    Args:
+        maxsize: Distinct parameter strings kept; once full, further new
+                 ones are parsed every time.
+    """
+
+    def __init__(self, maxsize: int = SHARED_PARAMS_SIZE) -> None:
+        self.maxsize = maxsize
+        self._params: dict[str, FrozenDict] = {}
+
+    @instrument("parse")
+    def __call__(self, prompt: str) -> MidjargonDict:
+        """Parse *prompt* like :func:`parse_midjargon_prompt_to_dict`."""
+        if not prompt or not prompt.strip():
+            return {"text": "", "images": []}
+        images, text, params = split_prompt(prompt)
+        frozen = self._params.get(params)
+        if frozen is None:
+            parsed: dict[str, Any] = {}
+            _add_params(parsed, tokenize_parameters(params, collapse=True))
+            frozen = freeze(parsed)
+            if len(self._params) < self.maxsize:
+                self._params[params] = frozen
+        result: MidjargonDict = {"text": text, "images": images}
+        for key, value in frozen.items():
+            result[key] = list(value) if isinstance(value, tuple) else value
+        return result
+
+
+def parse_prompts(prompts: Iterable[str]) -> Iterator[MidjargonDict]:
+    """Lazily parse expanded *prompts*, sharing their parameter parsing.
+
+    Yields the same dicts as :func:`parse_midjargon_prompt_to_dict` would,
+    each a new object, but parses each distinct parameter string only once
+    (see :class:`BatchParser`).  The parse cache is not consulted.
+
+    Args:
+        prompts: Expanded prompt strings, typically variants of one template.
+
+    Returns:
+        Iterator over ``MidjargonDict`` objects, one per prompt.
+    """
+    return map(BatchParser(), prompts)
 
 
 def parse_midjargon_prompt(prompt: str) -> MJPrompt:
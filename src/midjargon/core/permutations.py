@@ -7,15 +7,27 @@ Supports nested permutations and proper spacing handling.
 
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+import re
+from bisect import bisect_right
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import islice
+from math import prod
+from typing import TYPE_CHECKING, NamedTuple
+
+from midjargon.core.profiling import instrument
 
 if TYPE_CHECKING:
-    from collections.abc import Sequence
+    from collections.abc import Iterable, Iterator, Sequence
 
     from midjargon.core.type_defs import MidjargonList
 
 # Constants
 ESCAPE_SEQUENCE_LENGTH = 2  # Length of escape sequence: backslash + character
+TEMPLATE_CACHE_SIZE = 1024  # Number of compiled templates kept by compile_prompt
+
+_BRACE = re.compile(r"[{}]")
+_WHITESPACE = re.compile(r"\s")
 
 
 def split_options(text: str) -> list[str]:
@@ -228,6 +240,7 @@ def expand_single(text: str) -> list[str]:
     return [_format_part(prefix, opt, suffix) for opt in expanded_options]
 
 
+@instrument("expand")
 def expand_text(text: str) -> MidjargonList:
     """
     Expand all permutations in text into separate complete prompts.
@@ -342,15 +355,800 @@ def _unescape(text: str) -> str:
     return "".join(result)
 
 
-def expand_permutations(text: str) -> list[str]:
+class _Choice(NamedTuple):
+    """A parsed ``{a, b, ...}`` group: one template per option.
+
+    ``offsets`` holds the index of the first variant of each option within the
+    group and ``size`` the total number of variants the group contributes.
+    The remaining fields record the raw text that follows the group, which is
+    all :func:`_place` needs to reproduce the spacing of :func:`_format_part`.
+    """
+
+    options: tuple[_Template, ...]
+    offsets: tuple[int, ...]
+    size: int
+    next_alnum: bool  # text after the group starts with an alphanumeric
+    next_space: bool  # text after the group starts with a space
+    has_tail: bool  # text after the group is non-empty once that space is dropped
+
+
+# A template is a sequence of unescaped literal strings and choice groups.
+_Template = tuple[str | _Choice, ...]
+
+# One variant: its text is the concatenation of the (never empty) segments
+Segments = tuple[str, ...]
+
+
+def template_size(template: _Template) -> int:
+    """
+    Return the number of variants a template tree expands to.
+
+    Args:
+        template: Parsed template, e.g. :attr:`PromptTemplate.parts` or one
+                  option of a group in it.
+
+    Returns:
+        Product of the sizes of its groups (1 without groups).
+    """
+    return prod(part.size for part in template if not isinstance(part, str))
+
+
+def _template_bytes(template: _Template) -> int:
+    """
+    Return an upper bound of the UTF-8 bytes of all variants of *template*.
+
+    Every literal is counted once per variant it appears in, and each group
+    adds its options plus the spaces :func:`_place` may insert around an
+    option: one before it and, if the group is followed by a word, one after.
+    """
+    size = template_size(template)
+    total = 0
+    for part in template:
+        if isinstance(part, str):
+            total += len(part.encode()) * size
+        else:
+            options = sum(_template_bytes(option) for option in part.options)
+            spaces = (1 + part.next_alnum) * part.size
+            total += (options + spaces) * (size // part.size)
+    return total
+
+
+def _prefix_bytes(template: _Template, stop: int) -> int:
+    """
+    Return the :func:`_template_bytes` bound of the first *stop* variants.
+
+    The bound is a sum over variants, so ``[start, stop)`` is bounded by
+    ``_prefix_bytes(template, stop) - _prefix_bytes(template, start)``.  A
+    group steps to its next variant once per variant of the groups after it
+    and wraps around after its last one: the complete cycles count all of
+    its options, the cycle *stop* falls in only the leading ones.
+    """
+    total = 0
+    repeat = template_size(template)  # variants per step of the current group
+    for part in template:
+        if isinstance(part, str):
+            total += len(part.encode()) * stop
+            continue
+        repeat //= part.size
+        cycles, rest = divmod(stop, part.size * repeat)
+        digit, partial = divmod(rest, repeat)
+        before = _choice_prefix_bytes(part, digit)
+        total += (1 + part.next_alnum) * stop
+        total += cycles * repeat * _choice_prefix_bytes(part, part.size)
+        total += repeat * before
+        if partial:
+            total += partial * (_choice_prefix_bytes(part, digit + 1) - before)
+    return total
+
+
+def _choice_prefix_bytes(choice: _Choice, stop: int) -> int:
+    """Return the bound of the first *stop* expanded options of *choice*."""
+    total = 0
+    for option, offset in zip(choice.options, choice.offsets, strict=True):
+        if stop <= offset:
+            break
+        total += _prefix_bytes(option, min(stop - offset, template_size(option)))
+    return total
+
+
+def _find_group_start(text: str, start: int) -> int:
+    """Return the index of the first unescaped ``{`` at or after *start*, or -1."""
+    i = text.find("{", start)
+    while i > 0 and text[i - 1] == "\\":
+        i = text.find("{", i + 1)
+    return i
+
+
+def _parse_template(text: str) -> _Template:
+    """
+    Parse *text* into a template tree in a single left-to-right pass.
+
+    Groups are resolved exactly like :func:`expand_single` does, one after the
+    other; an unmatched ``{`` turns the rest of the text into a literal.
+
+    Args:
+        text: Text containing permutations in {} brackets.
+
+    Returns:
+        Tuple of literal strings and :class:`_Choice` nodes.
+    """
+    parts: list[str | _Choice] = []
+    pos = 0
+    while True:
+        start = _find_group_start(text, pos)
+        end = _find_matching_brace(text, start) if start >= 0 else start
+        if end == start:  # No more groups, or an unmatched brace
+            break
+        if start > pos:
+            parts.append(_unescape(text[pos:start]))
+        options = tuple(
+            _parse_template(opt) if "{" in opt else ((_unescape(opt),) if opt else ())
+            for opt in split_options(text[start + 1 : end])
+        )
+        offsets = []
+        size = 0
+        for option in options:
+            offsets.append(size)
+            size += template_size(option)
+        after = text[end + 1 : end + 2]
+        tail_length = len(text) - end - 1 - (after == " ")
+        parts.append(
+            _Choice(
+                options,
+                tuple(offsets),
+                size,
+                after.isalnum(),
+                after == " ",
+                tail_length > 0,
+            )
+        )
+        pos = end + 1
+    if pos < len(text):
+        parts.append(_unescape(text[pos:]))
+    return tuple(parts)
+
+
+def _place(prefix: str, option: str, choice: _Choice) -> tuple[str, bool]:
+    """
+    Append an expanded option to the text rendered so far.
+
+    Mirrors :func:`_format_part` without needing the (unexpanded) suffix.
+
+    Args:
+        prefix: Text rendered before the group.
+        option: Fully expanded option text.
+        choice: The group the option belongs to.
+
+    Returns:
+        Tuple of (new prefix, whether the next literal drops its leading space).
+    """
+    if not option:
+        if prefix.endswith(" "):
+            prefix = prefix[:-1]
+        if prefix and choice.has_tail:
+            prefix += " "
+        return prefix, choice.next_space
+    if prefix and prefix[-1].isalnum():
+        prefix += " "
+    prefix += option
+    if choice.next_alnum:
+        prefix += " "
+    return prefix, False
+
+
+def _iter_choice(choice: _Choice, start: int = 0) -> Iterator[str]:
+    """Yield the expanded options of *choice* from its variant *start* onwards."""
+    first = bisect_right(choice.offsets, start) - 1
+    yield from _iter_template(choice.options[first], start - choice.offsets[first])
+    for option in choice.options[first + 1 :]:
+        yield from _iter_template(option)
+
+
+def _decode_index(choices: Sequence[_Choice], index: int) -> list[int] | None:
+    """
+    Split a variant index into one mixed-radix digit per group.
+
+    Args:
+        choices: Groups of a template, in order.
+        index: Variant index.
+
+    Returns:
+        Per-group variant indices (last group least significant), or None if
+        the index lies beyond the last variant.
+    """
+    digits = []
+    for choice in reversed(choices):
+        index, digit = divmod(index, choice.size)
+        digits.append(digit)
+    if index:
+        return None
+    digits.reverse()
+    return digits
+
+
+def _iter_template(template: _Template, start: int = 0) -> Iterator[str]:
+    """
+    Yield the variants of *template* in canonical order, from *start* onwards.
+
+    The groups are advanced like an odometer (last group fastest) and only the
+    text after the group that changed is re-rendered, so memory stays
+    proportional to the template size and nesting depth, never to the number
+    of variants.
+
+    Args:
+        template: Parsed template.
+        start: Index of the first variant to yield.
+
+    Yields:
+        Expanded, unescaped variants.
+    """
+    positions = [i for i, part in enumerate(template) if not isinstance(part, str)]
+    if not positions:
+        if start == 0:
+            yield "".join(template)  # type: ignore[arg-type]
+        return
+
+    choices: list[_Choice] = [template[i] for i in positions]  # type: ignore[misc]
+    # Literal text following each group, up to the next group or the end
+    tails: list[str] = []
+    for i in positions:
+        following = template[i + 1] if i + 1 < len(template) else ""
+        tails.append(following if isinstance(following, str) else "")
+    digits = _decode_index(choices, start)
+    if digits is None:
+        return
+    iters = [
+        _iter_choice(choice, digit)
+        for choice, digit in zip(choices, digits, strict=True)
+    ]
+    values = [next(it) for it in iters]
+    prefixes = ["".join(template[: positions[0]])]  # type: ignore[arg-type]
+    prefixes.extend("" for _ in choices)
+
+    changed = 0
+    while True:
+        for k in range(changed, len(choices)):
+            text, skip_space = _place(prefixes[k], values[k], choices[k])
+            tail = tails[k]
+            prefixes[k + 1] = text + (tail[1:] if skip_space else tail)
+        yield prefixes[-1]
+
+        changed = len(choices) - 1
+        while True:
+            value = next(iters[changed], None)
+            if value is not None:
+                values[changed] = value
+                break
+            iters[changed] = _iter_choice(choices[changed])
+            values[changed] = next(iters[changed])
+            changed -= 1
+            if changed < 0:
+                return
+
+
+def _drop_space(segments: Segments) -> Segments:
+    """Remove the trailing space of *segments*, which must end with one."""
+    last = segments[-1]
+    return segments[:-1] if len(last) == 1 else (*segments[:-1], last[:-1])
+
+
+def _place_segments(
+    prefix: Segments, option: Segments, choice: _Choice
+) -> tuple[Segments, bool]:
+    """:func:`_place` for segment tuples."""
+    if not option:
+        if prefix and prefix[-1].endswith(" "):
+            prefix = _drop_space(prefix)
+        if prefix and choice.has_tail:
+            prefix += (" ",)
+        return prefix, choice.next_space
+    if prefix and prefix[-1][-1].isalnum():
+        prefix += (" ",)
+    prefix += option
+    if choice.next_alnum:
+        prefix += (" ",)
+    return prefix, False
+
+
+def _iter_choice_segments(choice: _Choice, start: int = 0) -> Iterator[Segments]:
+    """:func:`_iter_choice` for segment tuples."""
+    first = bisect_right(choice.offsets, start) - 1
+    yield from _iter_segments(choice.options[first], start - choice.offsets[first])
+    for option in choice.options[first + 1 :]:
+        yield from _iter_segments(option)
+
+
+def _iter_segments(template: _Template, start: int = 0) -> Iterator[Segments]:
+    """
+    Yield the variants of *template* as segment tuples, from *start* onwards.
+
+    The same odometer as :func:`_iter_template`; prefixes are tuples of
+    segments, so re-rendering after a group copies references instead of
+    characters.
+    """
+    positions = [i for i, part in enumerate(template) if not isinstance(part, str)]
+    if not positions:
+        if start == 0:
+            yield tuple(part for part in template if part)  # type: ignore[misc]
+        return
+
+    choices: list[_Choice] = [template[i] for i in positions]  # type: ignore[misc]
+    # Literal text following each group, and the same without its first space
+    tails: list[Segments] = []
+    skipped: list[Segments] = []
+    for i in positions:
+        following = template[i + 1] if i + 1 < len(template) else ""
+        tail = following if isinstance(following, str) else ""
+        tails.append((tail,) if tail else ())
+        skipped.append((tail[1:],) if len(tail) > 1 else ())
+    digits = _decode_index(choices, start)
+    if digits is None:
+        return
+    iters = [
+        _iter_choice_segments(choice, digit)
+        for choice, digit in zip(choices, digits, strict=True)
+    ]
+    values = [next(it) for it in iters]
+    prefixes: list[Segments] = [
+        tuple(part for part in template[: positions[0]] if part)  # type: ignore[misc]
+    ]
+    prefixes.extend(() for _ in choices)
+
+    changed = 0
+    while True:
+        for k in range(changed, len(choices)):
+            segments, skip_space = _place_segments(prefixes[k], values[k], choices[k])
+            prefixes[k + 1] = segments + (skipped[k] if skip_space else tails[k])
+        yield prefixes[-1]
+
+        changed = len(choices) - 1
+        while True:
+            value = next(iters[changed], None)
+            if value is not None:
+                values[changed] = value
+                break
+            iters[changed] = _iter_choice_segments(choices[changed])
+            values[changed] = next(iters[changed])
+            changed -= 1
+            if changed < 0:
+                return
+
+
+def _render_variant(template: _Template, index: int) -> str:
+    """
+    Render the variant of *template* at *index* without expanding the others.
+
+    The index is decoded as a mixed-radix number whose digits select one
+    variant per group (last group least significant); a digit is then mapped
+    to an option through the group's offsets and decoded again for nested
+    groups.
+
+    Args:
+        template: Parsed template.
+        index: Variant index, ``0 <= index < template_size(template)``.
+
+    Returns:
+        The expanded, unescaped variant.
+    """
+    choices = [part for part in template if not isinstance(part, str)]
+    digits = _decode_index(choices, index) or []
+    digits.reverse()
+
+    text = ""
+    skip_space = False
+    for part in template:
+        if isinstance(part, str):
+            text += part[1:] if skip_space else part
+            skip_space = False
+            continue
+        digit = digits.pop()
+        k = bisect_right(part.offsets, digit) - 1
+        option = _render_variant(part.options[k], digit - part.offsets[k])
+        text, skip_space = _place(text, option, part)
+    return text
+
+
+def _is_injective(template: _Template) -> bool:
+    """
+    Return True if no two variants of *template* can render the same text.
+
+    The check is structural and conservative.  Every group must offer
+    distinct, non-empty plain-text options; with several groups, the options
+    must also be free of whitespace and every two groups must be separated by
+    literal text that contains some.  Each option then starts at a position
+    fixed by the options before it and ends before the next whitespace, so the
+    text determines the choices.  Nested groups, empty options (whose spacing
+    collapses) and adjacent groups are never proven distinct.
+    """
+    groups: list[list[str]] = []
+    spaced = True  # literal whitespace since the previous group
+    for part in template:
+        if isinstance(part, str):
+            spaced = spaced or _WHITESPACE.search(part) is not None
+            continue
+        if not spaced:
+            return False
+        spaced = False
+        options = [
+            option[0] if len(option) == 1 and isinstance(option[0], str) else ""
+            for option in part.options
+        ]
+        if not all(options) or len(set(options)) != len(options):
+            return False
+        groups.append(options)
+    return len(groups) < 2 or not any(
+        _WHITESPACE.search(option) for options in groups for option in options
+    )
+
+
+def first_occurrences(variants: Iterable[str]) -> Iterator[str]:
+    """
+    Yield each distinct text of *variants* once, where it first occurs.
+
+    Args:
+        variants: Expanded texts, e.g. a range of a template's variants.
+
+    Yields:
+        The texts not seen before, in their original order; memory grows
+        with the number of distinct texts.
+    """
+    seen: set[str] = set()
+    for variant in variants:
+        if variant not in seen:
+            seen.add(variant)
+            yield variant
+
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    """
+    A prompt compiled into an immutable tree of literals and choice groups.
+
+    Braces, escapes and option lists are tokenised once; expanding, counting
+    and indexing the variants afterwards never touches the raw string again.
+    Use :func:`compile_prompt` to obtain (cached) instances.
+    """
+
+    source: str
+    parts: _Template
+    size: int
+
+    def __iter__(self) -> Iterator[str]:
+        """Lazily yield every variant in canonical order."""
+        return _iter_template(self.parts)
+
+    def iter_range(self, start: int = 0, stop: int | None = None) -> Iterator[str]:
+        """
+        Lazily yield the variants with indices in ``[start, stop)``.
+
+        Variants before *start* are skipped by decoding the index, not by
+        generating them, so disjoint ranges can be expanded independently.
+
+        Args:
+            start: Index of the first variant; negative values count from the end.
+            stop: Index after the last variant (default: the end).
+
+        Returns:
+            Iterator over expanded, unescaped texts.
+        """
+        start, stop, _ = slice(start, stop).indices(self.size)
+        variants = _iter_template(self.parts, start)
+        if stop >= self.size:
+            return variants
+        return islice(variants, max(stop - start, 0))
+
+    def iter_segments(
+        self, start: int = 0, stop: int | None = None
+    ) -> Iterator[Segments]:
+        """
+        Lazily yield the variants in ``[start, stop)`` as segment tuples.
+
+        A variant's segments are the template's own literal and option
+        strings, plus the single spaces the spacing rules insert; joining
+        them gives the variant :meth:`iter_range` yields.
+
+        Args:
+            start: Index of the first variant; negative values count from the end.
+            stop: Index after the last variant (default: the end).
+
+        Returns:
+            Iterator over tuples of non-empty strings.
+        """
+        start, stop, _ = slice(start, stop).indices(self.size)
+        variants = _iter_segments(self.parts, start)
+        if stop >= self.size:
+            return variants
+        return islice(variants, max(stop - start, 0))
+
+    def iter_unique(self, start: int = 0, stop: int | None = None) -> Iterator[str]:
+        """
+        Lazily yield the distinct variants in ``[start, stop)``, each once.
+
+        Options like ``{a, a b}{, b}`` or empty options can render the same
+        text from different choices.  A variant is yielded where it first
+        occurs in canonical order.  Templates whose structure rules out
+        duplicates are streamed as is; the others keep the texts already
+        yielded, so memory grows with the number of distinct variants.
+
+        Args:
+            start: Index of the first variant; negative values count from the end.
+            stop: Index after the last variant (default: the end).
+
+        Returns:
+            Iterator over expanded, unescaped, pairwise different texts.
+        """
+        variants = self.iter_range(start, stop)
+        if self.is_injective():
+            return variants
+        return first_occurrences(variants)
+
+    def expand(self) -> list[str]:
+        """
+        Expand the template into all of its variants.
+
+        Returns:
+            List of expanded, unescaped texts.
+        """
+        return list(_iter_template(self.parts))
+
+    def count(self) -> int:
+        """
+        Count the variants without expanding them.
+
+        Returns:
+            Number of variants the template expands to (at least 1).
+        """
+        return self.size
+
+    def output_bytes(self, start: int = 0, stop: int | None = None) -> int:
+        """
+        Bound the size of the expansion without expanding it.
+
+        Args:
+            start: Index of the first variant; negative values count from the end.
+            stop: Index after the last variant (default: the end).
+
+        Returns:
+            Upper bound of the total UTF-8 bytes of the variants with indices
+            in ``[start, stop)``.
+        """
+        start, stop, _ = slice(start, stop).indices(self.size)
+        if start >= stop:
+            return 0
+        if start == 0 and stop == self.size:
+            return _template_bytes(self.parts)
+        return _prefix_bytes(self.parts, stop) - _prefix_bytes(self.parts, start)
+
+    def is_injective(self) -> bool:
+        """
+        Tell whether the structure of the template rules out duplicates.
+
+        Returns:
+            True if no two variants can render the same text; False if they
+            might (see :meth:`iter_unique`).
+        """
+        return _is_injective(self.parts)
+
+    def variant(self, index: int) -> str:
+        """
+        Render a single variant by its position in canonical order.
+
+        Args:
+            index: Variant index; negative values count from the end.
+
+        Returns:
+            The expanded, unescaped variant.
+
+        Raises:
+            IndexError: If the index is out of range.
+        """
+        if index < 0:
+            index += self.size
+        if not 0 <= index < self.size:
+            msg = f"Variant index out of range: {index}"
+            raise IndexError(msg)
+        return _render_variant(self.parts, index)
+
+
+@lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def compile_prompt(text: str) -> PromptTemplate:
+    """
+    Compile *text* into a :class:`PromptTemplate`.
+
+    Results are memoised in an LRU cache keyed on the template string, so
+    expanding a hot template repeatedly skips parsing entirely.  Use
+    ``compile_prompt.cache_info()`` and ``compile_prompt.cache_clear()`` to
+    inspect or reset the cache.
+
+    Args:
+        text: Text containing permutations in {} brackets.
+
+    Returns:
+        The compiled template.
+    """
+    parts = _parse_template(text)
+    return PromptTemplate(text, parts, template_size(parts))
+
+
+@instrument("expand", iterator=True)
+def iter_expand(
+    text: str, start: int = 0, stop: int | None = None, *, unique: bool = False
+) -> Iterator[str]:
+    """
+    Lazily expand all permutations in *text* and unescape special characters.
+
+    The text is compiled once into a template tree and variants are generated
+    one at a time, in the same order as :func:`expand_permutations` returns
+    them.  *start* and *stop* restrict the output to an index range without
+    generating the variants outside it.
+
+    Args:
+        text: Text to expand (may contain \\{, \\}, \\, escape sequences).
+        start: Index of the first variant to yield.
+        stop: Index after the last variant to yield (default: the end).
+        unique: Yield each distinct text once (see
+                :meth:`PromptTemplate.iter_unique`).
+
+    Returns:
+        Iterator over expanded, unescaped texts.
+    """
+    template = compile_prompt(text)
+    if unique:
+        return template.iter_unique(start, stop)
+    return template.iter_range(start, stop)
+
+
+@instrument("expand", iterator=True)
+def expand_shard(text: str, shard_index: int, shard_count: int) -> Iterator[str]:
+    """
+    Lazily expand one shard of the permutations in *text*.
+
+    The canonical variant order is cut into *shard_count* contiguous blocks of
+    (almost) equal size; only the variants of block *shard_index* are
+    generated.  Running every shard and concatenating the results reproduces
+    :func:`expand_permutations` exactly.
+
+    Args:
+        text: Text containing permutations in {} brackets.
+        shard_index: Zero-based index of the shard to expand.
+        shard_count: Total number of shards.
+
+    Returns:
+        Iterator over the expanded, unescaped texts of the shard.
+
+    Raises:
+        ValueError: If the shard index or count is invalid.
+    """
+    template = compile_prompt(text)
+    return template.iter_range(*shard_bounds(template.size, shard_index, shard_count))
+
+
+def shard_bounds(size: int, shard_index: int, shard_count: int) -> tuple[int, int]:
+    """
+    Return the ``(start, stop)`` variant range of a shard, as cut by
+    :func:`expand_shard`.
+
+    Args:
+        size: Number of variants, e.g. from :func:`count_variants`.
+        shard_index: Zero-based index of the shard.
+        shard_count: Total number of shards.
+
+    Returns:
+        Half-open range of variant indices in the shard.
+
+    Raises:
+        ValueError: If the shard index or count is invalid.
+    """
+    if shard_count < 1:
+        msg = f"Shard count must be positive: {shard_count}"
+        raise ValueError(msg)
+    if not 0 <= shard_index < shard_count:
+        msg = f"Shard index out of range: {shard_index}/{shard_count}"
+        raise ValueError(msg)
+    start = size * shard_index // shard_count
+    stop = size * (shard_index + 1) // shard_count
+    return start, stop
+
+
+def parse_shard(spec: str | None) -> tuple[int, int] | None:
+    """
+    Parse an ``"i/n"`` shard spec into the ``(shard_index, shard_count)`` of
+    :func:`shard_bounds`.
+
+    Args:
+        spec: Shard spec such as ``"0/4"``, or None for no sharding.
+
+    Returns:
+        The shard index and count, or None if *spec* is None.
+
+    Raises:
+        ValueError: If *spec* is not of the form ``i/n``.
+    """
+    if spec is None:
+        return None
+    try:
+        index, count = (int(part) for part in str(spec).split("/"))
+    except ValueError as error:
+        msg = f"Invalid shard (expected i/n, e.g. 0/4): {spec}"
+        raise ValueError(msg) from error
+    return index, count
+
+
+def nesting_depth(text: str) -> int:
+    """
+    Return how deeply the ``{...}`` groups of *text* nest, without parsing it.
+
+    Escaped braces are skipped and an unmatched ``{`` still counts, so the
+    result never understates the depth :func:`compile_prompt` recurses to.
+
+    Args:
+        text: Text containing permutations in {} brackets.
+
+    Returns:
+        Maximum number of enclosing groups (0 without groups).
+    """
+    depth = deepest = 0
+    for match in _BRACE.finditer(text):
+        pos = match.start()
+        if pos and text[pos - 1] == "\\":
+            continue
+        if match.group() == "{":
+            depth += 1
+            deepest = max(deepest, depth)
+        elif depth:
+            depth -= 1
+    return deepest
+
+
+def count_variants(text: str) -> int:
+    """
+    Count the variants *text* expands to, without expanding it.
+
+    Sequential groups multiply and the options of a group (including the
+    variants of nested groups) add up.
+
+    Args:
+        text: Text containing permutations in {} brackets.
+
+    Returns:
+        Number of variants (at least 1).
+    """
+    return compile_prompt(text).count()
+
+
+def variant_at(text: str, index: int) -> str:
+    """
+    Materialise the variant of *text* at *index* in canonical order.
+
+    ``variant_at(text, i) == expand_permutations(text)[i]``, but only the
+    requested variant is rendered.
+
+    Args:
+        text: Text containing permutations in {} brackets.
+        index: Variant index; negative values count from the end.
+
+    Returns:
+        The expanded, unescaped variant.
+
+    Raises:
+        IndexError: If the index is out of range.
+    """
+    return compile_prompt(text).variant(index)
+
+
+@instrument("expand")
+def expand_permutations(text: str, *, unique: bool = False) -> list[str]:
     """
     Expand all permutations in a text string and unescape special characters.
 
     Args:
         text: Text to expand (may contain \\{, \\}, \\, escape sequences).
+        unique: Drop variants whose text an earlier variant already has.
 
     Returns:
         List of expanded, unescaped texts.
     """
-    expanded = expand_text(text)
-    return [_unescape(t) for t in expanded]
+    template = compile_prompt(text)
+    if unique:
+        return list(template.iter_unique())
+    return template.expand()
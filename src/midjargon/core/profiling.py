@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+# this_file: src/midjargon/core/profiling.py
+"""
+Per-stage call counts and wall time of the midjargon pipeline.
+
+The functions that implement a stage (see :data:`STAGES`) are marked with
+:func:`instrument`.  While no hook is registered they only check that there
+is none; once one is (:func:`add_hook`, or entering :func:`profile`) every
+call is timed, however the function was looked up, and each finished call
+is reported to every hook as ``hook(stage, seconds, calls)``::
+
+    with profile() as profiler:
+        to_midjourney_prompts("a {red, blue} bird --ar 16:9")
+    print(profiler.report())
+
+Times are inclusive, like cProfile's cumulative time: ``parse`` contains the
+``tokenize`` and ``parameters`` time spent inside it.  A stage entered again
+while it runs is timed once.  Work done in worker processes (``batch
+--workers``, the HTTP service pool) is not recorded.
+"""
+
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+from functools import wraps
+from time import perf_counter
+from typing import TYPE_CHECKING, Any, NamedTuple, TypeVar
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+
+    StageHook = Callable[[str, float, int], None]
+
+_F = TypeVar("_F", bound="Callable[..., Any]")
+
+# Pipeline stages, in report order
+STAGES = ("expand", "tokenize", "parameters", "parse", "engine", "serialise")
+
+_hooks: tuple[StageHook, ...] = ()
+_hooks_lock = threading.Lock()
+_local = threading.local()  # .active: stages running in this thread
+
+
+# ---------------------------------------------------------------------------
+# Hooks
+# ---------------------------------------------------------------------------
+
+
+def _emit(stage: str, seconds: float, calls: int) -> None:
+    for hook in _hooks:
+        hook(stage, seconds, calls)
+
+
+def _active() -> set[str]:
+    try:
+        active: set[str] = _local.active
+    except AttributeError:
+        active = _local.active = set()
+    return active
+
+
+def add_hook(hook: StageHook) -> None:
+    """Report every stage call to *hook* as ``hook(stage, seconds, calls)``.
+
+    *calls* is 1 for a call and 0 for the time spent producing a further
+    item of a stage that returns an iterator.
+    """
+    global _hooks
+    with _hooks_lock:
+        _hooks = (*_hooks, hook)
+
+
+def remove_hook(hook: StageHook) -> None:
+    """Stop reporting to *hook*; a hook that is not registered is ignored."""
+    global _hooks
+    with _hooks_lock:
+        if hook not in _hooks:
+            return
+        hooks = list(_hooks)
+        hooks.remove(hook)
+        _hooks = tuple(hooks)
+
+
+def profiling_enabled() -> bool:
+    """Return True while at least one hook is registered."""
+    return bool(_hooks)
+
+
+# ---------------------------------------------------------------------------
+# Instrumentation
+# ---------------------------------------------------------------------------
+
+
+def _timed(func: Callable[..., Any], stage: str) -> Callable[..., Any]:
+    @wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        active = _active()
+        if stage in active:
+            return func(*args, **kwargs)
+        active.add(stage)
+        start = perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = perf_counter() - start
+            active.discard(stage)
+            _emit(stage, elapsed, 1)
+
+    return wrapper
+
+
+class _TimedIterator:
+    """Iterator that reports the time spent in each ``next()`` to the hooks."""
+
+    __slots__ = ("_iterator", "_stage")
+
+    def __init__(self, iterator: Iterator[Any], stage: str) -> None:
+        self._iterator = iterator
+        self._stage = stage
+
+    def __iter__(self) -> _TimedIterator:
+        return self
+
+    def __next__(self) -> Any:
+        active = _active()
+        if self._stage in active:
+            return next(self._iterator)
+        active.add(self._stage)
+        start = perf_counter()
+        try:
+            return next(self._iterator)
+        finally:
+            elapsed = perf_counter() - start
+            active.discard(self._stage)
+            _emit(self._stage, elapsed, 0)
+
+
+def _timed_iterator(func: Callable[..., Any], stage: str) -> Callable[..., Any]:
+    timed = _timed(func, stage)
+
+    @wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        return _TimedIterator(timed(*args, **kwargs), stage)
+
+    return wrapper
+
+
+def instrument(stage: str, *, iterator: bool = False) -> Callable[[_F], _F]:
+    """Mark the decorated function as implementing pipeline *stage*.
+
+    With *iterator* the function returns an iterator, and the time spent
+    producing each item is added to the stage as well.  While no hook is
+    registered the function is called directly.
+    """
+
+    def decorate(func: _F) -> _F:
+        timed = (_timed_iterator if iterator else _timed)(func, stage)
+
+        @wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if _hooks:
+                return timed(*args, **kwargs)
+            return func(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
+
+
+# ---------------------------------------------------------------------------
+# Collecting
+# ---------------------------------------------------------------------------
+
+
+class StageStats(NamedTuple):
+    """Calls of one stage and the wall time spent in them."""
+
+    calls: int
+    seconds: float
+
+
+def _stage_order(stage: str) -> tuple[int, str]:
+    return (STAGES.index(stage) if stage in STAGES else len(STAGES), stage)
+
+
+class Profiler:
+    """Hook that sums the calls and time of each stage; thread-safe."""
+
+    def __init__(self) -> None:
+        self._stats: dict[str, list[float]] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, stage: str, seconds: float, calls: int = 1) -> None:
+        with self._lock:
+            entry = self._stats.get(stage)
+            if entry is None:
+                self._stats[stage] = [calls, seconds]
+            else:
+                entry[0] += calls
+                entry[1] += seconds
+
+    def stats(self) -> dict[str, StageStats]:
+        """Return ``{stage: StageStats}`` in pipeline order."""
+        with self._lock:
+            items = sorted(self._stats.items(), key=lambda i: _stage_order(i[0]))
+            return {
+                stage: StageStats(int(calls), seconds)
+                for stage, (calls, seconds) in items
+            }
+
+    def as_dict(self) -> dict[str, dict[str, float]]:
+        """Return ``{stage: {"calls": …, "seconds": …}}``, JSON-serialisable."""
+        return {stage: s._asdict() for stage, s in self.stats().items()}
+
+    def to_prometheus(self, prefix: str = "midjargon") -> str:
+        """Return the counters in the Prometheus text exposition format."""
+        stats = self.stats()
+        lines = []
+        for metric, help_text, field in (
+            ("stage_calls_total", "Calls of each pipeline stage.", "calls"),
+            (
+                "stage_seconds_total",
+                "Wall time spent in each pipeline stage.",
+                "seconds",
+            ),
+        ):
+            name = f"{prefix}_{metric}"
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+            lines += [
+                f'{name}{{stage="{stage}"}} {getattr(s, field)!r}'
+                for stage, s in stats.items()
+            ]
+        return "\n".join(lines) + "\n"
+
+    def report(self, wall: float | None = None) -> str:
+        """Return a per-stage table; with *wall* seconds, also each stage's share."""
+        lines = [
+            f"{'stage':<12}{'calls':>9}{'total ms':>12}{'mean µs':>11}"
+            + (f"{'% wall':>9}" if wall else "")
+        ]
+        for stage, s in self.stats().items():
+            mean = s.seconds / s.calls * 1e6 if s.calls else 0.0
+            line = f"{stage:<12}{s.calls:>9}{s.seconds * 1e3:>12.3f}{mean:>11.2f}"
+            if wall:
+                line += f"{s.seconds / wall * 100:>9.1f}"
+            lines.append(line)
+        if wall is not None:
+            lines.append(f"{'wall':<12}{'':>9}{wall * 1e3:>12.3f}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        """Forget everything recorded so far."""
+        with self._lock:
+            self._stats.clear()
+
+
+@contextmanager
+def profile() -> Iterator[Profiler]:
+    """Record the stages run inside the ``with`` block in a new :class:`Profiler`."""
+    profiler = Profiler()
+    add_hook(profiler)
+    try:
+        yield profiler
+    finally:
+        remove_hook(profiler)
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# this_file: src/midjargon/core/records.py
+"""
+Compact, immutable representation of parsed Midjourney prompts.
+
+A ``MidjourneyPrompt`` holds two Pydantic models with ~30 fields, fresh
+default lists and an ``extra_params`` dict per instance.  ``PromptRecord``
+keeps the same information in a few tuples: only parameters that differ from
+their defaults are stored, as ``(name, value)`` pairs with the (interned)
+field names, lists frozen to tuples and short string values interned.  Records
+convert losslessly to and from ``MidjourneyPrompt`` on demand.
+"""
+
+from __future__ import annotations
+
+import sys
+from typing import Any, NamedTuple
+
+from midjargon.core.models import ImageReference, MidjourneyParameters, MidjourneyPrompt
+from midjargon.core.profiling import instrument
+
+# String parameter values up to this length are interned (aspect ratios,
+# version names, seeds, reference codes, …)
+_INTERN_MAX_LEN = 64
+
+# Shared ``(name, value)`` parameter pairs, so records with the same setting
+# point at one tuple; bounded so unique values (seeds, …) cannot grow it forever
+_PAIRS: dict[tuple[str, type, Any], tuple[str, Any]] = {}
+_PAIRS_MAX = 65536
+
+_PARAM_FIELDS = MidjourneyParameters.model_fields
+
+# Field name → default value (built once; never handed out)
+_DEFAULTS: dict[str, Any] = {
+    name: info.get_default(call_default_factory=True)
+    for name, info in _PARAM_FIELDS.items()
+}
+
+# Parameter fields whose values are dicts (stored as tuples of pairs)
+_DICT_FIELDS = frozenset(
+    name for name, default in _DEFAULTS.items() if isinstance(default, dict)
+)
+
+# Parameter fields with list or dict defaults, which need a fresh copy
+_MUTABLE_FIELDS = tuple(
+    (name, type(default))
+    for name, default in _DEFAULTS.items()
+    if isinstance(default, list | dict)
+)
+
+
+def _is_default(name: str, value: Any) -> bool:
+    default = _DEFAULTS[name]
+    return type(value) is type(default) and value == default
+
+
+def _freeze(value: Any) -> Any:
+    if type(value) is str:
+        return sys.intern(value) if len(value) <= _INTERN_MAX_LEN else value
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, dict):
+        return tuple((key, _freeze(item)) for key, item in value.items())
+    return value
+
+
+def _pair(name: str, value: Any) -> tuple[str, Any]:
+    pair = (name, _freeze(value))
+    frozen = pair[1]
+    # Equal values of different types (1, 1.0, True) must not share a pair
+    if isinstance(frozen, tuple):
+        if not all(type(item) is str for item in frozen):
+            return pair
+        key = (name, tuple, frozen)
+    else:
+        key = (name, type(frozen), frozen)
+    shared = _PAIRS.get(key)
+    if shared is not None:
+        return shared
+    if len(_PAIRS) < _PAIRS_MAX:
+        _PAIRS[key] = pair
+    return pair
+
+
+def _thaw(value: Any) -> Any:
+    if isinstance(value, tuple):
+        return [_thaw(item) for item in value]
+    return value
+
+
+def _thaw_param(name: str, value: Any) -> Any:
+    if name in _DICT_FIELDS:
+        return {key: _thaw(item) for key, item in value}
+    return _thaw(value)
+
+
+class PromptRecord(NamedTuple):
+    """A parsed Midjourney prompt, stored compactly.
+
+    Lists inside the record are tuples; ``extra_params`` is a tuple of
+    ``(key, value)`` pairs.  Use :meth:`get` to read a parameter with its
+    default, :meth:`to_prompt` for the full model and :meth:`to_dict` for the
+    same dict as ``MidjourneyPrompt.model_dump()``.
+    """
+
+    text: str
+    images: tuple[str, ...] = ()  # image prompt URLs
+    params: tuple[tuple[str, Any], ...] = ()  # non-default parameters
+    weight: float = 1.0
+    image_weights: tuple[float, ...] = ()  # per image; empty means all 1.0
+
+    @classmethod
+    @instrument("serialise")
+    def from_prompt(cls, prompt: MidjourneyPrompt) -> PromptRecord:
+        """Build a record from a :class:`MidjourneyPrompt`."""
+        images = tuple(img.url for img in prompt.image_prompts)
+        weights = tuple(img.weight for img in prompt.image_prompts)
+        if all(w == 1.0 for w in weights):
+            weights = ()
+        params = tuple(
+            _pair(name, value)
+            for name, value in prompt.parameters
+            if not _is_default(name, value)
+        )
+        return cls(prompt.text, images, params, prompt.weight, weights)
+
+    def get(self, name: str, default: Any = None) -> Any:
+        """Return parameter *name* (frozen), its model default, or *default*."""
+        for key, value in self.params:
+            if key == name:
+                return value
+        return _freeze(_DEFAULTS[name]) if name in _DEFAULTS else default
+
+    def _image_weights(self) -> tuple[float, ...]:
+        return self.image_weights or (1.0,) * len(self.images)
+
+    def to_prompt(self) -> MidjourneyPrompt:
+        """Rebuild the equivalent :class:`MidjourneyPrompt`."""
+        params = {name: _thaw_param(name, value) for name, value in self.params}
+        return MidjourneyPrompt(
+            text=self.text,
+            image_prompts=[
+                ImageReference(url=url, weight=weight)
+                for url, weight in zip(self.images, self._image_weights(), strict=True)
+            ],
+            parameters=MidjourneyParameters(**params),
+            weight=self.weight,
+        )
+
+    @instrument("serialise")
+    def to_dict(self) -> dict[str, Any]:
+        """Return the same dict as ``self.to_prompt().model_dump()``."""
+        data: dict[str, Any] = {
+            "text": self.text,
+            "image_prompts": [
+                {"url": url, "weight": weight}
+                for url, weight in zip(self.images, self._image_weights(), strict=True)
+            ],
+            "weight": self.weight,
+        }
+        data.update(_DEFAULTS)
+        for name, factory in _MUTABLE_FIELDS:
+            data[name] = factory()
+        for name, value in self.params:
+            data[name] = _thaw_param(name, value)
+        return data
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# this_file: src/midjargon/core/sampling.py
+"""
+Draw variants from a prompt's permutation space without expanding it.
+
+Variants are picked by index in the compiled template and rendered one by one,
+so sampling 200 variants of a prompt with ten million costs 200 renders.
+``uniform`` sampling draws indices without replacement; ``stratified``
+sampling builds the indices group by group so that every option of every
+group (nested ones included) appears in at least one variant.
+"""
+
+from __future__ import annotations
+
+import random
+import sys
+from collections import Counter
+from typing import TYPE_CHECKING, NamedTuple
+
+from midjargon.core.permutations import compile_prompt
+
+if TYPE_CHECKING:
+    from midjargon.core.permutations import _Choice, _Template
+
+SAMPLE_STRATEGIES = ("uniform", "stratified")
+
+
+class SampleSpec(NamedTuple):
+    """Arguments of :func:`sample_variants` besides the text."""
+
+    k: int
+    seed: int | None = None
+    strategy: str = "uniform"  # one of SAMPLE_STRATEGIES
+
+
+def _choices(template: _Template) -> list[_Choice]:
+    return [part for part in template if not isinstance(part, str)]
+
+
+def _need(template: _Template) -> int:
+    """Return the fewest variants of *template* that use every option."""
+    return max((_need_choice(choice) for choice in _choices(template)), default=1)
+
+
+def _need_choice(choice: _Choice) -> int:
+    return sum(_need(option) for option in choice.options)
+
+
+def _option_sizes(choice: _Choice) -> list[int]:
+    ends = (*choice.offsets[1:], choice.size)
+    return [end - start for start, end in zip(choice.offsets, ends, strict=True)]
+
+
+def _allocate(choice: _Choice, k: int, rng: random.Random) -> list[int]:
+    """Split *k* variants over the options of *choice*.
+
+    Each option gets the minimum it needs to show all of its own options; the
+    rest is spread at random, weighted by the options' variant counts.
+    """
+    counts = [_need(option) for option in choice.options]
+    extra = k - sum(counts)
+    if extra > 0:
+        picks = rng.choices(range(len(counts)), _option_sizes(choice), k=extra)
+        for option, n in Counter(picks).items():
+            counts[option] += n
+    return counts
+
+
+def _cover(template: _Template, k: int, rng: random.Random) -> list[int]:
+    """Return *k* variant indices of *template* that use every option.
+
+    Each group gets its own column of *k* digits covering all of its options,
+    shuffled so the groups combine at random; the digits of a row form one
+    index.  Rows may repeat when a template has fewer than *k* variants.
+    """
+    choices = _choices(template)
+    if not choices:
+        return [0] * k
+    columns: list[list[int]] = []
+    for choice in choices:
+        digits: list[int] = []
+        counts = _allocate(choice, k, rng)
+        for option, offset, count in zip(
+            choice.options, choice.offsets, counts, strict=True
+        ):
+            digits.extend(offset + i for i in _cover(option, count, rng))
+        rng.shuffle(digits)
+        columns.append(digits)
+    rows = []
+    for row in zip(*columns, strict=True):
+        index = 0
+        for choice, digit in zip(choices, row, strict=True):
+            index = index * choice.size + digit
+        rows.append(index)
+    return rows
+
+
+def _uniform(size: int, k: int, rng: random.Random) -> list[int]:
+    if size <= sys.maxsize:
+        return rng.sample(range(size), k)
+    chosen: set[int] = set()  # range() is too large for len(); k is far smaller
+    while len(chosen) < k:
+        chosen.add(rng.randrange(size))
+    return list(chosen)
+
+
+def _stratified(
+    template: _Template, size: int, k: int, rng: random.Random
+) -> list[int]:
+    need = _need(template)
+    if k < need:
+        msg = f"Stratified sampling needs at least {need} variants, got {k}"
+        raise ValueError(msg)
+    chosen = set(_cover(template, k, rng))
+    # Rows that collided are replaced by uniformly drawn new indices
+    while len(chosen) < k:
+        chosen.add(rng.randrange(size))
+    return sorted(chosen)
+
+
+def sample_indices(
+    text: str,
+    k: int,
+    *,
+    seed: int | None = None,
+    strategy: str = "uniform",
+) -> list[int]:
+    """
+    Pick *k* distinct variant indices of *text*, in ascending order.
+
+    See :func:`sample_variants`; ``variant_at(text, i)`` renders each index.
+    """
+    if strategy not in SAMPLE_STRATEGIES:
+        msg = (
+            f"Unknown sampling strategy: {strategy} "
+            f"(expected {', '.join(SAMPLE_STRATEGIES)})"
+        )
+        raise ValueError(msg)
+    if k < 0:
+        msg = f"Sample size must not be negative: {k}"
+        raise ValueError(msg)
+    template = compile_prompt(text)
+    if k >= template.size:
+        return list(range(template.size))
+    rng = random.Random(seed)
+    if strategy == "stratified":
+        return _stratified(template.parts, template.size, k, rng)
+    return sorted(_uniform(template.size, k, rng))
+
+
+def sample_variants(
+    text: str,
+    k: int,
+    *,
+    seed: int | None = None,
+    strategy: str = "uniform",
+) -> list[str]:
+    """
+    Draw *k* distinct variants of *text* without expanding the others.
+
+    Args:
+        text: Text containing permutations in {} brackets.
+        k: Number of variants; all of them if *text* has no more than *k*.
+        seed: Seed of the random choice; the same seed and text give the
+              same sample.
+        strategy: ``uniform`` (every set of *k* variants equally likely) or
+                  ``stratified`` (every option of every group, nested ones
+                  included, appears in at least one variant).
+
+    Returns:
+        The sampled, expanded variants in canonical order.
+
+    Raises:
+        ValueError: If the strategy is unknown, *k* is negative, or *k* is
+                    too small for a stratified sample of *text*.
+    """
+    template = compile_prompt(text)
+    indices = sample_indices(text, k, seed=seed, strategy=strategy)
+    return [template.variant(i) for i in indices]
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# this_file: src/midjargon/core/segments.py
+"""
+Expand prompts into tuples of shared text segments instead of strings.
+
+Every variant of ``<2 KB of text> {500 options}`` repeats the same 2 KB, so
+the 500 expanded strings take a megabyte although the template holds 3 KB of
+distinct text.  Here a variant is a tuple of references to the template's
+own literal and option strings (plus the single spaces the spacing rules
+insert); :class:`SegmentedVariants` joins a variant only when it is indexed
+or iterated, and :meth:`SegmentedVariants.write` sends the segments straight
+to a stream without building the variants at all.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from typing import TYPE_CHECKING, overload
+
+from midjargon.core.permutations import compile_prompt
+from midjargon.core.profiling import instrument
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from typing import TextIO
+
+    from midjargon.core.permutations import Segments
+
+class SegmentedVariants(Sequence[str]):
+    """
+    Expanded variants stored as segment tuples that share the template text.
+
+    Behaves as a read-only sequence of strings: a variant is joined each time
+    it is accessed.  ``segments`` holds the tuples themselves.
+    """
+
+    __slots__ = ("segments",)
+
+    def __init__(self, segments: list[Segments]) -> None:
+        self.segments = segments
+
+    def __len__(self) -> int:
+        return len(self.segments)
+
+    @overload
+    def __getitem__(self, index: int) -> str: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[str]: ...
+
+    def __getitem__(self, index: int | slice) -> str | list[str]:
+        if isinstance(index, slice):
+            return ["".join(segments) for segments in self.segments[index]]
+        return "".join(self.segments[index])
+
+    def __iter__(self) -> Iterator[str]:
+        return ("".join(segments) for segments in self.segments)
+
+    def __repr__(self) -> str:
+        return f"SegmentedVariants({len(self.segments)} variants)"
+
+    def text_length(self) -> int:
+        """Return the total number of characters of all variants."""
+        return sum(len(segment) for segments in self.segments for segment in segments)
+
+    def write(self, stream: TextIO, sep: str = "\n") -> None:
+        """Write every variant to *stream*, each followed by *sep*.
+
+        The segments are written as they are; no variant string is built.
+        """
+        for segments in self.segments:
+            stream.writelines(segments)
+            stream.write(sep)
+
+
+@instrument("expand", iterator=True)
+def iter_segments(
+    text: str, start: int = 0, stop: int | None = None
+) -> Iterator[Segments]:
+    """
+    Lazily expand *text* into segment tuples, in canonical order.
+
+    ``"".join(segments)`` gives the variant :func:`iter_expand` yields at the
+    same position.
+
+    Args:
+        text: Text containing permutations in {} brackets.
+        start: Index of the first variant; negative values count from the end.
+        stop: Index after the last variant (default: the end).
+
+    Returns:
+        Iterator over segment tuples.
+    """
+    return compile_prompt(text).iter_segments(start, stop)
+
+
+@instrument("expand")
+def expand_segments(
+    text: str, start: int = 0, stop: int | None = None
+) -> SegmentedVariants:
+    """
+    Expand *text* into variants that share the template's text segments.
+
+    Args:
+        text: Text containing permutations in {} brackets.
+        start: Index of the first variant; negative values count from the end.
+        stop: Index after the last variant (default: the end).
+
+    Returns:
+        The variants, as a sequence that joins each one on access.
+    """
+    return SegmentedVariants(list(iter_segments(text, start, stop)))
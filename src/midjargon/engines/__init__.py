@@ -1,10 +1,43 @@
 """
 Engine-specific parsers for midjargon.
+
+The engines are imported on first access (PEP 562), so using the Fal.ai
+converter does not load the Pydantic-based Midjourney engine.
 """
 
-from midjargon.engines import fal
-from midjargon.engines.midjourney import (MidjourneyPrompt,
-                                          parse_midjourney_dict)
+from __future__ import annotations
+
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from midjargon.engines import fal
+    from midjargon.engines.midjourney import (MidjourneyPrompt,
+                                              parse_midjourney_dict)
+
+# Public name → module it is imported from on first access
+_LAZY_IMPORTS: dict[str, str] = {
+    "MidjourneyPrompt": "midjargon.engines.midjourney",
+    "parse_midjourney_dict": "midjargon.engines.midjourney",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name == "fal":
+        return import_module("midjargon.engines.fal")
+    try:
+        module = _LAZY_IMPORTS[name]
+    except KeyError:
+        msg = f"module {__name__!r} has no attribute {name!r}"
+        raise AttributeError(msg) from None
+    value = getattr(import_module(module), name)
+    globals()[name] = value  # later lookups skip __getattr__
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted({*globals(), "fal", *_LAZY_IMPORTS})
+
 
 __all__ = [
     "MidjourneyPrompt",
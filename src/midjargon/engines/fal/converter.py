@@ -6,6 +6,8 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING, Any, TypeAlias, cast
 
+from midjargon.core.profiling import instrument
+
 if TYPE_CHECKING:
     from midjargon.core.type_defs import MidjargonDict
 
@@ -52,6 +54,7 @@ def _convert_numeric_values(d: dict | FalDict | MidjargonDict) -> dict:
     return result
 
 
+@instrument("engine")
 def to_fal_dict(d: dict | FalDict | MidjargonDict) -> FalDict:
     """
     Convert a MidjargonDict to Fal.ai API format.
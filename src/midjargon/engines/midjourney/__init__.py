@@ -4,7 +4,9 @@ Midjourney engine for midjargon.
 
 from midjargon.engines.midjourney.midjourney import (MidjourneyParser,
                                                      MidjourneyPrompt,
-                                                     parse_midjourney_dict)
+                                                     RangeErrors,
+                                                     parse_midjourney_dict,
+                                                     validate_ranges)
 
 # Create a default parser instance
 _parser = MidjourneyParser()
@@ -16,5 +18,7 @@ __all__ = [
     "ImagePrompt",
     "MidjourneyParser",
     "MidjourneyPrompt",
+    "RangeErrors",
     "parse_midjourney_dict",
+    "validate_ranges",
 ]
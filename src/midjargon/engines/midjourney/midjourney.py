@@ -4,10 +4,25 @@
 
 from __future__ import annotations
 
-from typing import Any
-
-from midjargon.core.models import ImageReference, MidjourneyParameters, MidjourneyPrompt
-from pydantic import HttpUrl
+from array import array
+from functools import lru_cache
+from itertools import compress
+from typing import TYPE_CHECKING, Any, NamedTuple, TypeVar
+
+from midjargon.core.models import (
+    ImageReference,
+    MidjourneyParameters,
+    MidjourneyPrompt,
+    MidjourneyVersion,
+    StyleMode,
+)
+from midjargon.core.profiling import instrument
+from pydantic import BaseModel, HttpUrl
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping
+
+    from midjargon.core.columnar import ColumnarPrompts
 
 # ---------------------------------------------------------------------------
 # Aliases: short / alternative key names → canonical parameter field name
@@ -49,6 +64,17 @@ _PARAM_RANGES: dict[str, tuple[float, float]] = {
 }
 
 
+# Numeric MidjourneyParameters fields, by type
+_FLOAT_FIELDS = frozenset(
+    {"stylize", "chaos", "weird", "image_weight", "quality",
+     "character_weight", "style_weight"}
+)
+_INT_FIELDS = frozenset({"style_version", "repeat", "stop"})
+_NUMERIC_FIELDS = _FLOAT_FIELDS | _INT_FIELDS
+
+URL_CACHE_SIZE = 4096  # Number of normalised image URLs kept for trusted parsing
+
+
 def _convert_numeric(raw: str) -> int | float:
     """Convert a numeric string to int (if whole) or float."""
     f = float(raw)
@@ -64,6 +90,59 @@ def _validate_range(name: str, value: int | float) -> None:
         raise ValueError(f"Invalid numeric value for {name}: {value}")
 
 
+class RangeErrors(NamedTuple):
+    """Rows of a :class:`~midjargon.core.columnar.ColumnarPrompts` that
+    failed range validation."""
+
+    mask: array[int]  # typecode "B": 1 where the row has an out-of-range value
+    messages: dict[int, list[str]]  # row → errors, in the order of the ranges
+
+    def __bool__(self) -> bool:
+        return bool(self.messages)
+
+
+def validate_ranges(
+    prompts: ColumnarPrompts,
+    ranges: Mapping[str, tuple[float, float]] = _PARAM_RANGES,
+) -> RangeErrors:
+    """Check the numeric columns of *prompts* against *ranges* in one pass.
+
+    Each column is checked as a whole: its set values are compared with the
+    bounds via ``min``/``max`` first, and only a column with a value out of
+    range is scanned for the offending rows.  Messages are the ones
+    :meth:`MidjourneyParser.parse_dict` raises for the same value.
+
+    Args:
+        prompts: Result of :func:`~midjargon.core.columnar.parse_many_columnar`.
+        ranges: Parameter name → inclusive ``(min, max)``; defaults to the
+                ranges ``parse_dict`` enforces.  Names without a column are
+                skipped.
+
+    Returns:
+        :class:`RangeErrors`; false if every value is in range.
+    """
+    mask = array("B", bytes(len(prompts)))
+    messages: dict[int, list[str]] = {}
+    for name, (lo, hi) in ranges.items():
+        column = prompts.columns.get(name)
+        if column is None or not isinstance(column.values, array):
+            continue
+        values, present = column
+        set_values = list(compress(values, present))
+        if not set_values or (lo <= min(set_values) and max(set_values) <= hi):
+            continue
+        for row in compress(range(len(values)), present):
+            value = values[row]
+            if value < lo or value > hi:
+                if isinstance(value, float) and value.is_integer():
+                    value = int(value)
+                mask[row] = 1
+                messages.setdefault(row, []).append(
+                    f"Invalid numeric value for {name}: {value}"
+                )
+    return RangeErrors(mask, messages)
+
+
 def _resolve_personalization(val: Any) -> bool | list[str]:
     """Convert raw personalization value to the canonical bool | list[str]."""
     if val is None or val == "":
@@ -79,13 +158,99 @@ def _resolve_personalization(val: Any) -> bool | list[str]:
     return bool(val)
 
 
+@lru_cache(maxsize=URL_CACHE_SIZE)
+def _normalise_url(url: str) -> str | None:
+    """Return *url* as ``HttpUrl`` normalises it, or None if it is invalid."""
+    try:
+        return str(HttpUrl(url))
+    except Exception:
+        return None
+
+
+@lru_cache(maxsize=256)
+def _normalise_version(version: str) -> MidjourneyVersion | str | None:
+    """Return *version* as ``MidjourneyParameters`` stores it."""
+    return MidjourneyParameters.validate_version(version)
+
+
+_M = TypeVar("_M", bound=BaseModel)
+
+# Per model: (plain defaults, default factories) of its fields
+_Defaults = tuple[dict[str, Any], tuple[tuple[str, Any], ...]]
+_DEFAULTS: dict[type[BaseModel], _Defaults] = {}
+
+
+def _construct(model: type[_M], values: dict[str, Any]) -> _M:
+    """Create a *model* instance from already valid *values*, like
+    ``model.model_construct(**values)``.
+
+    ``model_construct`` inspects the signature of every default factory on
+    each call, which costs more than validating; the defaults are gathered
+    once per model here instead.
+    """
+    try:
+        defaults, factories = _DEFAULTS[model]
+    except KeyError:
+        fields = model.model_fields
+        # Factory fields get a placeholder so the dict keeps field order
+        defaults = {name: info.default for name, info in fields.items()}
+        factories = tuple(
+            (name, info.default_factory)
+            for name, info in fields.items()
+            if info.default_factory is not None
+        )
+        _DEFAULTS[model] = defaults, factories
+    data = defaults.copy()
+    for name, factory in factories:
+        if name not in values:
+            data[name] = factory()
+    data.update(values)
+    obj = model.__new__(model)
+    object.__setattr__(obj, "__dict__", data)
+    object.__setattr__(obj, "__pydantic_fields_set__", set(values))
+    object.__setattr__(obj, "__pydantic_extra__", None)
+    object.__setattr__(obj, "__pydantic_private__", None)
+    return obj
+
+
+def _construct_parameters(params: dict[str, Any]) -> MidjourneyParameters:
+    """Build ``MidjourneyParameters`` without running Pydantic validation.
+
+    Applies only the coercions the model would still make to values that
+    :meth:`MidjourneyParser.parse_dict` has already range-checked.
+    """
+    for field in _FLOAT_FIELDS.intersection(params):
+        if params[field] is not None:
+            params[field] = float(params[field])
+    for field in _INT_FIELDS.intersection(params):
+        val = params[field]
+        if isinstance(val, float):
+            if not val.is_integer():
+                raise ValueError(f"Invalid numeric value for {field}: {val}")
+            params[field] = int(val)
+    if params.get("version") is not None:
+        params["version"] = _normalise_version(params["version"])
+    if params.get("style") is not None:
+        params["style"] = StyleMode(params["style"])
+    if "seed" in params:
+        params["seed"] = MidjourneyParameters.validate_seed(params["seed"])
+    if "aspect_ratio" in params:
+        params["aspect_ratio"] = MidjourneyParameters.validate_aspect_ratio(
+            params["aspect_ratio"]
+        )
+    return _construct(MidjourneyParameters, params)
+
+
 class MidjourneyParser:
     """Parser for converting between Midjourney prompt formats."""
 
     def _parse_url(self, url: str) -> HttpUrl:
         return HttpUrl(url)
 
-    def parse_dict(self, prompt_dict: dict[str, Any]) -> MidjourneyPrompt:  # noqa: C901
+    @instrument("engine")
+    def parse_dict(  # noqa: C901
+        self, prompt_dict: dict[str, Any], *, trusted: bool = False
+    ) -> MidjourneyPrompt:
         """Parse a dictionary into a MidjourneyPrompt.
 
         Accepts both short aliases (``"v"``, ``"s"``, ``"ar"``, …) and
@@ -94,6 +259,11 @@ class MidjourneyParser:
 
         Args:
             prompt_dict: Dictionary containing prompt data. Not mutated.
+            trusted: Build the models directly instead of validating them
+                     again.  Meant for dicts produced by
+                     :func:`~midjargon.core.parser.parse_midjargon_prompt_to_dict`;
+                     the result is the same, but invalid values raise a plain
+                     ``ValueError`` instead of a Pydantic ``ValidationError``.
 
         Returns:
             Validated :class:`~midjargon.core.models.MidjourneyPrompt`.
@@ -127,7 +297,11 @@ class MidjourneyParser:
         raw_images: list[Any] = d.pop("images", []) or []
         image_prompts: list[ImageReference] = []
         for img in raw_images:
-            if isinstance(img, str):
+            if trusted and isinstance(img, str):
+                url = _normalise_url(img)
+                if url is not None:
+                    image_prompts.append(_construct(ImageReference, {"url": url}))
+            elif isinstance(img, str):
                 try:
                     image_prompts.append(ImageReference(url=self._parse_url(img)))
                 except Exception:
@@ -174,13 +348,7 @@ class MidjourneyParser:
             params["style"] = d.pop("style")
 
         # --- numeric parameters -------------------------------------------
-        _numeric_fields = {
-            "stylize", "chaos", "weird", "image_weight", "quality",
-            "character_weight", "style_weight", "style_version", "repeat", "stop",
-        }
-        for field in _numeric_fields:
-            if field not in d:
-                continue
+        for field in _NUMERIC_FIELDS.intersection(d):
             raw = d.pop(field)
             if raw is None:
                 params[field] = None
@@ -225,6 +393,16 @@ class MidjourneyParser:
         params["extra_params"] = {k: v for k, v in d.items()
                                   if k not in ("text", "images")}
 
+        if trusted:
+            return _construct(
+                MidjourneyPrompt,
+                {
+                    "text": text,
+                    "image_prompts": image_prompts,
+                    "parameters": _construct_parameters(params),
+                },
+            )
+
         mj_params = MidjourneyParameters(**params)
 
         return MidjourneyPrompt(
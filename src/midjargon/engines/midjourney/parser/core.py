@@ -6,6 +6,7 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING, Any
 
+from midjargon.core.profiling import instrument
 from midjargon.engines.base import EngineParser
 from midjargon.engines.midjourney.models import ImagePrompt, MidjourneyPrompt
 from midjargon.engines.midjourney.parser.exceptions import \
@@ -359,6 +360,7 @@ class MidjourneyParser(EngineParser[MidjourneyPrompt]):
                     extra_params[key] = str(value)
         prompt_data["extra_params"] = extra_params
 
+    @instrument("engine")
     def parse_dict(self, midjargon_dict: MidjargonDict) -> MidjourneyPrompt:
         """Parse a dictionary into a MidjourneyPrompt.
 
@@ -0,0 +1,467 @@
+#!/usr/bin/env python3
+# this_file: src/midjargon/server.py
+"""
+midjargon.server
+~~~~~~~~~~~~~~~~
+
+Asyncio HTTP service for prompt expansion and conversion, built on the
+standard library only.
+
+Work endpoints take ``POST`` with a JSON body ``{"prompt": …, "shard": "i/n"}``
+(``shard`` optional) or ``GET`` with the same fields as query parameters:
+
+``/permute``
+    The expanded variant strings.
+``/parse``, ``/midjourney``, ``/fal``
+    One ``{"variant": …, "prompt": …, "result": …}`` object per variant, with
+    the ``MidjargonDict``, ``MidjourneyPrompt.model_dump()`` dict or Fal.ai
+    dict as result, or ``"error"`` instead of ``"result"`` if that variant
+    fails to convert.
+
+Both are streamed as JSON Lines with chunked transfer encoding: the variant
+range is cut into blocks that are expanded and converted in a process pool,
+and each block is sent as soon as it and the blocks before it are done.
+At most ``max_concurrency`` work requests run at once; further ones get
+``503``.  A prompt (or shard) with more variants than the server's budget
+allows, or nesting its groups deeper, gets ``400``, as does a request head
+larger than ``MAX_HEADER_BYTES``; a client that takes longer than
+``read_timeout`` to send its request gets ``408``.  ``GET /metrics``
+reports request counts and latencies per endpoint and ``GET /health``
+answers ``{"status": "ok"}``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from http import HTTPStatus
+from statistics import fmean
+from typing import TYPE_CHECKING, Any
+from urllib.parse import parse_qs, urlsplit
+
+from midjargon.batch import CONVERTERS, DEFAULT_CHUNKSIZE, iter_convert
+from midjargon.core.budget import (
+    ExpansionBudget,
+    check_budget,
+    check_depth,
+    variant_limit,
+)
+from midjargon.core.permutations import (
+    count_variants,
+    iter_expand,
+    parse_shard,
+    shard_bounds,
+)
+from midjargon.core.records import PromptRecord
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+
+# Work endpoint → midjargon.batch engine; None expands without converting
+ENDPOINTS: dict[str, str | None] = {
+    "/permute": None,
+    "/parse": "midjargon",
+    "/midjourney": "midjourney",
+    "/fal": "fal",
+}
+
+DEFAULT_MAX_CONCURRENCY = 64  # Work requests served at once
+# Variants and nesting depth of one request; responses are streamed, so the
+# variant limit is higher than the JSON-RPC server's
+DEFAULT_BUDGET = ExpansionBudget(max_variants=10_000_000, max_depth=32)
+MAX_BODY_BYTES = 1024 * 1024  # Largest accepted request body
+MAX_HEADER_BYTES = 64 * 1024  # Largest accepted request line and headers
+MAX_HEADERS = 100  # Most header fields accepted in one request
+READ_TIMEOUT = 30.0  # Seconds a client may take to send its request
+LATENCY_WINDOW = 1024  # Latest request latencies kept per endpoint
+
+# Blocks kept in flight per worker, bounding memory for huge variant sets
+_PREFETCH_PER_WORKER = 2
+
+
+class HTTPError(Exception):
+    """Request failure answered with *status* and a JSON error message."""
+
+    def __init__(self, status: HTTPStatus, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+@dataclass
+class EndpointMetrics:
+    """Request counters and recent latencies of one endpoint."""
+
+    requests: int = 0
+    errors: int = 0  # answered with a 4xx/5xx status
+    rejected: int = 0  # turned away by the concurrency limit
+    in_flight: int = 0
+    latencies: deque[float] = field(
+        default_factory=lambda: deque(maxlen=LATENCY_WINDOW)
+    )
+
+    def snapshot(self) -> dict[str, Any]:
+        """Return the counters and latency percentiles (ms) as a JSON-ready dict."""
+        ordered = sorted(self.latencies)
+        latency: dict[str, float] = {}
+        if ordered:
+            last = len(ordered) - 1
+            latency = {
+                "mean": fmean(ordered),
+                "p50": ordered[last // 2],
+                "p95": ordered[last * 95 // 100],
+                "p99": ordered[last * 99 // 100],
+                "max": ordered[-1],
+            }
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "rejected": self.rejected,
+            "in_flight": self.in_flight,
+            "latency_ms": {k: round(v, 3) for k, v in latency.items()},
+        }
+
+
+# ---------------------------------------------------------------------------
+# Block workers (run in the process pool)
+# ---------------------------------------------------------------------------
+
+
+def _expand_block(prompt: str, start: int, stop: int) -> bytes:
+    """Return variants *start* to *stop* of *prompt* as JSON Lines."""
+    return "".join(
+        json.dumps(variant) + "\n" for variant in iter_expand(prompt, start, stop)
+    ).encode()
+
+
+def _convert_block(
+    convert: Callable[[str], Any], prompt: str, start: int, stop: int
+) -> bytes:
+    """Return variants *start* to *stop* of *prompt*, converted, as JSON Lines."""
+    lines = []
+    for item in iter_convert(convert, [(0, prompt, start, stop)]):
+        record: dict[str, Any] = {"variant": item.variant_index, "prompt": item.variant}
+        if item.error is not None:
+            record["error"] = item.error
+        elif isinstance(item.result, PromptRecord):
+            record["result"] = item.result.to_dict()
+        else:
+            record["result"] = item.result
+        lines.append(json.dumps(record) + "\n")
+    return "".join(lines).encode()
+
+
+# ---------------------------------------------------------------------------
+# HTTP plumbing
+# ---------------------------------------------------------------------------
+
+
+async def _read_line(reader: asyncio.StreamReader, room: int) -> bytes:
+    """Read one line of the request head, at most *room* bytes long."""
+    try:
+        line = await reader.readline()
+    except (ValueError, asyncio.LimitOverrunError):
+        # Longer than the stream's buffer limit
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "Request header too large") from None
+    if len(line) > room:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "Request header too large")
+    return line
+
+
+async def _read_request(
+    reader: asyncio.StreamReader,
+) -> tuple[str, str, dict[str, str], bytes]:
+    """Read one request: ``(method, target, headers, body)``.
+
+    The request line and headers together may take up ``MAX_HEADER_BYTES``
+    in at most ``MAX_HEADERS`` fields; the body ``MAX_BODY_BYTES``.
+    """
+    room = MAX_HEADER_BYTES
+    line = await _read_line(reader, room)
+    room -= len(line)
+    try:
+        method, target, _ = line.decode("latin-1").split(" ", 2)
+    except ValueError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "Malformed request line") from None
+    headers: dict[str, str] = {}
+    for _ in range(MAX_HEADERS + 1):
+        line = await _read_line(reader, room)
+        if line in (b"\r\n", b"\n", b""):
+            break
+        room -= len(line)
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    else:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "Too many request headers")
+    try:
+        length = int(headers.get("content-length", "0"))
+    except ValueError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "Invalid Content-Length") from None
+    if length > MAX_BODY_BYTES:
+        raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Request body too large")
+    body = await reader.readexactly(length) if length > 0 else b""
+    return method.upper(), target, headers, body
+
+
+def _head(status: HTTPStatus, content_type: str, length: int | None) -> bytes:
+    """Return the status line and headers; chunked when *length* is None."""
+    framing = (
+        "Transfer-Encoding: chunked" if length is None else f"Content-Length: {length}"
+    )
+    return (
+        f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"{framing}\r\n"
+        "Connection: close\r\n\r\n"
+    ).encode()
+
+
+async def _send_json(
+    writer: asyncio.StreamWriter, status: HTTPStatus, payload: Any
+) -> None:
+    body = json.dumps(payload).encode()
+    writer.write(_head(status, "application/json", len(body)) + body)
+    await writer.drain()
+
+
+def _prompt_params(method: str, target: str, body: bytes) -> tuple[str, str | None]:
+    """Return the ``(prompt, shard)`` of a work request."""
+    if method == "GET":
+        query = parse_qs(urlsplit(target).query)
+        params: Any = {name: values[-1] for name, values in query.items()}
+    else:
+        try:
+            params = json.loads(body or b"null")
+        except ValueError as error:
+            msg = f"Invalid JSON body: {error}"
+            raise HTTPError(HTTPStatus.BAD_REQUEST, msg) from None
+    if not isinstance(params, dict) or not isinstance(params.get("prompt"), str):
+        raise HTTPError(HTTPStatus.BAD_REQUEST, 'Expected a "prompt" string')
+    shard = params.get("shard")
+    if shard is not None and not isinstance(shard, str):
+        raise HTTPError(HTTPStatus.BAD_REQUEST, '"shard" must be a string "i/n"')
+    return params["prompt"], shard
+
+
+def _variant_range(
+    prompt: str, shard: str | None, budget: ExpansionBudget
+) -> tuple[int, int]:
+    """Return the ``(start, stop)`` variants of *prompt* in *shard*.
+
+    Runs in the worker pool, since compiling a prompt can take a while.  The
+    depth of *prompt* and the number of variants are checked against
+    *budget*; its ``truncate`` and ``sample`` policies shorten the range.
+    """
+    check_depth(prompt, budget)
+    size = count_variants(prompt)
+    start, stop = 0, size
+    if (spec := parse_shard(shard)) is not None:
+        start, stop = shard_bounds(size, *spec)
+    return start, start + variant_limit(stop - start, budget)
+
+
+# ---------------------------------------------------------------------------
+# Server
+# ---------------------------------------------------------------------------
+
+
+class MidjargonServer:
+    """HTTP service for expansion and conversion.
+
+    Args:
+        workers: Worker processes for expansion and conversion; ``None``
+                 uses all CPUs and ``0`` runs blocks in a thread instead.
+        max_concurrency: Work requests served at once; more get ``503``.
+        chunksize: Variants expanded or converted per block.
+        budget: Variant count and nesting depth limits of each request
+                (``max_bytes`` is not applied to streamed responses).
+        read_timeout: Seconds a client may take to send its request; slower
+                      ones get ``408``.
+    """
+
+    def __init__(
+        self,
+        *,
+        workers: int | None = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        chunksize: int = DEFAULT_CHUNKSIZE,
+        budget: ExpansionBudget = DEFAULT_BUDGET,
+        read_timeout: float = READ_TIMEOUT,
+    ) -> None:
+        if chunksize < 1:
+            msg = f"Chunk size must be positive: {chunksize}"
+            raise ValueError(msg)
+        check_budget(budget)
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.max_concurrency = max_concurrency
+        self.chunksize = chunksize
+        self.budget = budget
+        self.read_timeout = read_timeout
+        self.metrics = {path: EndpointMetrics() for path in ENDPOINTS}
+        self._active = 0
+        self._executor: Executor | None = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8080) -> asyncio.Server:
+        """Start the worker pool and listen on *host*:*port*."""
+        if self.workers > 0 and self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return await asyncio.start_server(self._handle, host, port)
+
+    def close(self) -> None:
+        """Shut down the worker pool."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Answer one request on a connection, then close it."""
+        try:
+            try:
+                try:
+                    method, target, _, body = await asyncio.wait_for(
+                        _read_request(reader), self.read_timeout
+                    )
+                except asyncio.TimeoutError:
+                    msg = "Request not received in time"
+                    raise HTTPError(HTTPStatus.REQUEST_TIMEOUT, msg) from None
+                path = urlsplit(target).path.rstrip("/") or "/"
+                if path in ENDPOINTS:
+                    await self._work(writer, path, method, target, body)
+                elif method != "GET":
+                    raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, "Use GET")
+                elif path == "/metrics":
+                    await _send_json(writer, HTTPStatus.OK, self.snapshot())
+                elif path == "/health":
+                    await _send_json(writer, HTTPStatus.OK, {"status": "ok"})
+                else:
+                    raise HTTPError(HTTPStatus.NOT_FOUND, f"Not found: {path}")
+            except HTTPError as error:
+                await _send_json(writer, error.status, {"error": str(error)})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass  # client went away
+        finally:
+            writer.close()
+
+    async def _work(
+        self,
+        writer: asyncio.StreamWriter,
+        path: str,
+        method: str,
+        target: str,
+        body: bytes,
+    ) -> None:
+        """Serve a work endpoint under the concurrency limit, with metrics."""
+        metrics = self.metrics[path]
+        metrics.requests += 1
+        if self._active >= self.max_concurrency:
+            metrics.rejected += 1
+            metrics.errors += 1
+            raise HTTPError(HTTPStatus.SERVICE_UNAVAILABLE, "Too many requests")
+        self._active += 1
+        metrics.in_flight += 1
+        started = time.perf_counter()
+        try:
+            if method not in ("GET", "POST"):
+                raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, "Use GET or POST")
+            prompt, shard = _prompt_params(method, target, body)
+            loop = asyncio.get_running_loop()
+            try:
+                start, stop = await loop.run_in_executor(
+                    self._executor, _variant_range, prompt, shard, self.budget
+                )
+            except Exception as error:
+                # Whatever the prompt makes fail, RecursionError included
+                message = str(error) or type(error).__name__
+                raise HTTPError(HTTPStatus.BAD_REQUEST, message) from error
+            await self._stream(writer, ENDPOINTS[path], prompt, start, stop)
+        except BaseException:
+            metrics.errors += 1
+            raise
+        finally:
+            self._active -= 1
+            metrics.in_flight -= 1
+            metrics.latencies.append((time.perf_counter() - started) * 1000)
+
+    def _blocks(
+        self, engine: str | None, prompt: str, start: int, stop: int
+    ) -> Iterator[asyncio.Future[bytes]]:
+        """Submit the blocks of variants *start* to *stop* one at a time."""
+        loop = asyncio.get_running_loop()
+        # Workers get the converter itself, so a replaced one is used there too
+        convert = None if engine is None else CONVERTERS[engine]
+        for block in range(start, stop, self.chunksize):
+            end = min(stop, block + self.chunksize)
+            if convert is None:
+                yield loop.run_in_executor(
+                    self._executor, _expand_block, prompt, block, end
+                )
+            else:
+                yield loop.run_in_executor(
+                    self._executor, _convert_block, convert, prompt, block, end
+                )
+
+    async def _stream(
+        self,
+        writer: asyncio.StreamWriter,
+        engine: str | None,
+        prompt: str,
+        start: int,
+        stop: int,
+    ) -> None:
+        """Send the blocks as a chunked JSON Lines response, in order."""
+        writer.write(_head(HTTPStatus.OK, "application/x-ndjson", None))
+        in_flight = max(1, self.workers) * _PREFETCH_PER_WORKER
+        pending: deque[asyncio.Future[bytes]] = deque()
+
+        async def send_next() -> None:
+            data = await pending.popleft()
+            writer.write(b"%x\r\n%s\r\n" % (len(data), data))
+            await writer.drain()
+
+        try:
+            for future in self._blocks(engine, prompt, start, stop):
+                pending.append(future)
+                if len(pending) >= in_flight:
+                    await send_next()
+            while pending:
+                await send_next()
+        finally:
+            for future in pending:
+                future.cancel()
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    def snapshot(self) -> dict[str, Any]:
+        """Return the current metrics of every work endpoint."""
+        return {
+            "active": self._active,
+            "max_concurrency": self.max_concurrency,
+            "endpoints": {path: m.snapshot() for path, m in self.metrics.items()},
+        }
+
+
+def run(host: str = "127.0.0.1", port: int = 8080, **options: Any) -> None:
+    """Serve on *host*:*port* until interrupted.
+
+    Args:
+        host: Interface to listen on.
+        port: TCP port to listen on.
+        **options: Passed to :class:`MidjargonServer`.
+    """
+
+    async def serve() -> None:
+        server = MidjargonServer(**options)
+        listener = await server.start(host, port)
+        try:
+            async with listener:
+                await listener.serve_forever()
+        finally:
+            server.close()
+
+    asyncio.run(serve())
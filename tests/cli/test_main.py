@@ -316,3 +316,275 @@ def test_perm_command(cli):
         "a blue bird on a rock",
     ]
     assert set(data) == set(expected)
+
+
+def test_perm_streams_identical_json(cli):
+    """Test that streamed permutation JSON matches ``json.dumps`` output."""
+    prompt = "a {red, blue} bird on a {branch, rock}"
+    with StringIO() as capture_stdout:
+        sys.stdout = capture_stdout
+        cli.perm(prompt, json_output=True)
+        sys.stdout = sys.__stdout__
+        output = capture_stdout.getvalue()
+    expected = [
+        "a red bird on a branch",
+        "a red bird on a rock",
+        "a blue bird on a branch",
+        "a blue bird on a rock",
+    ]
+    assert output == json.dumps(expected, indent=2)
+
+
+def test_perm_shard(cli):
+    """Test that --shard outputs only the requested block of variants."""
+    prompt = "a {red, blue} bird on a {branch, rock}"
+    outputs = []
+    for index in range(3):
+        with StringIO() as capture_stdout:
+            sys.stdout = capture_stdout
+            cli.perm(prompt, json_output=True, shard=f"{index}/3")
+            sys.stdout = sys.__stdout__
+            outputs.append(parse_json_output(capture_stdout))
+    assert [v for shard in outputs for v in shard] == [
+        "a red bird on a branch",
+        "a red bird on a rock",
+        "a blue bird on a branch",
+        "a blue bird on a rock",
+    ]
+
+
+def test_json_shard_is_always_a_list(cli):
+    """Test that sharded output stays a list even with a single variant."""
+    with StringIO() as capture_stdout:
+        sys.stdout = capture_stdout
+        cli.json("a {red, blue} bird", json_output=True, shard="1/2")
+        sys.stdout = sys.__stdout__
+        data = parse_json_output(capture_stdout)
+    assert isinstance(data, list)
+    assert [d["text"] for d in data] == ["a blue bird"]
+
+
+def test_json_error_after_first_variant(cli):
+    """Test that an error in the middle of a streamed array keeps it valid."""
+    with StringIO() as capture_stdout:
+        sys.stdout = capture_stdout
+        with pytest.raises(SystemExit):
+            cli.mj("a --s {100, 5000}", json_output=True, shard="0/1")
+        sys.stdout = sys.__stdout__
+        data = parse_json_output(capture_stdout)
+    assert data[0]["stylize"] == 100
+    assert "stylize" in data[1]["error"]
+    assert len(data) == 2
+
+
+def test_invalid_shard(cli):
+    """Test that a malformed shard spec is reported as an error."""
+    with StringIO() as capture_stdout:
+        sys.stdout = capture_stdout
+        with pytest.raises(SystemExit):
+            cli.mj("a {red, blue} bird", json_output=True, shard="half")
+        sys.stdout = sys.__stdout__
+        data = parse_json_output(capture_stdout)
+    assert "error" in data
+
+
+def test_batch_streams_jsonl(cli, tmp_path):
+    """Test that batch writes one compact JSON object per variant."""
+    source = tmp_path / "prompts.txt"
+    source.write_text("a {red, blue} bird --ar 16:9\n\nfoo --s 5000\n")
+    with StringIO() as capture_stdout:
+        sys.stdout = capture_stdout
+        cli.batch(str(source), engine="mj")
+        sys.stdout = sys.__stdout__
+        lines = capture_stdout.getvalue().splitlines()
+    records = [json.loads(line) for line in lines]
+    assert [(r["index"], r["variant"]) for r in records] == [(0, 0), (0, 1), (1, 0)]
+    assert records[0]["prompt"] == "a red bird --ar 16:9"
+    assert records[0]["result"]["aspect_ratio"] == "16:9"
+    assert "stylize" in records[2]["error"]
+    assert "result" not in records[2]
+
+
+def test_batch_reads_jsonl_from_stdin(cli, monkeypatch):
+    """Test JSONL input with string and object lines."""
+    monkeypatch.setattr(sys, "stdin", StringIO('"a {x, y}"\n{"prompt": "b --c 5"}\n'))
+    with StringIO() as capture_stdout:
+        sys.stdout = capture_stdout
+        cli.batch(engine="fal", input_format="jsonl")
+        sys.stdout = sys.__stdout__
+        lines = capture_stdout.getvalue().splitlines()
+    results = [json.loads(line)["result"] for line in lines]
+    assert [r["prompt"] for r in results] == ["a x", "a y", "b"]
+    assert results[2]["chaos"] == CHAOS_VALUE // 10
+
+
+def test_batch_invalid_jsonl(cli, monkeypatch):
+    """Test that malformed JSONL input is reported as an error."""
+    monkeypatch.setattr(sys, "stdin", StringIO("{bad\n"))
+    with StringIO() as capture_stdout:
+        sys.stdout = capture_stdout
+        with pytest.raises(SystemExit):
+            cli.batch(input_format="jsonl")
+        sys.stdout = sys.__stdout__
+        data = json.loads(capture_stdout.getvalue())
+    assert "line 1" in data["error"]
+
+
+def test_plain_format(cli):
+    """Test that --format plain writes one variant per line."""
+    with StringIO() as capture_stdout:
+        sys.stdout = capture_stdout
+        cli.perm("a {red, blue} bird", format="plain")
+        sys.stdout = sys.__stdout__
+        output = capture_stdout.getvalue()
+    assert output == "a red bird\na blue bird\n"
+
+
+def test_jsonl_format(cli):
+    """Test that --format jsonl writes one compact JSON value per variant."""
+    with StringIO() as capture_stdout:
+        sys.stdout = capture_stdout
+        cli.mj("a {red, blue} bird --ar 16:9", format="jsonl")
+        sys.stdout = sys.__stdout__
+        lines = capture_stdout.getvalue().splitlines()
+    records = [json.loads(line) for line in lines]
+    assert [r["text"] for r in records] == ["a red bird", "a blue bird"]
+    assert all(": " not in line for line in lines)
+
+
+def test_format_overrides_json_output(cli):
+    """Test that an explicit --format wins over --json-output."""
+    with StringIO() as capture_stdout:
+        sys.stdout = capture_stdout
+        cli.json("a photo --s 100", json_output=True, format="jsonl")
+        sys.stdout = sys.__stdout__
+        lines = capture_stdout.getvalue().splitlines()
+    assert len(lines) == 1
+    assert json.loads(lines[0])["stylize"] == STYLIZE_VALUE
+
+
+def test_plain_format_skips_rich(cli, monkeypatch):
+    """Test that the plain format never creates a Rich console."""
+    monkeypatch.setitem(sys.modules, "rich.console", None)
+    with StringIO() as capture_stdout:
+        sys.stdout = capture_stdout
+        cli.fal("a {red, blue} bird", format="plain")
+        sys.stdout = sys.__stdout__
+        output = capture_stdout.getvalue()
+    assert '"prompt": "a blue bird"' in output
+
+
+def test_rich_format_truncates(cli, monkeypatch):
+    """Test that rich output stops rendering panels after the threshold."""
+    monkeypatch.setattr(sys.modules["midjargon.cli.main"], "RICH_MAX_VARIANTS", 3)
+    with StringIO() as capture_stdout:
+        sys.stdout = capture_stdout
+        cli.perm("a {1, 2, 3, 4, 5, 6, 7, 8} bird", format="rich", no_color=True)
+        sys.stdout = sys.__stdout__
+        output = capture_stdout.getvalue()
+    assert "Variant 3:" in output
+    assert "Variant 4:" not in output
+    assert "5 more variants not shown" in output
+
+
+def test_invalid_format(cli):
+    """Test that an unknown --format is reported as an error."""
+    with StringIO() as capture_stdout:
+        sys.stdout = capture_stdout
+        with pytest.raises(SystemExit):
+            cli.perm("a bird", json_output=True, format="xml")
+        sys.stdout = sys.__stdout__
+        data = parse_json_output(capture_stdout)
+    assert "Unknown output format" in data["error"]
+
+
+def test_cli_profile_flag(monkeypatch, capsys, tmp_path):
+    """Test that --profile prints a stage breakdown and writes pstats."""
+    import pstats
+
+    from midjargon.cli.main import main
+
+    stats_path = tmp_path / "mj.pstats"
+    prompt = "a {red, blue} bird --s {1, 2}"
+    argv = ["midjargon", "mj", prompt, "--format", "jsonl", f"--profile={stats_path}"]
+    monkeypatch.setattr(sys, "argv", argv)
+    main()
+    captured = capsys.readouterr()
+    assert len(captured.out.splitlines()) == 4
+    assert "engine" in captured.err
+    assert "wall" in captured.err
+    assert pstats.Stats(str(stats_path)).total_calls > 0
+
+
+@pytest.mark.parametrize(
+    ("argv", "expected"),
+    [
+        (["perm", "x"], (["perm", "x"], False, None)),
+        (["perm", "x", "--profile"], (["perm", "x"], True, None)),
+        (["--profile=a.prof", "perm"], (["perm"], True, "a.prof")),
+        (["perm", "--", "--profile"], (["perm", "--", "--profile"], False, None)),
+    ],
+)
+def test_profile_options(argv, expected):
+    """Test that --profile is removed from the arguments Fire sees."""
+    from midjargon.cli.main import _profile_options
+
+    assert _profile_options(argv) == expected
+
+
+def test_expansion_budget_options(cli):
+    """Test that --max-variants refuses or cuts down large expansions."""
+    prompt = "a {1, 2, 3} {4, 5, 6}"
+    with StringIO() as capture_stdout:
+        sys.stdout = capture_stdout
+        with pytest.raises(SystemExit):
+            cli.perm(prompt, json_output=True, max_variants=4)
+        sys.stdout = sys.__stdout__
+        data = parse_json_output(capture_stdout)
+    assert "max_variants" in data["error"]
+
+    with StringIO() as capture_stdout:
+        sys.stdout = capture_stdout
+        cli.perm(prompt, format="plain", max_variants=4, on_limit="truncate")
+        sys.stdout = sys.__stdout__
+        output = capture_stdout.getvalue()
+    assert output.splitlines() == ["a 1 4", "a 1 5", "a 1 6", "a 2 4"]
+
+
+def test_sample_option(cli):
+    """Test that --sample prints a reproducible subset of the variants."""
+    prompt = "a " + " ".join("{x, y, z}" for _ in range(20))
+
+    def run(**options):
+        with StringIO() as capture_stdout:
+            sys.stdout = capture_stdout
+            cli.perm(prompt, format="plain", **options)
+            sys.stdout = sys.__stdout__
+            return capture_stdout.getvalue().splitlines()
+
+    sample = run(sample=5, sample_seed=3)
+    assert len(set(sample)) == 5
+    assert sample == run(sample=5, sample_seed=3)
+    assert len(run(sample=5, sample_strategy="stratified")) == 5
+
+
+def test_sample_applies_budget(cli):
+    """Test that --sample validates the budget and applies --max-bytes."""
+
+    def error(**options):
+        with StringIO() as capture_stdout:
+            sys.stdout = capture_stdout
+            with pytest.raises(SystemExit):
+                cli.perm("a {x, y, z}", json_output=True, sample=2, **options)
+            sys.stdout = sys.__stdout__
+            return parse_json_output(capture_stdout)["error"]
+
+    assert "Unknown limit policy" in error(max_variants=5, on_limit="drop")
+    assert "max_bytes" in error(max_bytes=4)
+    with StringIO() as capture_stdout:
+        sys.stdout = capture_stdout
+        cli.perm(
+            "a {x, y, z}", format="plain", sample=2, max_bytes=4, on_limit="truncate"
+        )
+        sys.stdout = sys.__stdout__
+        assert len(capture_stdout.getvalue().splitlines()) == 1
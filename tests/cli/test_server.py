@@ -0,0 +1,136 @@
+"""Tests for the JSON-RPC server and client."""
+
+import json
+import threading
+from io import StringIO
+
+import pytest
+
+from midjargon.cli import server
+from midjargon.cli.server import (
+    INTERNAL_ERROR,
+    INVALID_PARAMS,
+    METHOD_NOT_FOUND,
+    PARSE_ERROR,
+    PROMPT_ERROR,
+    Client,
+    RPCError,
+    UnixServer,
+    _Handler,
+    handle_line,
+    serve,
+    serve_stream,
+)
+
+
+def _request(method, params, request_id=1):
+    return json.dumps(
+        {"jsonrpc": "2.0", "id": request_id, "method": method, "params": params}
+    )
+
+
+def test_methods_match_cli_results():
+    """Test that each method returns the list of converted variants."""
+    perm = json.loads(handle_line(_request("perm", ["a {red, blue} bird"])))
+    assert perm == {"jsonrpc": "2.0", "id": 1, "result": ["a red bird", "a blue bird"]}
+    parsed = json.loads(handle_line(_request("json", {"prompt": "a --s 100"})))
+    assert parsed["result"] == [{"text": "a", "images": [], "stylize": 100}]
+    mj = json.loads(handle_line(_request("mj", ["a --ar 16:9"])))
+    assert mj["result"][0]["aspect_ratio"] == "16:9"
+    fal = json.loads(handle_line(_request("fal", ["a {x, y}", "1/2"])))
+    assert [r["prompt"] for r in fal["result"]] == ["a y"]
+
+
+def test_errors():
+    """Test JSON-RPC error responses."""
+    assert json.loads(handle_line("{bad"))["error"]["code"] == PARSE_ERROR
+    missing = json.loads(handle_line(_request("nope", ["a"])))
+    assert missing["error"]["code"] == METHOD_NOT_FOUND
+    invalid = json.loads(handle_line(_request("perm", {"text": "a"})))
+    assert invalid["error"]["code"] == INVALID_PARAMS
+    failed = json.loads(handle_line(_request("mj", ["a --s 5000"])))
+    assert "stylize" in failed["error"]["message"]
+
+
+def test_limits():
+    """Test that every request is expanded within the default budget."""
+    deep = json.loads(handle_line(_request("perm", ["{" * 3000 + "a" + "}" * 3000])))
+    assert deep["error"]["code"] == PROMPT_ERROR
+    assert "max_depth" in deep["error"]["message"]
+    wide = json.loads(handle_line(_request("mj", [" ".join(["{a, b}"] * 20)])))
+    assert "max_variants" in wide["error"]["message"]
+
+
+def test_unexpected_errors_keep_serving(monkeypatch):
+    """Test that any exception becomes an error response."""
+
+    def broken(prompt, **options):
+        raise RecursionError("maximum recursion depth exceeded")
+
+    monkeypatch.setitem(server.METHODS, "perm", broken)
+    output = StringIO()
+    serve_stream([_request("perm", ["a"]), _request("json", ["b"], 2)], output)
+    first, second = map(json.loads, output.getvalue().splitlines())
+    assert first["error"]["code"] == INTERNAL_ERROR
+    assert "RecursionError" in first["error"]["message"]
+    assert second["result"][0]["text"] == "b"
+    assert json.loads(handle_line("[" * 100_000))["error"]["code"] == PARSE_ERROR
+
+
+def test_serve_refuses_to_replace_other_files(tmp_path):
+    """Test that serve only replaces an existing socket file."""
+    path = tmp_path / "data.txt"
+    path.write_text("keep me")
+    with pytest.raises(FileExistsError, match="Not a socket"):
+        serve(str(path))
+    assert path.read_text() == "keep me"
+
+
+def test_batch_and_notification():
+    """Test batch requests and that notifications get no response."""
+    notification = json.dumps({"jsonrpc": "2.0", "method": "perm", "params": ["a"]})
+    assert handle_line(notification) is None
+    batch = [_request("perm", ["a"], 1), notification, _request("perm", ["b"], 2)]
+    responses = json.loads(handle_line(f"[{', '.join(batch)}]"))
+    assert [r["result"] for r in responses] == [["a"], ["b"]]
+
+
+def test_serve_stream():
+    """Test the line-by-line stdin/stdout loop."""
+    output = StringIO()
+    lines = [_request("perm", ["a {x, y}"]), "\n", _request("perm", ["b"], 2)]
+    serve_stream(lines, output)
+    lines = output.getvalue().splitlines()
+    assert [json.loads(line)["result"] for line in lines] == [["a x", "a y"], ["b"]]
+
+
+@pytest.fixture
+def socket_path(tmp_path):
+    """Run a Unix socket server in a thread and return its path."""
+    path = str(tmp_path / "midjargon.sock")
+    server = UnixServer(path, _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield path
+    server.shutdown()
+    server.server_close()
+
+
+def test_client_round_trip(socket_path):
+    """Test single and pipelined calls over one connection."""
+    with Client(socket_path) as client:
+        assert client.call("perm", "a {1, 2}") == ["a 1", "a 2"]
+        prompts = [f"a {i} --s 100" for i in range(200)]
+        results = list(client.call_many("json", prompts))
+        assert [r[0]["text"] for r in results] == [f"a {i}" for i in range(200)]
+
+
+def test_client_errors(socket_path):
+    """Test that server errors raise, or are returned, and the stream recovers."""
+    with Client(socket_path) as client:
+        with pytest.raises(RPCError, match="stylize"):
+            list(client.call_many("mj", ["a --s 5000", "b", "c"]))
+        assert client.call("perm", "d") == ["d"]
+        results = list(client.call_many("mj", ["a --s 5000", "b"], return_errors=True))
+        assert isinstance(results[0], RPCError)
+        assert results[1][0]["text"] == "b"
@@ -0,0 +1,154 @@
+"""Tests for expansion budgets."""
+
+import pickle
+
+import pytest
+
+from midjargon.core.budget import (
+    ExpansionBudget,
+    ExpansionLimitError,
+    expand_within_budget,
+)
+from midjargon.core.input import expand_midjargon_input
+from midjargon.core.permutations import (
+    compile_prompt,
+    expand_permutations,
+    nesting_depth,
+)
+
+# 2**20 variants: far too many to expand in a test
+HUGE = "a " + " ".join("{x, y}" for _ in range(20))
+
+
+def test_limits_are_checked_before_expanding():
+    """Test that an oversized prompt is refused without generating variants."""
+    with pytest.raises(ExpansionLimitError) as info:
+        expand_midjargon_input(HUGE, budget=ExpansionBudget(max_variants=1000))
+    assert info.value.limit == "max_variants"
+    assert info.value.value == 2**20
+    assert info.value.maximum == 1000
+    assert isinstance(info.value, ValueError)
+
+
+def test_within_budget_matches_unlimited():
+    """Test that a prompt within its budget expands as without one."""
+    prompt = "a {red, blue} {cat, dog} --ar {1:1, 16:9}"
+    budget = ExpansionBudget(max_variants=8, max_bytes=10_000, max_depth=1)
+    assert expand_midjargon_input(prompt, budget=budget) == expand_permutations(prompt)
+
+
+def test_truncate_and_sample_policies():
+    """Test that the non-error policies return as many variants as allowed."""
+    truncated = expand_midjargon_input(
+        HUGE, budget=ExpansionBudget(max_variants=5, policy="truncate")
+    )
+    assert truncated == [compile_prompt(HUGE).variant(i) for i in range(5)]
+    sampled = expand_midjargon_input(
+        HUGE, budget=ExpansionBudget(max_variants=4, policy="sample")
+    )
+    step = 2**20 // 4
+    assert sampled == [compile_prompt(HUGE).variant(i * step) for i in range(4)]
+
+
+def test_max_bytes():
+    """Test the output size limit, which never lets the output exceed it."""
+    prompt = "a {red, blue, green} {cat, dog}"
+    total = sum(len(v) for v in expand_permutations(prompt))
+    with pytest.raises(ExpansionLimitError, match="max_bytes"):
+        expand_midjargon_input(prompt, budget=ExpansionBudget(max_bytes=total // 2))
+    for policy in ("truncate", "sample"):
+        budget = ExpansionBudget(max_bytes=total // 2, policy=policy)
+        variants = expand_midjargon_input(prompt, budget=budget)
+        assert variants
+        assert sum(len(v) for v in variants) <= total // 2
+
+
+@pytest.mark.parametrize(
+    "prompt",
+    [
+        "a {b, c} {d, e}",
+        "x{, y}z",
+        "é {ü, ö} ñ",
+        "a{b,c}d{e, {f, g}h}i --ar {1:1, 2:3}",
+        "\\{literal\\} {a, {b, {c, d}}} tail",
+    ],
+)
+def test_output_bytes_is_an_upper_bound(prompt):
+    """Test that the size estimate never understates the real output."""
+    actual = sum(len(v.encode()) for v in expand_permutations(prompt))
+    assert compile_prompt(prompt).output_bytes() >= actual
+
+
+def test_max_depth():
+    """Test that deep nesting is refused before the prompt is compiled."""
+    deep = "{a, " * 500 + "b" + "}" * 500
+    assert nesting_depth(deep) == 500
+    assert nesting_depth("\\{a\\} {b, {c}}") == 2
+    budget = ExpansionBudget(max_depth=10, policy="truncate")
+    with pytest.raises(ExpansionLimitError, match="max_depth"):
+        list(expand_within_budget(deep, budget))
+
+
+def test_shard_budget():
+    """Test that limits apply to the variants of the requested shard."""
+    prompt = "{a, b, c, d, e, f, g, h}"
+    budget = ExpansionBudget(max_variants=4)
+    assert list(expand_within_budget(prompt, budget, (1, 2))) == list("efgh")
+    with pytest.raises(ExpansionLimitError):
+        expand_within_budget(prompt, budget)
+
+
+def test_shard_max_bytes_is_an_upper_bound():
+    """Test that a shard longer than the average variant is still refused."""
+    prompt = "{a, " + "x" * 1000 + "}"
+    with pytest.raises(ExpansionLimitError, match="max_bytes"):
+        list(expand_within_budget(prompt, ExpansionBudget(max_bytes=600), (1, 2)))
+    budget = ExpansionBudget(max_bytes=600, policy="truncate")
+    assert list(expand_within_budget(prompt, budget, (0, 2))) == ["a"]
+    assert list(expand_within_budget(prompt, budget, (1, 2))) == []
+
+
+def test_shard_max_bytes_bounds_the_shard():
+    """Test that the size limit is checked against the shard's own variants."""
+    prompt = "{a, b} " + " ".join("{x, y}" for _ in range(6))
+    shard_bytes = compile_prompt(prompt).output_bytes(0, 2)
+    budget = ExpansionBudget(max_bytes=shard_bytes)
+    assert len(list(expand_within_budget(prompt, budget, (0, 64)))) == 2
+    with pytest.raises(ExpansionLimitError, match="max_bytes"):
+        expand_within_budget(prompt, budget)
+
+
+@pytest.mark.parametrize(
+    "prompt",
+    [
+        "a {b, c} {d, e}",
+        "x{, y}z",
+        "é {ü, ö} ñ",
+        "a{b,c}d{e, {f, g}h}i --ar {1:1, 2:3}",
+        "{a, {b, c}{d, , e}} {f, g{h, i}} j",
+    ],
+)
+def test_output_bytes_of_ranges(prompt):
+    """Test that range bounds add up and never understate the range."""
+    template = compile_prompt(prompt)
+    sizes = [len(v.encode()) for v in template.expand()]
+    for start in range(template.size + 1):
+        for stop in range(start, template.size + 1):
+            bound = template.output_bytes(start, stop)
+            assert bound >= sum(sizes[start:stop])
+            assert bound + template.output_bytes(stop) == template.output_bytes(start)
+
+
+def test_limit_error_pickles():
+    """Test that limit errors survive a trip through a process pool."""
+    error = pickle.loads(pickle.dumps(ExpansionLimitError("max_bytes", 9, 4)))
+    assert (error.limit, error.value, error.maximum) == ("max_bytes", 9, 4)
+    assert str(error) == "Prompt exceeds the max_bytes limit: 9 > 4"
+
+
+def test_invalid_budget():
+    """Test that unknown policies and negative limits are rejected."""
+    with pytest.raises(ValueError, match="Unknown limit policy"):
+        expand_within_budget("a", ExpansionBudget(policy="drop"))
+    with pytest.raises(ValueError, match="must not be negative"):
+        expand_within_budget("a", ExpansionBudget(max_variants=-1))
@@ -0,0 +1,76 @@
+"""Tests for columnar parsing of many prompts."""
+
+from array import array
+
+from midjargon.core.columnar import COLUMN_TYPES, parse_many_columnar
+from midjargon.core.parser import parse_midjargon_prompt_to_dict
+
+PROMPTS = [
+    "https://e.com/a.png a cat --ar 16:9 --s 250 --seed 42 --tile",
+    "a dog --c 20 --seed random --v 6.1 --foo bar",
+    "a bird --cref x.png y.png --r 2.5 --ar wide --iw 1.5",
+    "",
+]
+
+
+def test_columns_hold_parsed_values():
+    """Test that each column matches the per-prompt dicts."""
+    result = parse_many_columnar(PROMPTS)
+    assert len(result) == 4
+    assert result.text == ["a cat", "a dog", "a bird", ""]
+    assert result.images == [("https://e.com/a.png",), (), (), ()]
+    assert result["stylize"].to_list() == [250.0, None, None, None]
+    assert result["chaos"].to_list() == [None, 20.0, None, None]
+    assert result["image_weight"].to_list() == [None, None, 1.5, None]
+    assert result["seed"].to_list() == [42, None, None, None]
+    assert result["aspect_width"].to_list() == [16, None, None, None]
+    assert result["aspect_height"].to_list() == [9, None, None, None]
+    assert result["tile"].to_list() == [1, None, None, None]
+    assert result["version"].to_list() == [None, "6.1", None, None]
+    assert result["character_reference"].to_list() == [
+        None,
+        None,
+        ("x.png", "y.png"),
+        None,
+    ]
+    assert result["foo"].to_list() == [None, "bar", None, None]
+
+
+def test_typed_columns_and_masks():
+    """Test that numeric and flag columns are typed arrays with masks."""
+    result = parse_many_columnar(PROMPTS)
+    assert set(COLUMN_TYPES) <= set(result.columns)
+    for name, typecode in COLUMN_TYPES.items():
+        column = result[name]
+        assert isinstance(column.mask, array)
+        assert column.mask.typecode == "B"
+        assert len(column.mask) == len(column.values) == 4
+        if typecode:
+            assert column.values.typecode == typecode
+    assert list(result["stylize"].mask) == [1, 0, 0, 0]
+
+
+def test_values_that_do_not_fit_go_to_raw():
+    """Test that unconvertible values are kept in the raw columns."""
+    result = parse_many_columnar(PROMPTS)
+    assert result.raw["seed"].to_list() == [None, "random", None, None]
+    assert result.raw["repeat"].to_list() == [None, None, 2.5, None]
+    assert result.raw["aspect"].to_list() == [None, None, "wide", None]
+    assert result["repeat"].to_list() == [None] * 4
+
+
+def test_matches_row_parsing():
+    """Test that columns and row dicts agree on every untyped value."""
+    result = parse_many_columnar(PROMPTS)
+    for row, prompt in enumerate(PROMPTS):
+        parsed = parse_midjargon_prompt_to_dict(prompt)
+        assert result.text[row] == parsed["text"]
+        assert list(result.images[row]) == parsed["images"]
+
+
+def test_empty_input():
+    """Test that no prompts give empty columns."""
+    result = parse_many_columnar([])
+    assert len(result) == 0
+    assert len(result["stylize"].values) == 0
+    assert result.raw == {}
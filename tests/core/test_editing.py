@@ -0,0 +1,119 @@
+"""Tests for incremental re-expansion after template edits."""
+
+import pytest
+
+from midjargon.core.editing import apply_edit, diff_templates
+from midjargon.core.permutations import compile_prompt
+
+PROMPT = "a {red, blue} bird on a {branch, rock {1, 2}} --ar {1:1, 16:9}"
+
+
+def _indices(ranges):
+    return [i for r in ranges for i in r]
+
+
+def _edit(prompt, old, new, occurrence=0):
+    offset = -1
+    for _ in range(occurrence + 1):
+        offset = prompt.index(old, offset + 1)
+    return apply_edit(compile_prompt(prompt), offset, len(old), new)
+
+
+def test_edit_one_option():
+    """Test that renaming an option changes only the variants using it."""
+    edit = _edit(PROMPT, "blue", "green")
+    assert edit.template.source == PROMPT.replace("blue", "green")
+    changed = _indices(edit.changed())
+    assert changed == list(range(6, 12))
+    assert edit.added() == [] and edit.removed() == []
+    assert all(edit.old_index(i) == i for i in range(edit.template.size))
+
+
+def test_edit_nested_option():
+    """Test that an edit inside a nested group reaches only its variants."""
+    edit = _edit(PROMPT, "2", "3", occurrence=0)
+    new = edit.template.expand()
+    assert [new[i] for i in _indices(edit.changed())] == [
+        "a red bird on a rock 3 --ar 1:1",
+        "a red bird on a rock 3 --ar 16:9",
+        "a blue bird on a rock 3 --ar 1:1",
+        "a blue bird on a rock 3 --ar 16:9",
+    ]
+
+
+def test_add_and_remove_options():
+    """Test that new options add variants and shift the indices after them."""
+    edit = _edit(PROMPT, "red, ", "red, pink, ")
+    old, new = edit.previous.expand(), edit.template.expand()
+    assert len(new) == len(old) + 6
+    assert [new[i] for i in _indices(edit.added())] == [v for v in new if "pink" in v]
+    for i, variant in enumerate(new):
+        j = edit.old_index(i)
+        assert (j is None) == ("pink" in variant)
+        if j is not None:
+            assert old[j] == variant and edit.new_index(j) == i
+            assert not edit.is_changed(i)
+
+    back = diff_templates(edit.template, edit.previous)
+    assert back.removed() == edit.added()
+    assert back.added() == []
+
+
+def test_literal_edit_changes_every_variant():
+    """Test that editing text outside the groups changes every variant."""
+    edit = _edit(PROMPT, "bird", "cat")
+    assert edit.changed() == [range(edit.template.size)]
+    assert edit.new_index(5) == 5
+
+
+def test_structural_edit_replaces_variants():
+    """Test that adding a group relates no old variant to a new one."""
+    edit = _edit("a red bird", "red", "{red, blue}")
+    assert edit.removed() == [range(1)]
+    assert edit.added() == [range(2)]
+    assert edit.old_index(1) is None
+
+
+@pytest.mark.parametrize(
+    "edits",
+    [
+        [(3, 0, ","), (4, 0, " pink")],
+        [(0, 0, "{"), (1, 0, "x, y}")],
+        [(8, 4, ""), (7, 1, "")],
+        [(27, 0, ", tree")],
+    ],
+)
+def test_keystrokes_match_full_expansion(edits):
+    """Test that unchanged variants render as before, keystroke by keystroke."""
+    template = compile_prompt(PROMPT)
+    for offset, removed, inserted in edits:
+        edit = apply_edit(template, offset, removed, inserted)
+        old, new = template.expand(), edit.template.expand()
+        kept = [i for i in range(len(new)) if edit.old_index(i) is not None]
+        assert len(kept) == len(old) - len(_indices(edit.removed()))
+        for i in kept:
+            if not edit.is_changed(i):
+                assert new[i] == old[edit.old_index(i)]
+        assert sorted(_indices(edit.added()) + kept) == list(range(len(new)))
+        template = edit.template
+
+
+def test_apply_edit_invalid():
+    """Test that edits outside the source text are rejected."""
+    template = compile_prompt("a {b, c}")
+    with pytest.raises(ValueError):
+        apply_edit(template, 7, 5, "x")
+    with pytest.raises(IndexError):
+        apply_edit(template, 0, 0, "").old_index(2)
+
+
+def test_late_group_edit_per_index():
+    """Test that a late-group edit of a huge template is queried per index."""
+    options = ", ".join(f"o{i}" for i in range(10))
+    template = compile_prompt(" ".join(f"{{{options}}}" for _ in range(10)))
+    offset = template.source.rfind("o3")
+    edit = apply_edit(template, offset, 2, "zz")
+    assert edit.is_changed(3)
+    assert edit.is_changed(10**10 - 7)
+    assert not edit.is_changed(4)
+    assert edit.old_index(10**9 + 3) == 10**9 + 3
@@ -0,0 +1,78 @@
+"""Tests for the single-pass prompt lexer."""
+
+from midjargon.core.lexer import lex_prompt, split_prompt, tokenize_parameters
+
+
+def test_lex_prompt_splits_images_text_and_params():
+    """Test that leading images, text and parameters are separated."""
+    lexed = lex_prompt(
+        "https://a.com/1.png http://b.com/2.jpg  a  cat\ton a mat --ar 16:9 --tile"
+    )
+    assert lexed.images == ["https://a.com/1.png", "http://b.com/2.jpg"]
+    assert lexed.text == "a cat on a mat"
+    assert lexed.params == ["--ar", "16:9", "--tile"]
+
+
+def test_lex_prompt_without_params():
+    """Test a prompt without parameters."""
+    lexed = lex_prompt("  just some\ntext  ")
+    assert lexed.images == []
+    assert lexed.text == "just some text"
+    assert lexed.params == []
+
+
+def test_lex_prompt_only_images_are_leading_urls():
+    """Test that URLs after the first word stay in the text."""
+    lexed = lex_prompt("look at https://a.com/1.png --v 6")
+    assert lexed.images == []
+    assert lexed.text == "look at https://a.com/1.png"
+
+
+def test_lex_prompt_params_need_word_start():
+    """Test that ``--`` inside a word does not start the parameters."""
+    lexed = lex_prompt("state-of--the-art --s 100")
+    assert lexed.text == "state-of--the-art"
+    assert lexed.params == ["--s", "100"]
+
+
+def test_lex_prompt_param_at_start_is_text():
+    """Test that a prompt starting with ``--`` has no text/params split."""
+    lexed = lex_prompt("--ar 16:9")
+    assert lexed.text == "--ar 16:9"
+    assert lexed.params == []
+
+
+def test_lex_prompt_collapses_whitespace_in_quotes():
+    """Test that quoted spans are whitespace-normalised like the text."""
+    lexed = lex_prompt('a cat --no "blurry   text"')
+    assert lexed.params == ["--no", "blurry text"]
+
+
+def test_tokenize_parameters_quotes():
+    """Test quoted spans in parameter strings."""
+    assert tokenize_parameters("--no 'a  b' c\"d e\"") == ["--no", "a  b", "cd e"]
+    assert tokenize_parameters("--x '' --y", collapse=True) == ["--x", "--y"]
+    assert tokenize_parameters('--p "unclosed  quote', collapse=True) == [
+        "--p",
+        "unclosed quote",
+    ]
+
+
+def test_tokenize_parameters_start_offset():
+    """Test tokenising from an offset."""
+    assert tokenize_parameters("text --ar 1:1", 5) == ["--ar", "1:1"]
+    assert tokenize_parameters('text --ar 1:1 --no "x y"', 5) == [
+        "--ar",
+        "1:1",
+        "--no",
+        "x y",
+    ]
+
+
+def test_split_prompt_keeps_parameter_string():
+    """Test that the parameters are returned untokenised."""
+    split = split_prompt('https://a.com/1.png  a  cat --no "x  y" --tile  ')
+    assert split.images == ["https://a.com/1.png"]
+    assert split.text == "a cat"
+    assert split.params == '--no "x  y" --tile'
+    assert split_prompt("a cat").params == ""
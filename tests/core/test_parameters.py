@@ -279,3 +279,51 @@ def test_niji_version_handling():
     # Ensure no 'v' prefix is added
     version = str(params["version"])  # Convert to string to use startswith
     assert not version.startswith("v")
+
+
+def test_register_parameter():
+    """Test adding parameters to the parser at runtime."""
+    from midjargon.core import parameters
+
+    saved_handlers = dict(parameters._HANDLERS)
+    saved_aliases = dict(parameters.PARAMETER_ALIASES)
+    try:
+        parameters.register_parameter("draft", "flag")
+        parameters.register_parameter("exp", aliases=["ex"])
+        parameters.register_parameter("oref", "multi", aliases=["or"])
+        params = parse_parameters("--draft --ex 25 --or a.png b.png --s 100")
+        assert params == {
+            "draft": None,
+            "exp": "25",
+            "oref": ["a.png", "b.png"],
+            "stylize": "100",
+        }
+        with pytest.raises(ValueError, match="Unknown parameter kind"):
+            parameters.register_parameter("bad", "nope")
+    finally:
+        parameters._HANDLERS.clear()
+        parameters._HANDLERS.update(saved_handlers)
+        parameters.PARAMETER_ALIASES.clear()
+        parameters.PARAMETER_ALIASES.update(saved_aliases)
+    assert parse_parameters("--draft 1") == {"draft": "1"}
+
+
+def test_register_parameter_custom_handler():
+    """Test a custom handler that consumes its own tokens."""
+    from midjargon.core import parameters
+
+    def parse_size(params, name, tokens, i):
+        params["width"], params["height"] = tokens[i].split("x")
+        return i + 1
+
+    saved_handlers = dict(parameters._HANDLERS)
+    try:
+        parameters.register_parameter("size", handler=parse_size)
+        assert parse_parameters("--size 640x480 --v 6") == {
+            "width": "640",
+            "height": "480",
+            "version": "6",
+        }
+    finally:
+        parameters._HANDLERS.clear()
+        parameters._HANDLERS.update(saved_handlers)
@@ -0,0 +1,87 @@
+"""Tests for the opt-in parse cache."""
+
+from types import MappingProxyType
+
+import pytest
+
+from midjargon.core.parse_cache import ParseCache
+from midjargon.core.parser import (
+    disable_parse_cache,
+    enable_parse_cache,
+    parse_midjargon_prompt_to_dict,
+)
+
+PROMPT = "https://e.com/a.png a cat --ar 16:9 --s 100 --cref x.png y.png --tile"
+
+
+@pytest.fixture
+def cache():
+    cache = enable_parse_cache(maxsize=2)
+    yield cache
+    disable_parse_cache()
+
+
+def test_cached_results_match_uncached():
+    """Test that caching does not change parse results."""
+    expected = parse_midjargon_prompt_to_dict(PROMPT)
+    enable_parse_cache()
+    try:
+        assert parse_midjargon_prompt_to_dict(PROMPT) == expected
+        assert parse_midjargon_prompt_to_dict(PROMPT) == expected
+    finally:
+        disable_parse_cache()
+
+
+def test_cached_results_are_independent_copies(cache):
+    """Test that mutating a returned dict does not affect the cache."""
+    first = parse_midjargon_prompt_to_dict(PROMPT)
+    first["images"].append("other.png")
+    first["character_reference"].clear()
+    first["text"] = "changed"
+    second = parse_midjargon_prompt_to_dict(PROMPT)
+    assert second["images"] == ["https://e.com/a.png"]
+    assert second["character_reference"] == ["x.png", "y.png"]
+    assert second["text"] == "a cat"
+
+
+def test_readonly_results(cache):
+    """Test that read-only results are shared and immutable."""
+    first = parse_midjargon_prompt_to_dict(PROMPT, readonly=True)
+    assert isinstance(first, MappingProxyType)
+    assert first["character_reference"] == ("x.png", "y.png")
+    assert parse_midjargon_prompt_to_dict(PROMPT, readonly=True) is first
+    with pytest.raises(TypeError):
+        first["text"] = "changed"  # type: ignore[index]
+
+
+def test_cache_info_and_eviction(cache):
+    """Test hit, miss and eviction counters."""
+    for prompt in ("a", "b", "a", "c", "b"):
+        parse_midjargon_prompt_to_dict(prompt)
+    info = cache.cache_info()
+    assert (info.hits, info.misses, info.evictions) == (1, 4, 2)
+    assert info.currsize == info.maxsize == 2
+    assert info.currbytes > 0
+    cache.cache_clear()
+    assert cache.cache_info()[:5] == (0, 0, 2, 0, 0)
+    assert cache.cache_info().currbytes == 0
+
+
+def test_memory_cap():
+    """Test that the byte limit bounds the cache."""
+    cache = ParseCache(parse_midjargon_prompt_to_dict, max_bytes=2000)
+    for i in range(50):
+        cache.get(f"prompt number {i} --ar 1:1")
+    info = cache.cache_info()
+    assert 0 < info.currbytes <= 2000
+    assert info.evictions == 50 - info.currsize
+    # A result bigger than the whole budget is returned but not stored
+    tiny = ParseCache(parse_midjargon_prompt_to_dict, max_bytes=10)
+    assert tiny.get("a cat")["text"] == "a cat"
+    assert tiny.cache_info().currsize == 0
+
+
+def test_invalid_limits():
+    """Test that cache limits must be positive."""
+    with pytest.raises(ValueError, match="must be positive"):
+        ParseCache(parse_midjargon_prompt_to_dict, maxsize=0)
@@ -1,6 +1,16 @@
 """Tests for prompt parsing functionality."""
 
-from midjargon.core.parser import parse_midjargon_prompt_to_dict
+from itertools import pairwise
+
+import pytest
+
+from midjargon.core.parser import (
+    BatchParser,
+    parse_midjargon_prompt_to_dict,
+    parse_prompts,
+)
+from midjargon.core.permutations import expand_permutations
+from midjargon.core.profiling import profile
 
 # Test constants
 ASPECT_RATIO = "16:9"
@@ -92,3 +102,41 @@ def test_prompt_with_whitespace_handling():
     prompt = "a {  red  ,  blue  } bird"
     result = parse_midjargon_prompt_to_dict(prompt)
     assert result["text"] == "a { red , blue } bird"
+
+
+@pytest.mark.parametrize(
+    "template",
+    [
+        "a {red, blue, green} bird --ar 16:9 --s 250 --cref https://x.com/r.png",
+        "a {red, blue} bird --ar {16:9, 1:1} --s {100, 200}",
+        f"{{{IMAGE_URL}, }} a cat {{, --ar 2:3}} --no {{red, blue}} green",
+        '{a  b, c} --p "x  y" --seed {random, 12} --tile',
+        "{a, } --s x --q",
+        "{, --ar 1:1}",
+        "plain text",
+    ],
+)
+def test_parse_prompts_matches_per_variant_parsing(template):
+    """Test that shared parameter parsing gives identical, separate dicts."""
+    variants = expand_permutations(template)
+    shared = list(parse_prompts(variants))
+    assert shared == [parse_midjargon_prompt_to_dict(v) for v in variants]
+    for first, second in pairwise(shared):
+        for key, value in first.items():
+            if isinstance(value, list):
+                assert value is not second.get(key)
+
+
+def test_batch_parser_parses_each_parameter_string_once():
+    """Test that variants with the same tail share one parameter parse."""
+    variants = expand_permutations(
+        "a {red, blue, green} {cat, dog} --ar {16:9, 1:1} --s 250"
+    )
+    with profile() as profiler:
+        parsed = list(parse_prompts(variants))
+    assert profiler.stats()["parameters"].calls == 2
+    assert profiler.stats()["parse"].calls == len(variants) == 12
+    assert {d["aspect"] for d in parsed} == {"16:9", "1:1"}
+
+    parse = BatchParser(maxsize=0)
+    assert parse(variants[0]) == parse(variants[0])
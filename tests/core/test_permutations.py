@@ -0,0 +1,237 @@
+"""Tests for the template-based permutation engine."""
+
+from itertools import islice
+
+import pytest
+
+from midjargon.core.budget import ExpansionBudget
+from midjargon.core.input import expand_midjargon_input
+from midjargon.core.permutations import (
+    PromptTemplate,
+    _unescape,
+    compile_prompt,
+    count_variants,
+    expand_permutations,
+    expand_shard,
+    expand_text,
+    iter_expand,
+    parse_shard,
+    variant_at,
+)
+
+# Prompts whose expansion must match the multi-pass ``expand_text`` engine
+EQUIVALENCE_PROMPTS = [
+    "",
+    "a simple prompt",
+    "a {red, blue} bird",
+    "a {red, blue} bird on a {branch, rock}",
+    "a {red {cat, dog}, blue bird}",
+    "a {big {red, blue}, small green} bird",
+    r"a {red\, blue, green} bird",
+    r"a \{red, blue\} bird",
+    "a {red, blue bird",
+    "a {} bird",
+    "a {, very} big bird",
+    "smooth edges {, --p} --s 75",
+    "{a,b}{c,d}",
+    "{a,b}x{c,d}",
+    "{, x} {a, b} tail",
+    "a {  red  ,  blue  } bird --ar {16:9, 1:1} --s {100, 200}",
+]
+
+
+@pytest.mark.parametrize("prompt", EQUIVALENCE_PROMPTS)
+def test_iter_expand_matches_expand_text(prompt):
+    """Test that lazy expansion yields the legacy variants in the same order."""
+    expected = [_unescape(t) for t in expand_text(prompt)]
+    assert list(iter_expand(prompt)) == expected
+
+
+def test_iter_expand_order():
+    """Test that earlier groups vary slowest."""
+    assert list(iter_expand("{a, b} {1, 2}")) == ["a 1", "a 2", "b 1", "b 2"]
+
+
+@pytest.mark.parametrize(
+    ("prompt", "expected"),
+    [
+        (r"a \{b\} c", ["a {b} c"]),
+        (r"\{a, b\}", ["{a, b}"]),
+        (r"{x\,y, z}", ["x,y", "z"]),
+        (r"{a\{b, c}", ["a{b", "c"]),
+        (r"{a, b\}}", ["a", "b}"]),
+        (r"{a\}, b}", ["a}", "b"]),
+        (r"{a {b\}, c}, d}", ["a b, c}", "d"]),
+        # The escaped brace is kept and the unmatched "}" stays literal text;
+        # the multi-pass engine dropped both from the first variant.
+        (r"{b--s 1\{,a}}", ["b--s 1{}", "a}"]),
+    ],
+)
+def test_iter_expand_escapes(prompt, expected):
+    """Test that escaped braces and commas expand to literal characters."""
+    assert list(iter_expand(prompt)) == expected
+    assert expand_permutations(prompt) == expected
+
+
+def test_iter_expand_is_lazy():
+    """Test that variants of a huge permutation space are produced on demand."""
+    prompt = " ".join("{a, b, c, d, e, f, g, h, i, j}" for _ in range(20))
+    variants = iter_expand(prompt)
+    first, second = islice(variants, 2)
+    assert first == " ".join("a" * 20)
+    assert second == " ".join("a" * 19) + " b"
+
+
+def test_expand_midjargon_input_lazy():
+    """Test that lazy=True returns an iterator over the same variants."""
+    prompt = "a {red, blue} bird on a {branch, rock}"
+    result = expand_midjargon_input(prompt, lazy=True)
+    assert not isinstance(result, list)
+    assert list(result) == expand_midjargon_input(prompt)
+
+
+def test_compile_prompt_is_cached():
+    """Test that compiling the same template twice reuses the cached tree."""
+    compile_prompt.cache_clear()
+    template = compile_prompt("a {red, blue} bird")
+    assert isinstance(template, PromptTemplate)
+    assert compile_prompt("a {red, blue} bird") is template
+    assert compile_prompt.cache_info().hits == 1
+
+
+def test_prompt_template_is_immutable():
+    """Test that compiled templates cannot be modified."""
+    template = compile_prompt("a {red, blue} bird")
+    with pytest.raises(AttributeError):
+        template.source = "other"  # type: ignore[misc]
+
+
+@pytest.mark.parametrize("prompt", EQUIVALENCE_PROMPTS)
+def test_prompt_template_count_and_variant(prompt):
+    """Test that count() and variant(i) agree with full expansion."""
+    template = compile_prompt(prompt)
+    variants = template.expand()
+    assert template.count() == len(variants)
+    assert [template.variant(i) for i in range(template.count())] == variants
+    assert list(template) == variants
+
+
+def test_prompt_template_variant_index_range():
+    """Test negative and out-of-range variant indices."""
+    template = compile_prompt("{a, b, c}")
+    assert template.variant(-1) == "c"
+    with pytest.raises(IndexError):
+        template.variant(3)
+    with pytest.raises(IndexError):
+        template.variant(-4)
+
+
+def test_count_variants_without_expansion():
+    """Test that sequential groups multiply and nested options add up."""
+    assert count_variants("a simple prompt") == 1
+    assert count_variants("a {red, blue} bird on a {branch, rock, leaf}") == 6
+    assert count_variants("a {red {cat, dog}, blue bird}") == 3
+    assert count_variants("{a, {b, c}{d, e}}") == 5
+    wide = " ".join("{a, b, c, d, e, f, g, h, i, j}" for _ in range(30))
+    assert count_variants(wide) == 10**30
+
+
+def test_variant_at_huge_space():
+    """Test random access far into a permutation space too big to expand."""
+    wide = " ".join("{0, 1, 2, 3, 4, 5, 6, 7, 8, 9}" for _ in range(30))
+    index = 123456789012345678901234567890
+    assert variant_at(wide, index) == " ".join(str(index))
+    assert variant_at(wide, -1) == " ".join("9" * 30)
+
+
+@pytest.mark.parametrize(("start", "stop"), [(0, 3), (2, 7), (5, None), (-2, None)])
+def test_iter_expand_range(start, stop):
+    """Test that index ranges match slices of the full expansion."""
+    prompt = "a {red {cat, dog}, blue} bird on a {branch, rock, leaf}"
+    expected = expand_midjargon_input(prompt)[start:stop]
+    assert list(iter_expand(prompt, start, stop)) == expected
+
+
+def test_iter_expand_ranges_partition_the_space():
+    """Test that consecutive ranges cover every variant exactly once."""
+    prompt = "{a, b, c} {d, {e, f}} {g, h}"
+    total = count_variants(prompt)
+    chunks = [list(iter_expand(prompt, i, i + 5)) for i in range(0, total, 5)]
+    assert [v for chunk in chunks for v in chunk] == expand_midjargon_input(prompt)
+
+
+@pytest.mark.parametrize("shard_count", [1, 2, 3, 7, 20])
+def test_expand_shard_partitions_in_order(shard_count):
+    """Test that concatenated shards reproduce the canonical expansion."""
+    prompt = "a {red {cat, dog}, blue} bird on a {branch, rock, leaf}"
+    shards = [list(expand_shard(prompt, i, shard_count)) for i in range(shard_count)]
+    assert [v for shard in shards for v in shard] == expand_midjargon_input(prompt)
+    sizes = [len(shard) for shard in shards]
+    assert max(sizes) - min(sizes) <= 1
+
+
+def test_expand_shard_huge_space():
+    """Test that a shard deep inside a huge space is produced directly."""
+    wide = " ".join("{0, 1, 2, 3, 4, 5, 6, 7, 8, 9}" for _ in range(30))
+    last = expand_shard(wide, 999, 1000)
+    assert next(last) == " ".join("999" + "0" * 27)
+
+
+@pytest.mark.parametrize(("index", "count"), [(0, 0), (-1, 2), (2, 2)])
+def test_expand_shard_invalid(index, count):
+    """Test that invalid shard specifications are rejected."""
+    with pytest.raises(ValueError):
+        expand_shard("a {b, c}", index, count)
+
+
+def test_parse_shard():
+    """Test that ``i/n`` shard specs parse into an index and a count."""
+    assert parse_shard("2/8") == (2, 8)
+    assert parse_shard(None) is None
+    for spec in ("2", "a/b", "1/2/3"):
+        with pytest.raises(ValueError, match="expected i/n"):
+            parse_shard(spec)
+
+
+@pytest.mark.parametrize(
+    ("prompt", "expected"),
+    [
+        ("{a, a b}{, b}", ["a", "a b", "a b b"]),
+        ("{a, a} x", ["a x"]),
+        ("x {, } y", ["x y"]),
+        ("p {a, a x} x {b, x b}", ["p a x b", "p a x x b", "p a x x x b"]),
+        ("{a, {a, b}} c", ["a c", "b c"]),
+    ],
+)
+def test_unique_expansion(prompt, expected):
+    """Test that duplicate renderings are yielded once, in canonical order."""
+    assert expand_permutations(prompt, unique=True) == expected
+    assert list(iter_expand(prompt, unique=True)) == expected
+    assert list(expand_midjargon_input(prompt, lazy=True, unique=True)) == expected
+    budget = ExpansionBudget(max_variants=100)
+    assert expand_midjargon_input(prompt, budget=budget, unique=True) == expected
+
+
+@pytest.mark.parametrize(
+    ("prompt", "injective"),
+    [
+        ("a simple prompt", True),
+        ("a {red, blue bird} --ar 1:1", True),
+        ("a {red, blue} bird --ar {16:9, 1:1}", True),
+        ("{a,b}{c,d}", False),
+        ("{a,b}x{c,d}", False),
+        ("a {red, blue bird} {x, y}", False),
+        ("a {, very} big bird", False),
+        ("a {red, red} bird", False),
+        ("a {red {cat, dog}, blue} bird", False),
+    ],
+)
+def test_injective_templates(prompt, injective):
+    """Test the structural proof that a template renders distinct variants."""
+    template = compile_prompt(prompt)
+    assert template.is_injective() is injective
+    if injective:
+        variants = template.expand()
+        assert len(set(variants)) == len(variants)
+        # Proven templates are streamed without a filter
+        assert list(template.iter_unique(1, 3)) == variants[1:3]
@@ -0,0 +1,118 @@
+"""Tests for the per-stage profiling hooks."""
+
+import threading
+
+import midjargon.core.parser as parser_module
+import midjargon.core.permutations as permutations_module
+from midjargon.batch import iter_convert
+from midjargon.core.parser import parse_midjargon_prompt_to_dict
+from midjargon.core.profiling import (
+    Profiler,
+    add_hook,
+    profile,
+    profiling_enabled,
+    remove_hook,
+)
+from midjargon.engines.midjourney import MidjourneyParser
+
+PROMPT = "a {red, blue} bird --ar 16:9 --s {100, 200}"
+
+
+def test_profiling_times_earlier_references():
+    """Test that references taken before profiling started are timed too."""
+    parse = parse_midjargon_prompt_to_dict
+    assert not profiling_enabled()
+    with profile() as profiler:
+        assert profiling_enabled()
+        parse("a cat --ar 1:1")
+    assert parser_module.parse_midjargon_prompt_to_dict is parse
+    assert profiler.stats()["parse"].calls == 1
+
+
+def test_batch_conversion_is_profiled():
+    """Test that converters held in the batch tables report their stage."""
+    with profile() as profiler:
+        items = list(iter_convert("fal", [(0, PROMPT, 0, None)]))
+    assert all(item.error is None for item in items)
+    stats = profiler.stats()
+    assert stats["parse"].calls == len(items) == 4
+    assert stats["engine"].calls == 4
+
+
+def test_profile_counts_stages():
+    """Test that each pipeline stage is counted once per call."""
+    parser = MidjourneyParser()
+    with profile() as profiler:
+        for variant in permutations_module.iter_expand(PROMPT):
+            d = parser_module.parse_midjargon_prompt_to_dict(variant)
+            d["image_prompts"] = d.pop("images")
+            parser.parse_dict(d).model_dump()
+    stats = profiler.stats()
+    assert list(stats) == [
+        "expand",
+        "tokenize",
+        "parameters",
+        "parse",
+        "engine",
+        "serialise",
+    ]
+    assert stats["expand"].calls == 1
+    assert stats["parse"].calls == 4
+    assert stats["tokenize"].calls == 4
+    assert stats["engine"].calls == 4
+    assert stats["serialise"].calls == 4
+    assert stats["parse"].seconds >= stats["tokenize"].seconds > 0
+
+
+def test_nested_profiles_and_custom_hooks():
+    """Test that every registered hook sees the calls made while it is."""
+    events = []
+
+    def hook(stage, seconds, calls):
+        events.append((stage, calls))
+
+    add_hook(hook)
+    try:
+        with profile() as profiler:
+            parser_module.parse_midjargon_prompt_to_dict("a cat --ar 1:1")
+        parser_module.parse_midjargon_prompt_to_dict("a dog")
+    finally:
+        remove_hook(hook)
+    assert profiler.stats()["parse"].calls == 1
+    assert events.count(("parse", 1)) == 2
+    assert not profiling_enabled()
+
+
+def test_exports():
+    """Test the dict and Prometheus exports."""
+    profiler = Profiler()
+    profiler("parse", 0.5)
+    profiler("parse", 0.25)
+    profiler("custom", 1.0, 3)
+    assert profiler.as_dict() == {
+        "parse": {"calls": 2, "seconds": 0.75},
+        "custom": {"calls": 3, "seconds": 1.0},
+    }
+    text = profiler.to_prometheus()
+    assert "# TYPE midjargon_stage_calls_total counter" in text
+    assert 'midjargon_stage_calls_total{stage="parse"} 2' in text
+    assert 'midjargon_stage_seconds_total{stage="custom"} 1.0' in text
+    assert "75.0" in profiler.report(wall=1.0)
+    profiler.reset()
+    assert profiler.as_dict() == {}
+
+
+def test_profile_is_thread_safe():
+    """Test that calls from several threads are all counted."""
+
+    def work():
+        for _ in range(50):
+            parser_module.parse_midjargon_prompt_to_dict("a cat --s 100")
+
+    with profile() as profiler:
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert profiler.stats()["parse"].calls == 200
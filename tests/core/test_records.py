@@ -0,0 +1,79 @@
+"""Tests for compact prompt records."""
+
+import pickle
+
+import pytest
+
+from midjargon.batch import to_midjourney
+from midjargon.core.models import ImageReference, MidjourneyParameters, MidjourneyPrompt
+from midjargon.core.records import PromptRecord
+
+PROMPTS = [
+    "a cat",
+    "https://e.com/a.png https://e.com/b.png a cat --ar 16:9 --s 250 --v 6.1",
+    "a cat --niji 6 --seed 42 --style raw --tile --cref x.png y.png --cw 50",
+    "a cat --p abc def --sref s.png --sw 200 --no cars --foo bar --video",
+    "a cat --q 0.5 --r 3 --stop 50 --iw 1.5 --chaos 0",
+]
+
+
+def _prompt(variant):
+    return to_midjourney(variant).to_prompt()
+
+
+@pytest.mark.parametrize("variant", PROMPTS)
+def test_round_trip_is_lossless(variant):
+    """Test that prompt → record → prompt keeps every field."""
+    record = to_midjourney(variant)
+    prompt = record.to_prompt()
+    assert PromptRecord.from_prompt(prompt) == record
+    assert prompt.model_dump() == record.to_dict()
+    assert list(prompt.model_dump()) == list(record.to_dict())
+    assert pickle.loads(pickle.dumps(record)) == record
+
+
+def test_record_matches_model():
+    """Test that a record holds the same values as the model it came from."""
+    prompt = MidjourneyPrompt(
+        text="a cat",
+        image_prompts=[ImageReference(url="https://e.com/a.png", weight=0.5)],
+        parameters=MidjourneyParameters(
+            stylize=250, character_reference=["x.png"], extra_params={"foo": "bar"}
+        ),
+        weight=1.5,
+    )
+    record = PromptRecord.from_prompt(prompt)
+    assert record.to_prompt() == prompt
+    assert record.image_weights == (0.5,)
+    assert record.params == (
+        ("stylize", 250.0),
+        ("character_reference", ("x.png",)),
+        ("extra_params", (("foo", "bar"),)),
+    )
+    assert record.get("stylize") == 250.0
+    assert record.get("tile") is False
+    assert record.get("no") == ()
+    assert record.get("unknown", "x") == "x"
+
+
+def test_records_are_immutable_and_share_values():
+    """Test that records cannot be changed and share interned values."""
+    first, second = to_midjourney("a --ar 16:9"), to_midjourney("b --ar 16:9")
+    with pytest.raises(AttributeError):
+        first.text = "changed"  # type: ignore[misc]
+    assert first.get("aspect_ratio") is second.get("aspect_ratio")
+    dumped = first.to_dict()
+    dumped["no"].append("x")
+    assert first.to_dict()["no"] == []
+
+
+def test_shared_pairs_keep_value_types():
+    """Test that equal values of different types are not mixed up."""
+    base = MidjourneyParameters(extra_params={"x": 1.0})
+    first = PromptRecord.from_prompt(MidjourneyPrompt(text="a", parameters=base))
+    other = MidjourneyParameters(seed=1, personalization=True)
+    second = PromptRecord.from_prompt(MidjourneyPrompt(text="a", parameters=other))
+    assert type(first.get("extra_params")[0][1]) is float
+    assert second.get("seed") == 1
+    assert type(second.get("seed")) is int
+    assert second.get("personalization") is True
@@ -0,0 +1,63 @@
+"""Tests for sampling variants without full expansion."""
+
+import pytest
+
+from midjargon.core.permutations import count_variants, expand_permutations
+from midjargon.core.sampling import sample_indices, sample_variants
+
+# 3**20 variants: only reachable by index
+HUGE = "a " + " ".join("{x, y, z}" for _ in range(20))
+NESTED = (
+    "a {red, {dark, light} blue, green} {cat, dog, {big, small} fox} --ar {1:1, 16:9}"
+)
+OPTIONS = ["red", "dark", "light", "green", "cat", "dog", "big", "small", "1:1", "16:9"]
+
+
+def test_uniform_sample_is_distinct_and_reproducible():
+    """Test that a seeded sample is the same every time and has no repeats."""
+    sample = sample_variants(HUGE, 200, seed=42)
+    assert len(set(sample)) == 200
+    assert sample == sample_variants(HUGE, 200, seed=42)
+    assert sample != sample_variants(HUGE, 200, seed=43)
+    indices = sample_indices(HUGE, 200, seed=42)
+    assert indices == sorted(indices)
+    assert all(0 <= i < 3**20 for i in indices)
+
+
+def test_sample_matches_expansion():
+    """Test that sampled variants are variants, in canonical order."""
+    variants = expand_permutations(NESTED)
+    sample = sample_variants(NESTED, 7, seed=1)
+    assert sample == [variants[i] for i in sample_indices(NESTED, 7, seed=1)]
+    assert sample_variants(NESTED, 1000) == variants
+
+
+def test_huge_spaces_beyond_sys_maxsize():
+    """Test sampling a space too large for range() to report its length."""
+    prompt = " ".join("{a, b, c, d}" for _ in range(40))
+    assert count_variants(prompt) == 4**40
+    assert len(set(sample_variants(prompt, 5, seed=0))) == 5
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_stratified_sample_covers_every_option(seed):
+    """Test that every option, nested ones included, appears in the sample."""
+    sample = sample_variants(NESTED, 6, seed=seed, strategy="stratified")
+    assert len(set(sample)) == 6
+    assert set(sample) <= set(expand_permutations(NESTED))
+    for option in OPTIONS:
+        assert any(option in variant.split() for variant in sample), option
+
+
+def test_stratified_sample_too_small():
+    """Test that a stratified sample too small to cover all options fails."""
+    with pytest.raises(ValueError, match="at least 4 variants"):
+        sample_variants(NESTED, 3, strategy="stratified")
+
+
+def test_invalid_arguments():
+    """Test that unknown strategies and negative sizes are rejected."""
+    with pytest.raises(ValueError, match="Unknown sampling strategy"):
+        sample_variants(NESTED, 3, strategy="systematic")
+    with pytest.raises(ValueError, match="must not be negative"):
+        sample_variants(NESTED, -1)
@@ -0,0 +1,46 @@
+"""Tests for segment-sharing expansion."""
+
+import io
+
+import pytest
+
+from midjargon.core.permutations import expand_permutations, iter_expand
+from midjargon.core.segments import expand_segments, iter_segments
+from tests.core.test_permutations import EQUIVALENCE_PROMPTS
+
+
+@pytest.mark.parametrize("prompt", EQUIVALENCE_PROMPTS)
+def test_segments_join_to_variants(prompt):
+    """Test that joined segments reproduce the string expansion."""
+    variants = expand_segments(prompt)
+    assert list(variants) == expand_permutations(prompt)
+    assert all(all(segments) for segments in variants.segments)
+
+
+def test_segments_share_template_text():
+    """Test that every variant references the same literal string."""
+    literal = "x" * 2000 + " "
+    prompt = literal + "{" + ", ".join(f"opt{i}" for i in range(500)) + "}"
+    variants = expand_segments(prompt)
+    assert len(variants) == 500
+    shared = variants.segments[0][0]
+    assert all(segments[0] is shared for segments in variants.segments)
+    assert variants[7] == literal + "opt7"
+    assert variants.text_length() == sum(len(v) for v in variants)
+
+
+def test_segmented_variants_sequence():
+    """Test indexing, slicing, ranges and writing."""
+    prompt = "a {red, blue {x, }} bird --ar {1:1, 16:9}"
+    expected = expand_permutations(prompt)
+    variants = expand_segments(prompt)
+    assert variants[-1] == expected[-1]
+    assert variants[1:3] == expected[1:3]
+    assert "a blue bird --ar 1:1" in variants
+    assert list(expand_segments(prompt, 2, 5)) == expected[2:5]
+    assert ["".join(s) for s in iter_segments(prompt, -2)] == list(
+        iter_expand(prompt, -2)
+    )
+    stream = io.StringIO()
+    variants.write(stream)
+    assert stream.getvalue() == "".join(v + "\n" for v in expected)
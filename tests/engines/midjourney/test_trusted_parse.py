@@ -0,0 +1,74 @@
+"""Tests for the trusted (non-revalidating) MidjourneyParser fast path."""
+
+import pytest
+from pydantic import ValidationError
+
+from midjargon.core.parser import (
+    parse_midjargon_prompt,
+    parse_midjargon_prompt_to_dict,
+)
+from midjargon.engines.midjourney import MidjourneyParser
+
+PROMPTS = [
+    "a cat",
+    "a cat --ar 16:9 --s 250 --c 20 --w 100 --iw 1.5 --q 0.5",
+    "https://example.com/a.png HTTPS://Example.com/b a cat --v 6.1 --style raw",
+    "a cat --niji 6 --seed 42 --stop 50 --tile --turbo",
+    "a cat --niji --seed random --relax --r 3 --sv 2",
+    "a cat --cref https://e.com/c.png https://e.com/d.png --cw 50 --sw 200",
+    "a cat --sref https://e.com/s.png --p abc def --no cars --foo bar --video",
+    "a cat --p --ar 4:3 --v 5",
+    "a cat --stylize 100.0 --chaos 0 --weird 0 --repeat 1.0",
+    "https://not a url --ar 1:1",
+]
+
+INVALID = [
+    "a cat --v 99",
+    "a cat --style bogus",
+    "a cat --seed abc",
+    "a cat --ar 0:1",
+    "a cat --r 2.5",
+]
+
+
+def _dict(prompt):
+    d = parse_midjargon_prompt_to_dict(prompt)
+    d["image_prompts"] = d.pop("images")
+    return d
+
+
+@pytest.mark.parametrize("prompt", PROMPTS)
+def test_trusted_matches_validated(prompt):
+    """Test that the trusted path builds exactly the validated result."""
+    parser = MidjourneyParser()
+    validated = parser.parse_dict(_dict(prompt))
+    trusted = parser.parse_dict(_dict(prompt), trusted=True)
+    assert trusted == validated
+    assert trusted.model_dump() == validated.model_dump()
+    assert list(trusted.model_dump()) == list(validated.model_dump())
+    assert trusted.to_string() == validated.to_string()
+    for field, value in validated.parameters:
+        assert type(getattr(trusted.parameters, field)) is type(value), field
+
+
+@pytest.mark.parametrize("prompt", INVALID)
+def test_trusted_rejects_invalid_values(prompt):
+    """Test that values the model would reject still raise ValueError."""
+    parser = MidjourneyParser()
+    with pytest.raises(ValueError):
+        parser.parse_dict(_dict(prompt))
+    with pytest.raises(ValueError):
+        parser.parse_dict(_dict(prompt), trusted=True)
+
+
+def test_trusted_range_validation():
+    """Test that the parser's own range checks still apply."""
+    with pytest.raises(ValueError, match="Invalid numeric value for stylize"):
+        MidjourneyParser().parse_dict({"text": "a", "stylize": "2000"}, trusted=True)
+
+
+@pytest.mark.parametrize("prompt", INVALID)
+def test_parse_midjargon_prompt_validates(prompt):
+    """Test that the public single-prompt parser keeps Pydantic validation."""
+    with pytest.raises(ValidationError):
+        parse_midjargon_prompt(prompt)
@@ -0,0 +1,59 @@
+"""Tests for column-wise range validation."""
+
+import pytest
+
+from midjargon.core.columnar import parse_many_columnar
+from midjargon.core.parser import parse_midjargon_prompt_to_dict
+from midjargon.engines.midjourney import MidjourneyParser, RangeErrors, validate_ranges
+
+PROMPTS = [
+    "a cat --s 250 --c 20 --q 1",
+    "a cat --s 2000 --c 200",
+    "a cat --stop 5 --iw 1.5",
+    "a cat",
+    "a cat --q 0.1 --r 40",
+]
+
+
+def test_reports_out_of_range_rows():
+    """Test that the mask and messages name each failing row."""
+    errors = validate_ranges(parse_many_columnar(PROMPTS))
+    assert isinstance(errors, RangeErrors)
+    assert errors
+    assert list(errors.mask) == [0, 1, 1, 0, 1]
+    assert errors.messages == {
+        1: [
+            "Invalid numeric value for stylize: 2000",
+            "Invalid numeric value for chaos: 200",
+        ],
+        2: ["Invalid numeric value for stop: 5"],
+        4: ["Invalid numeric value for quality: 0.1"],
+    }
+
+
+def test_messages_match_parse_dict():
+    """Test that each row fails in parse_dict with the first reported error."""
+    errors = validate_ranges(parse_many_columnar(PROMPTS))
+    parser = MidjourneyParser()
+    for row, prompt in enumerate(PROMPTS):
+        prompt_dict = parse_midjargon_prompt_to_dict(prompt)
+        if row in errors.messages:
+            with pytest.raises(ValueError) as exc_info:
+                parser.parse_dict(prompt_dict)
+            assert str(exc_info.value) in errors.messages[row]
+        else:
+            parser.parse_dict(prompt_dict)
+
+
+def test_unset_values_are_not_checked():
+    """Test that the zero fill of rows without a value is ignored."""
+    errors = validate_ranges(parse_many_columnar(["a cat", "a dog --s 10"]))
+    assert not errors
+    assert list(errors.mask) == [0, 0]
+
+
+def test_custom_ranges():
+    """Test that custom ranges replace the defaults."""
+    prompts = parse_many_columnar(["a cat --s 250", "a dog --s 50"])
+    errors = validate_ranges(prompts, {"stylize": (100, 1000), "missing": (0, 1)})
+    assert errors.messages == {1: ["Invalid numeric value for stylize: 50"]}
@@ -0,0 +1,84 @@
+"""Tests for the multi-process batch pipeline."""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import pytest
+
+from midjargon import batch
+from midjargon.batch import BatchItem, _plan_chunks, convert_many
+from midjargon.cli.main import to_fal_dicts, to_midjourney_prompts
+
+PROMPTS = [
+    "a {red, blue} bird on a {branch, rock} --ar 16:9",
+    "https://example.com/image.jpg mystical forest --chaos {10, 20, 30}",
+    "a serene landscape --stylize 100",
+    "a {cat, dog} --stylize {500, 5000}",  # 5000 is out of range
+]
+
+
+def test_plan_chunks_splits_and_merges_prompts():
+    """Test that chunks hold at most chunksize variants across prompt borders."""
+    chunks = list(_plan_chunks(["{a, b, c}", "x", "{d, e}"], 2))
+    assert chunks == [
+        [(0, "{a, b, c}", 0, 2)],
+        [(0, "{a, b, c}", 2, 3), (1, "x", 0, 1)],
+        [(2, "{d, e}", 0, 2)],
+    ]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_convert_many_matches_serial_conversion(workers):
+    """Test that batch output equals per-prompt conversion, in order."""
+    prompts = PROMPTS[:3]
+    items = list(convert_many(prompts, "midjourney", workers=workers, chunksize=3))
+    expected = [r for p in prompts for r in to_midjourney_prompts(p)]
+    assert [item.result.to_dict() for item in items] == expected
+    assert all(item.error is None for item in items)
+    assert [item.prompt_index for item in items] == [0, 0, 0, 0, 1, 1, 1, 2]
+    assert [item.variant_index for item in items] == [0, 1, 2, 3, 0, 1, 2, 0]
+
+
+def test_convert_many_fal():
+    """Test conversion to Fal.ai format."""
+    items = list(convert_many(PROMPTS[:1], "fal", workers=1))
+    assert [item.result for item in items] == to_fal_dicts(PROMPTS[0])
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_convert_many_reports_item_errors(workers):
+    """Test that invalid variants are reported without aborting the batch."""
+    items = list(convert_many(PROMPTS[3:], workers=workers, chunksize=1))
+    assert len(items) == 4
+    errors = [item for item in items if item.error]
+    assert [item.variant for item in errors] == [
+        "a cat --stylize 5000",
+        "a dog --stylize 5000",
+    ]
+    assert all(item.result is None for item in errors)
+    assert all("stylize" in item.error for item in errors)
+    assert items[0] == BatchItem(0, 0, "a cat --stylize 500", items[0].result, None)
+
+
+def _shout(variant):
+    return variant.upper()
+
+
+def test_replaced_converter_reaches_spawned_workers(monkeypatch):
+    """Test that workers started without fork use a replaced converter."""
+    spawn = multiprocessing.get_context("spawn")
+    monkeypatch.setattr(
+        batch, "ProcessPoolExecutor", partial(ProcessPoolExecutor, mp_context=spawn)
+    )
+    monkeypatch.setitem(batch.CONVERTERS, "fal", _shout)
+    items = list(convert_many(["a {b, c}"], "fal", workers=2, chunksize=1))
+    assert [item.result for item in items] == ["A B", "A C"]
+
+
+def test_convert_many_invalid_arguments():
+    """Test that unknown engines and bad chunk sizes are rejected up front."""
+    with pytest.raises(ValueError, match="Unknown engine"):
+        convert_many(PROMPTS, "dalle")
+    with pytest.raises(ValueError, match="Chunk size"):
+        convert_many(PROMPTS, chunksize=0)
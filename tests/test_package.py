@@ -6,3 +6,36 @@ def test_version():
     import midjargon
 
     assert midjargon.__version__
+
+
+def _loaded_modules(code: str) -> set[str]:
+    """Run *code* in a fresh interpreter and return the modules it loaded."""
+    import json
+    import subprocess
+    import sys
+
+    probe = f"{code}\nimport sys, json\nprint(); print(json.dumps(sorted(sys.modules)))"
+    result = subprocess.run(
+        [sys.executable, "-c", probe], capture_output=True, text=True, check=True
+    )
+    return set(json.loads(result.stdout.splitlines()[-1]))
+
+
+def test_import_is_lazy():
+    """Verify importing the package and CLI does not load heavy dependencies."""
+    for code in ("import midjargon", "import midjargon.cli.main"):
+        loaded = _loaded_modules(code)
+        assert not {"pydantic", "rich", "fire", "importlib.metadata"} & loaded, code
+
+
+def test_perm_json_skips_pydantic_and_rich():
+    """Verify ``perm --json-output`` only loads what it needs."""
+    code = (
+        "import sys\n"
+        "sys.argv = ['midjargon', 'perm', 'a {b, c}', '--json-output']\n"
+        "from midjargon.cli import main\n"
+        "main()"
+    )
+    loaded = _loaded_modules(code)
+    assert "fire" in loaded
+    assert not {"pydantic", "rich"} & loaded
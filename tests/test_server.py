@@ -0,0 +1,192 @@
+"""Tests for the asyncio HTTP service."""
+
+import asyncio
+import json
+import socket
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from midjargon.core.budget import ExpansionBudget
+from midjargon.core.permutations import expand_permutations
+from midjargon.server import MAX_HEADERS, MidjargonServer
+
+PROMPT = "a {red, green, blue} {cat, dog} --s {100, 250}"
+
+
+class _Running:
+    """A MidjargonServer listening on a free port in a background loop."""
+
+    def __init__(self, **options):
+        self.server = MidjargonServer(**options)
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.loop.run_forever, daemon=True).start()
+        self.listener = self._run(self.server.start("127.0.0.1", 0))
+        port = self.listener.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}"
+
+    def _run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result(10)
+
+    def stop(self):
+        self.listener.close()
+        self._run(self.listener.wait_closed())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.server.close()
+
+
+@pytest.fixture
+def service():
+    """Run an in-process service (blocks converted in a thread)."""
+    running = _Running(workers=0, chunksize=5)
+    yield running
+    running.stop()
+
+
+def _post(url, payload):
+    request = urllib.request.Request(url, data=json.dumps(payload).encode())
+    with urllib.request.urlopen(request) as response:
+        assert response.headers["Transfer-Encoding"] == "chunked"
+        return [json.loads(line) for line in response.read().splitlines()]
+
+
+def _get_json(url):
+    with urllib.request.urlopen(url) as response:
+        return json.loads(response.read())
+
+
+def test_permute_streams_all_variants(service):
+    """Test that /permute streams every variant in order across blocks."""
+    assert _post(service.url + "/permute", {"prompt": PROMPT}) == (
+        expand_permutations(PROMPT)
+    )
+
+
+def test_permute_shard_and_get(service):
+    """Test the shard parameter and GET query parameters."""
+    url = service.url + "/permute?prompt=a+%7Bx%2C+y%7D&shard=1/2"
+    with urllib.request.urlopen(url) as response:
+        assert response.read() == b'"a y"\n'
+
+
+def test_conversion_endpoints(service):
+    """Test /parse, /midjourney and /fal results and per-variant errors."""
+    parsed = _post(service.url + "/parse", {"prompt": "a {x, y} --ar 16:9"})
+    assert [r["result"]["text"] for r in parsed] == ["a x", "a y"]
+    mj = _post(service.url + "/midjourney", {"prompt": "a --s {100, 5000}"})
+    assert mj[0]["result"]["stylize"] == 100
+    assert "stylize" in mj[1]["error"]
+    assert [r["variant"] for r in mj] == [0, 1]
+    fal = _post(service.url + "/fal", {"prompt": "a cat --ar 1:1"})
+    assert fal[0]["result"]["aspect_ratio"] == "1:1"
+
+
+def test_bad_requests(service):
+    """Test error statuses for bad input and unknown paths."""
+    for url, data, status in [
+        ("/parse", b"{bad", 400),
+        ("/parse", b'{"text": "a"}', 400),
+        ("/permute", b'{"prompt": "a", "shard": "5/2"}', 400),
+        ("/nowhere", None, 404),
+    ]:
+        with pytest.raises(urllib.error.HTTPError) as exc_info:
+            urllib.request.urlopen(urllib.request.Request(service.url + url, data))
+        assert exc_info.value.code == status
+        assert "error" in json.loads(exc_info.value.read())
+
+
+def _raw(url, data, *, wait=10):
+    """Send raw *data* to the service and return the status code of its reply."""
+    host, port = url.removeprefix("http://").split(":")
+    with socket.create_connection((host, int(port)), timeout=wait) as client:
+        client.sendall(data)
+        return int(client.makefile("rb").readline().split()[1])
+
+
+def test_oversized_request_head(service):
+    """Test that huge or countless headers get 400 instead of a dropped reply."""
+    huge = b"GET /health HTTP/1.1\r\nX-Big: " + b"x" * 70_000 + b"\r\n\r\n"
+    assert _raw(service.url, huge) == 400
+    many = b"GET /health HTTP/1.1\r\n" + b"X-A: 1\r\n" * (MAX_HEADERS + 1)
+    assert _raw(service.url, many + b"\r\n") == 400
+    assert _raw(service.url, b"GET /health HTTP/1.1\r\n\r\n") == 200
+
+
+def test_read_timeout():
+    """Test that a client too slow to send its request gets 408."""
+    running = _Running(workers=0, read_timeout=0.2)
+    try:
+        assert _raw(running.url, b"GET /health HTTP/1.1\r\nHost: x") == 408
+    finally:
+        running.stop()
+
+
+def test_budget():
+    """Test that prompts beyond the budget, or failing to compile, get 400."""
+    running = _Running(workers=0, budget=ExpansionBudget(max_variants=4))
+    try:
+        for prompt, message in [
+            ("{a, b, c} {d, e}", "max_variants"),
+            ("{" * 3000 + "a" + "}" * 3000, "recursion"),
+        ]:
+            data = json.dumps({"prompt": prompt}).encode()
+            with pytest.raises(urllib.error.HTTPError) as exc_info:
+                urllib.request.urlopen(
+                    urllib.request.Request(running.url + "/permute", data)
+                )
+            assert exc_info.value.code == 400
+            assert message in json.loads(exc_info.value.read())["error"]
+        assert _post(running.url + "/permute", {"prompt": "{a, b} {c, d}"}) == [
+            "a c",
+            "a d",
+            "b c",
+            "b d",
+        ]
+    finally:
+        running.stop()
+
+
+def test_default_depth_limit(service):
+    """Test that the default budget refuses deeply nested prompts."""
+    data = json.dumps({"prompt": "{a, " * 100 + "b" + "}" * 100}).encode()
+    with pytest.raises(urllib.error.HTTPError) as exc_info:
+        urllib.request.urlopen(urllib.request.Request(service.url + "/parse", data))
+    assert exc_info.value.code == 400
+    assert "max_depth" in json.loads(exc_info.value.read())["error"]
+
+
+def test_metrics(service):
+    """Test request counters and latencies."""
+    _post(service.url + "/permute", {"prompt": "a"})
+    with pytest.raises(urllib.error.HTTPError):
+        urllib.request.urlopen(service.url + "/permute")
+    metrics = _get_json(service.url + "/metrics")["endpoints"]["/permute"]
+    assert metrics["requests"] == 2
+    assert metrics["errors"] == 1
+    assert metrics["in_flight"] == 0
+    assert set(metrics["latency_ms"]) == {"mean", "p50", "p95", "p99", "max"}
+    assert _get_json(service.url + "/health") == {"status": "ok"}
+
+
+def test_concurrency_limit():
+    """Test that requests over the limit are rejected with 503."""
+    running = _Running(workers=0, max_concurrency=0)
+    try:
+        with pytest.raises(urllib.error.HTTPError) as exc_info:
+            urllib.request.urlopen(running.url + "/permute?prompt=a")
+        assert exc_info.value.code == 503
+        assert running.server.metrics["/permute"].rejected == 1
+    finally:
+        running.stop()
+
+
+def test_process_pool():
+    """Test conversion in worker processes."""
+    running = _Running(workers=2, chunksize=3)
+    try:
+        results = _post(running.url + "/midjourney", {"prompt": PROMPT})
+        assert [r["prompt"] for r in results] == expand_permutations(PROMPT)
+    finally:
+        running.stop()